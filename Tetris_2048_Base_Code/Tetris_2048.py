@@ -9,60 +9,102 @@ from lib.picture import Picture  # used for displaying an image on the game menu
 from lib.color import Color  # used for coloring the game menu
 import os  # the os module is used for file and directory operations
 from game_grid import GameGrid  # the class for modeling the game grid
-from tetromino import Tetromino  # the class for modeling the tetrominoes
+from tetromino import TetrominoPool  # used for reusing the tetrominoes
+from score import Score  # the class for modeling the score of the game
+from input_handler import InputHandler  # for handling the keyboard input
+from lib.recorder import Recorder  # used for recording the displayed frames
+from lib.framelimiter import FrameLimiter  # used for pacing the game loop
+from lib.gcscheduler import GCScheduler  # used for timing the collections
+import argparse  # used for parsing the command line arguments
+import collections  # used for the queue of the next tetrominoes
 import random# used for creating tetrominoes with random types (shapes)
 import time
 
-# The main function where this program starts execution
-def start():
-   # set the dimensions of the game grid
-   grid_h, grid_w = 20, 12
-   # set the size of the drawing canvas (the displayed window)
-   canvas_h, canvas_w = 40 * grid_h, 40 * (grid_w + 6)
-   stddraw.setCanvasSize(canvas_w, canvas_h)
+# The main function where this program starts execution with a game grid of
+# the given dimensions (the frames of the game are recorded to record_file
+# when it is given, see lib.recorder, and direct and vsync select the display
+# backend and render_scale and window_scale set the resolution of the
+# drawing, see stddraw.setCanvasSize, and n_previews is the number of the
+# next tetrominoes shown in the side panel, and the garbage is collected only
+# when a tetromino enters the game grid when gc_control is True)
+def start(grid_h=20, grid_w=12, record_file=None, direct=False, vsync=False,
+          render_scale=1.0, window_scale=1.0, n_previews=3, gc_control=False):
+   # set the size of the drawing canvas (the displayed window) with 40 pixels
+   # per cell (fewer pixels per cell for the grids that would not fit)
+   cell_size = max(1, min(40, 800 // grid_h, 1440 // (grid_w + 6)))
+   canvas_h, canvas_w = cell_size * grid_h, cell_size * (grid_w + 6)
+   stddraw.setCanvasSize(canvas_w, canvas_h, direct, vsync, render_scale,
+                         window_scale)
    # set the scale of the coordinate system for the drawing canvas
    stddraw.setXscale(-0.5, grid_w + 5.5)
    stddraw.setYscale(-0.5, grid_h - 0.5)
 
-   # set the game grid dimension values stored and used in the Tetromino class
-   Tetromino.grid_height = grid_h
-   Tetromino.grid_width = grid_w
    # create the game grid
    grid = GameGrid(grid_h, grid_w)
+   # the locked tetrominoes are reused for the new tetrominoes
+   pool = TetrominoPool()
    # create the first tetromino to enter the game grid
    # by using the create_tetromino function defined below
-   current_tetromino = create_tetromino()
-   next_tetromino = create_tetromino()
+   current_tetromino = create_tetromino(grid, pool)
+   # the queue of the tetrominoes to enter the game grid after the current
+   # one (at least 1), shown in the side panel
+   next_tetrominoes = collections.deque(
+      create_tetromino(grid, pool) for _ in range(max(1, n_previews)))
    grid.current_tetromino = current_tetromino
+   # the held tetromino (None until a tetromino is held) and whether holding
+   # is used for the current tetromino (it can be used once per tetromino)
+   held_tetromino, hold_used = None, False
 
    # display a simple menu before opening the game
    # by using the display_game_menu function defined below
    display_game_menu(grid_h, grid_w)
 
-   fall_interval = 0.3 #
+   # the score of the game (the time between the gravity steps decreases as
+   # the level of the score increases)
+   score = Score()
+   fall_interval = score.fall_interval
+   input_handler = InputHandler()
+   frame_limiter = FrameLimiter(60)  # 60 FPS
    last_fall_time = time.time()
+   recorder = None
+   if record_file is not None:
+      recorder = Recorder(record_file)
+      recorder.start()
+   # the automatic garbage collections are disabled after the menu and the
+   # garbage is collected when a tetromino enters the game grid (so that a
+   # collection does not pause the game in the middle of a frame)
+   gc_scheduler = None
+   if gc_control:
+      gc_scheduler = GCScheduler()
+      gc_scheduler.start()
 
    # the main game loop
    while True:
 
-      start_time = time.time()
-      grid.display(next_tetromino)
-
-      # check for any user interaction via the keyboard
-      if stddraw.hasNextKeyTyped():
-         key_typed = stddraw.nextKeyTyped()
-         if key_typed == "left":
-            current_tetromino.move("left", grid)
-         elif key_typed == "right":
-            current_tetromino.move("right", grid)
-         elif key_typed == "down":
-            current_tetromino.move("down", grid)
+      grid.display(next_tetrominoes, score, held_tetromino)
+
+      # apply the actions for all the key events queued since the last frame
+      # (held keys are repeated by the input handler)
+      for action in input_handler.poll(time.perf_counter()):
+         if action == "hold":
+            # swap the current tetromino with the held one (the next one
+            # enters the game grid when no tetromino is held yet)
+            if not hold_used:
+               hold_used = True
+               current_tetromino.reset()
+               if held_tetromino is None:
+                  held_tetromino = current_tetromino
+                  current_tetromino = next_tetrominoes.popleft()
+                  next_tetrominoes.append(create_tetromino(grid, pool))
+               else:
+                  held_tetromino, current_tetromino = (current_tetromino,
+                                                       held_tetromino)
+               grid.current_tetromino = current_tetromino
+               last_fall_time = time.time()
+            continue
+         current_tetromino.apply(action, grid)
+         if action == "down":
             last_fall_time = time.time()  # soft drop sonrası sıfırlama
-         elif key_typed == "z":
-            current_tetromino.rotate(grid)
-         elif key_typed == "space":
-            current_tetromino.hard_drop(grid)
-         stddraw.clearKeysTyped()
 
       current_time = time.time()
       if current_time - last_fall_time > fall_interval:
@@ -76,26 +118,45 @@ def start():
             if game_over:
                break  # oyun bitiyorsa dışarı çık
 
-            current_tetromino = next_tetromino
-            next_tetromino = create_tetromino()
+            score.add_lines(cleared)
+            fall_interval = score.fall_interval
+
+            pool.release(current_tetromino)
+            current_tetromino = next_tetrominoes.popleft()
+            next_tetrominoes.append(create_tetromino(grid, pool))
             grid.current_tetromino = current_tetromino
+            hold_used = False
+            if gc_scheduler is not None:
+               gc_scheduler.collect()
 
          last_fall_time = current_time  # fall zamanını güncelle (döngü içinde)
 
-      elapsed = time.time() - start_time
-      time.sleep(max(0, 1 / 60 - elapsed))  # 60 FPS
+      # wait until the deadline of the current frame
+      frame_limiter.wait()
 
    # print a message on the console when the game is over
    print("Game over")
+   print("Score:", score.points, "(" + score.level_text + ",", score.lines,
+         "lines)")
+   if recorder is not None:
+      recorder.stop()
+      print(recorder.framesWritten(), "frames recorded,",
+            recorder.framesDropped(), "frames dropped")
+   print(frame_limiter.missedDeadlines(), "frame deadlines missed")
+   if gc_scheduler is not None:
+      gc_scheduler.stop()
+      print("%.2f ms longest garbage collection" % (
+         gc_scheduler.maxPause() * 1000))
 
 # A function for creating random shaped tetrominoes to enter the game grid
-def create_tetromino():
+# (reusing the locked tetrominoes released into the given pool)
+def create_tetromino(grid, pool):
    # the type (shape) of the tetromino is determined randomly
    tetromino_types = ['I', 'O', 'Z']
    random_index = random.randint(0, len(tetromino_types) - 1)
    random_type = tetromino_types[random_index]
-   # create and return the tetromino
-   tetromino = Tetromino(random_type)
+   # create (or reuse) and return the tetromino
+   tetromino = pool.acquire(random_type, grid)
    return tetromino
 
 # A function for displaying a simple menu before starting the game
@@ -129,10 +190,16 @@ def display_game_menu(grid_height, grid_width):
    stddraw.setPenColor(text_color)
    text_to_display = "Click Here to Start the Game"
    stddraw.text(img_center_x, 5, text_to_display)
+   # display the menu once, it is displayed again only when the window needs
+   # to be repainted (e.g. after being covered by another window)
+   stddraw.show(0)
    # the user interaction loop for the simple menu
    while True:
-      # display the menu and wait for a short time (50 ms)
-      stddraw.show(50)
+      # sleep until an event (e.g. a mouse click) occurs, the timeout only
+      # bounds the time for handling a keyboard interrupt
+      stddraw.waitForEvent(500)
+      if stddraw.windowExposed():
+         stddraw.show(0)
       # check if the mouse has been left-clicked on the start game button
       if stddraw.mousePressed():
          # get the coordinates of the most recent location at which the mouse
@@ -147,4 +214,26 @@ def display_game_menu(grid_height, grid_width):
 # start() function is specified as the entry point (main function) from which
 # the program starts execution
 if __name__ == '__main__':
-   start()
+   parser = argparse.ArgumentParser(description="Tetris 2048")
+   parser.add_argument("--grid-height", type=int, default=20)
+   parser.add_argument("--grid-width", type=int, default=12)
+   parser.add_argument("--record", metavar="FILE", default=None,
+                       help="record the game to a .gif file or to image "
+                            "files named by a pattern like frame-%%05d.png")
+   parser.add_argument("--direct", action="store_true",
+                       help="draw directly on the window canvas")
+   parser.add_argument("--vsync", action="store_true",
+                       help="synchronize the frames with the display")
+   parser.add_argument("--render-scale", type=float, default=1.0,
+                       help="render at this fraction of the window resolution")
+   parser.add_argument("--window-scale", type=float, default=1.0,
+                       help="scale the window (e.g. 2 for high-DPI displays)")
+   parser.add_argument("--previews", type=int, default=3,
+                       help="the number of the next tetrominoes shown")
+   parser.add_argument("--gc-control", action="store_true",
+                       help="collect the garbage only when a tetromino "
+                            "enters the game grid")
+   args = parser.parse_args()
+   start(args.grid_height, args.grid_width, args.record, args.direct,
+         args.vsync, args.render_scale, args.window_scale, args.previews,
+         args.gc_control)
@@ -0,0 +1,334 @@
+################################################################################
+#                                                                              #
+# A profiler for the memory allocations of a seeded game session. The game is  #
+# played with random actions (drawn in a window with --live, headless without) #
+# under tracemalloc, and the memory blocks allocated and not freed in each     #
+# frame and for each tetromino are reported (the cyclic garbage collector is   #
+# triggered by the objects that stay alive, including the cyclic garbage that  #
+# is not collected yet, not by the temporary ones), with the garbage           #
+# collections during the session, the allocations of each call of the          #
+# functions in TARGETS (the blocks that outlive the call, e.g. the returned    #
+# objects that the caller frees later, and the peak of the temporary memory)   #
+# and the blocks still alive at the end attributed to these functions. (The    #
+# exit status is 1 when --max-blocks is given and the mean number of the       #
+# blocks per frame is above it.)                                               #
+#                                                                              #
+################################################################################
+
+import gc  # used for timing the garbage collections
+import sys  # used for counting the allocated memory blocks
+import time  # used for measuring the garbage collection pauses
+import random  # used for the random actions of the session
+import argparse  # used for parsing the command line arguments
+import tracemalloc  # used for tracing the memory allocations
+import os  # the os module is used for file and directory operations
+import collections  # used for summing the allocations of the functions
+import functools  # used for wrapping the functions in TARGETS
+import numpy as np  # fundamental Python module for scientific computing
+import lib.stddraw as stddraw  # used for drawing the game in the live mode
+from lib.framelimiter import FrameLimiter  # used for pacing the live mode
+from lib.gcscheduler import GCScheduler  # used for the --gc-control mode
+from game import Game  # the class for playing the game without the UI
+from tetromino import Tetromino, ACTIONS  # the tetrominoes and their actions
+from tile import Tile  # the class for modeling the tiles
+
+# the functions that the allocations are attributed to (an allocation is
+# attributed to the innermost one of these functions on its traceback), the
+# tiles of the tetrominoes are deep copied in get_min_bounded_tile_matrix
+TARGETS = (Tetromino.get_cell_position, Tetromino.rotate,
+           Tetromino.get_min_bounded_tile_matrix, Tile.__init__,
+           stddraw._pygameColor, stddraw._font, stddraw._text, stddraw.text)
+# the number of the frames stored for the traceback of each allocation
+TRACEBACK_DEPTH = 16
+# the directory of the game code (the other allocations are shown by the
+# innermost frame in the game code, e.g. instead of a frame in the copy module)
+GAME_DIR = os.path.dirname(os.path.realpath(__file__))
+
+# A function that returns the name, the file name and the first and the last
+# line numbers of each of the given functions
+def code_ranges(functions):
+   ranges = []
+   for function in functions:
+      code = function.__code__
+      lines = [line for _, _, line in code.co_lines() if line is not None]
+      name = function.__module__ + "." + function.__qualname__
+      ranges.append((name, code.co_filename, code.co_firstlineno, max(lines)))
+   return ranges
+
+# A function that returns the name of the innermost function of the given
+# ranges (see code_ranges) on the given traceback ("other" when there is none)
+def attribute(traceback, ranges):
+   for frame in reversed(traceback):  # from the most recent frame
+      for name, filename, first, last in ranges:
+         if frame.filename == filename and first <= frame.lineno <= last:
+            return name
+   return "other"
+
+# A function that returns the innermost frame in the game code (see GAME_DIR)
+# on the given traceback (the innermost frame when there is none)
+def game_frame(traceback):
+   for frame in reversed(traceback):
+      if os.path.realpath(frame.filename).startswith(GAME_DIR + os.sep):
+         return frame
+   return traceback[-1]
+
+# A class for timing the garbage collections (by using gc.callbacks)
+class CollectionTimer:
+   def __init__(self):
+      self.counts = [0, 0, 0]  # the number of collections of each generation
+      self.max_pause = 0.0  # in seconds
+      self.start_time = None
+
+   def __call__(self, phase, info):
+      if phase == "start":
+         self.start_time = time.perf_counter()
+      elif self.start_time is not None:
+         self.counts[info["generation"]] += 1
+         self.max_pause = max(self.max_pause,
+                              time.perf_counter() - self.start_time)
+
+# the peaks of the traced memory in the measured code that encloses the calls
+# being measured (the peak of tracemalloc is reset when a measurement starts,
+# so the peak of the enclosing code until then is kept here, see start_peak)
+peak_stack = []
+
+# A function that starts measuring the peak of the traced memory (the
+# measurements can be nested, e.g. a call of a function in TARGETS in a frame)
+def start_peak():
+   peak = tracemalloc.get_traced_memory()[1]
+   if peak_stack:
+      peak_stack[-1] = max(peak_stack[-1], peak)
+   peak_stack.append(0)
+   tracemalloc.reset_peak()
+
+# A function that stops the last measurement started by start_peak and returns
+# the peak of the traced memory since it started
+def stop_peak():
+   peak = max(peak_stack.pop(), tracemalloc.get_traced_memory()[1])
+   if peak_stack:
+      peak_stack[-1] = max(peak_stack[-1], peak)
+   return peak
+
+# A class for summing the allocations of the calls of a function
+class CallStats:
+   def __init__(self, name):
+      self.name = name
+      self.calls = 0
+      # the blocks and the bytes allocated by the calls and not freed by the
+      # end of the calls, and the sum of the peaks of the traced memory above
+      # the memory at the start of the calls (including the calls of the other
+      # functions in TARGETS in them)
+      self.blocks, self.bytes, self.peak_bytes = 0, 0, 0
+
+   def add(self, blocks, size, peak):
+      self.calls += 1
+      self.blocks += blocks
+      self.bytes += size
+      self.peak_bytes += peak
+
+# A function that returns a wrapper of the given function that adds the
+# allocations of each call to the given CallStats
+def profile_calls(function, stats):
+   @functools.wraps(function)
+   def wrapper(*args, **kwargs):
+      blocks = sys.getallocatedblocks()
+      size = tracemalloc.get_traced_memory()[0]
+      start_peak()
+      result = function(*args, **kwargs)
+      peak = stop_peak()
+      stats.add(sys.getallocatedblocks() - blocks,
+                tracemalloc.get_traced_memory()[0] - size, peak - size)
+      return result
+   return wrapper
+
+# A function that replaces each of the given functions by a wrapper (see
+# profile_calls) in its module or class and returns the CallStats of the
+# functions and a function that restores them
+def install_wrappers(functions):
+   stats, replaced = [], []
+   for function in functions:
+      owner = sys.modules[function.__module__]
+      *path, name = function.__qualname__.split(".")
+      for attribute in path:
+         owner = getattr(owner, attribute)
+      stats.append(CallStats(function.__module__ + "." +
+                             function.__qualname__))
+      setattr(owner, name, profile_calls(function, stats[-1]))
+      replaced.append((owner, name, function))
+   def restore():
+      for owner, name, function in replaced:
+         setattr(owner, name, function)
+   return stats, restore
+
+# A function that returns the CallStats of the given number of calls of a
+# wrapper of an empty function in a measured frame (the allocations of the
+# wrapper itself, that are subtracted from the allocations of the calls)
+def wrapper_overhead(n_calls=1000):
+   stats = CallStats("overhead")
+   wrapper = profile_calls(lambda: None, stats)
+   start_peak()
+   for _ in range(n_calls):
+      wrapper()
+   stop_peak()
+   return stats
+
+# A function that sets the canvas of the live mode for a game grid of the
+# given dimensions (as in Tetris_2048.start)
+def set_canvas(grid_h, grid_w):
+   cell_size = max(1, min(40, 800 // grid_h, 1440 // (grid_w + 6)))
+   stddraw.setCanvasSize(cell_size * (grid_w + 6), cell_size * grid_h)
+   stddraw.setXscale(-0.5, grid_w + 5.5)
+   stddraw.setYscale(-0.5, grid_h - 0.5)
+
+# A function that profiles a session of the given number of frames (after the
+# given number of warmup frames that fill the caches, e.g. the sprites of the
+# tiles and the rendered texts) and prints the report (the garbage is collected
+# only when a tetromino enters the game grid when gc_control is True, as in
+# Tetris_2048.start)
+def run(frames=1800, warmup=120, seed=0, live=False, grid_h=20, grid_w=12,
+        top=10, gc_control=False):
+   game = Game(grid_h, grid_w, seed)
+   rng = random.Random(seed)
+   frame_limiter = None
+   if live:
+      set_canvas(grid_h, grid_w)
+      frame_limiter = FrameLimiter(60)
+   # the results are written into arrays allocated in advance so that the
+   # profiler does not allocate memory blocks in the measured frames
+   frame_blocks = np.zeros(frames, dtype=np.int64)
+   frame_bytes = np.zeros(frames, dtype=np.int64)
+   frame_peaks = np.zeros(frames, dtype=np.int64)
+   piece_blocks = np.zeros(frames, dtype=np.int64)
+   n_pieces, n_games = 0, 1
+   timer = CollectionTimer()
+   gc_scheduler = GCScheduler() if gc_control else None
+   tracemalloc.start(TRACEBACK_DEPTH)
+   for frame in range(-warmup, frames):
+      if frame == 0:
+         # the measurement starts after the warmup frames
+         call_stats, restore = install_wrappers(TARGETS)
+         overhead = wrapper_overhead()
+         if gc_scheduler is not None:
+            gc_scheduler.start()
+         start_snapshot = tracemalloc.take_snapshot()
+         gc.callbacks.append(timer)
+         piece_start = sys.getallocatedblocks()
+      current = tracemalloc.get_traced_memory()[0]
+      start_peak()
+      pieces = game.n_pieces
+      # (the blocks are counted last before the frame and first after it, so
+      # that the integers of the profiler are not counted)
+      blocks = sys.getallocatedblocks()
+      # play the frame
+      game.step(rng.choice(ACTIONS))
+      if game.game_over:
+         game.reset()
+         n_games += frame >= 0
+      if gc_scheduler is not None and frame >= 0 and game.n_pieces != pieces:
+         gc_scheduler.collect()
+      if live:
+         game.grid.display((game.next_tetromino,), game.score)
+         stddraw.pollEvents()
+         frame_limiter.wait()
+      peak = stop_peak()
+      if frame < 0:
+         continue
+      frame_blocks[frame] = sys.getallocatedblocks() - blocks
+      after = tracemalloc.get_traced_memory()[0]
+      frame_bytes[frame] = after - current
+      frame_peaks[frame] = peak - current
+      if game.n_pieces != pieces:
+         blocks = sys.getallocatedblocks()
+         piece_blocks[n_pieces] = blocks - piece_start
+         n_pieces, piece_start = n_pieces + 1, blocks
+   gc.callbacks.remove(timer)
+   restore()
+   end_snapshot = tracemalloc.take_snapshot()
+   if gc_scheduler is not None:
+      gc_scheduler.stop()
+   tracemalloc.stop()
+   # the allocations that are still alive at the end of the session
+   filters = [tracemalloc.Filter(False, tracemalloc.__file__),
+              tracemalloc.Filter(False, __file__)]
+   diffs = end_snapshot.filter_traces(filters).compare_to(
+      start_snapshot.filter_traces(filters), "traceback")
+   ranges = code_ranges(TARGETS)
+   by_function = collections.defaultdict(lambda: [0, 0])
+   by_site = collections.defaultdict(lambda: [0, 0])
+   for diff in diffs:
+      if diff.count_diff <= 0:
+         continue
+      name = attribute(diff.traceback, ranges)
+      by_function[name][0] += diff.count_diff
+      by_function[name][1] += diff.size_diff
+      if name == "other":
+         frame = game_frame(diff.traceback)
+         by_site[frame.filename, frame.lineno][0] += diff.count_diff
+         by_site[frame.filename, frame.lineno][1] += diff.size_diff
+   # print the report
+   print("%d frames (%s, %d pieces, %d games) after %d warmup frames" % (
+      frames, "live" if live else "headless", n_pieces, n_games, warmup))
+   print("per frame: %.2f blocks (max %d), %.0f bytes, %.0f bytes peak "
+         "(max %d), %d of %d frames allocate" % (
+            frame_blocks.mean(), frame_blocks.max(), frame_bytes.mean(),
+            frame_peaks.mean(), frame_peaks.max(),
+            np.count_nonzero(frame_blocks > 0), frames))
+   if n_pieces > 0:
+      print("per piece: %.1f blocks (max %d)" % (
+         piece_blocks[:n_pieces].mean(), piece_blocks[:n_pieces].max()))
+   print("garbage collections%s: %d, %d, %d (generations 0, 1, 2), "
+         "max pause %.2f ms" % (" (when a tetromino enters)" if gc_control
+                                else "", *timer.counts,
+                                timer.max_pause * 1000))
+   print("allocations per call by function (blocks and bytes not freed by "
+         "the end of the call, peak bytes):")
+   for stats in sorted(call_stats, key=lambda stats: -stats.calls):
+      if stats.calls == 0:
+         print("  %-48s not called" % stats.name)
+         continue
+      # the allocations of the wrapper are subtracted (the small negative
+      # differences are shown as 0)
+      per_call = [max(0, total / stats.calls - calls_total / overhead.calls)
+                  for total, calls_total in (
+                     (stats.blocks, overhead.blocks),
+                     (stats.bytes, overhead.bytes),
+                     (stats.peak_bytes, overhead.peak_bytes))]
+      print("  %-48s %8.2f calls per frame %7.2f blocks %8.0f bytes "
+            "%8.0f peak bytes per call, %8.2f blocks per frame" % (
+               stats.name, stats.calls / frames, *per_call,
+               per_call[0] * stats.calls / frames))
+   print("blocks not freed by the end by function:")
+   for name in sorted(by_function, key=lambda name: -by_function[name][1]):
+      count, size = by_function[name]
+      print("  %-36s %8d blocks %10d bytes" % (name, count, size))
+   if top > 0 and by_site:
+      print("top allocation sites of other:")
+      for site in sorted(by_site, key=lambda site: -by_site[site][1])[:top]:
+         count, size = by_site[site]
+         print("  %-36s %8d blocks %10d bytes" % (
+            "%s:%d" % (os.path.relpath(site[0], GAME_DIR), site[1]), count,
+            size))
+   return frame_blocks.mean()
+
+if __name__ == '__main__':
+   parser = argparse.ArgumentParser(description="Memory allocation profiler")
+   parser.add_argument("--frames", type=int, default=1800)
+   parser.add_argument("--warmup", type=int, default=120)
+   parser.add_argument("--seed", type=int, default=0)
+   parser.add_argument("--live", action="store_true",
+                       help="draw the game in a window")
+   parser.add_argument("--grid-height", type=int, default=20)
+   parser.add_argument("--grid-width", type=int, default=12)
+   parser.add_argument("--top", type=int, default=10,
+                       help="the number of the other allocation sites shown")
+   parser.add_argument("--max-blocks", type=float, default=None,
+                       help="the allowed mean number of the blocks per frame")
+   parser.add_argument("--gc-control", action="store_true",
+                       help="collect the garbage only when a tetromino "
+                            "enters the game grid")
+   args = parser.parse_args()
+   mean_blocks = run(args.frames, args.warmup, args.seed, args.live,
+                     args.grid_height, args.grid_width, args.top,
+                     args.gc_control)
+   if args.max_blocks is not None and mean_blocks > args.max_blocks:
+      sys.exit(1)
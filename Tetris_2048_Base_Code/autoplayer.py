@@ -0,0 +1,288 @@
+################################################################################
+#                                                                              #
+# A player that plays the game without the user interface. Each placement of   #
+# the current tetromino (a rotation state and a horizontal position from which #
+# the tetromino is dropped) is evaluated by a weighted sum of board features,  #
+# and the Monte Carlo planner improves the best placements by playing random   #
+# future tetrominoes on copies of the board (rollouts) in a pool of worker     #
+# processes. The boards are sent to the workers as the bytes of their number   #
+# matrices, and the workers stop starting new rollouts at the deadline of the  #
+# time budget of the move (so the rollouts do not run into the next move).     #
+#                                                                              #
+################################################################################
+
+import json  # used for reading the weights from a tuner checkpoint file
+import time  # used for the time budget of the planner
+import random  # used for the random tetromino types of the rollouts
+import argparse  # used for parsing the command line arguments
+import concurrent.futures  # used for running the rollouts in worker processes
+import numpy as np  # fundamental Python module for scientific computing
+from game import Game  # the class for playing the game without the UI
+from tetromino import CELL_OFFSETS  # the cells of the tetrominoes
+
+# the features of a board used for evaluating the placements
+FEATURES = ("lines", "holes", "height", "bumpiness", "merges", "corner")
+# the default weights of the features (in the order of FEATURES)
+DEFAULT_WEIGHTS = np.array([0.76, -0.36, -0.51, -0.18, 0.05, 0.1])
+# the outcome of a rollout that ends with game over
+GAME_OVER_SCORE = -1000.0
+# the number on the tiles placed by the planner (the number on a new Tile)
+TILE_NUMBER = 2
+
+# A function that computes the placements of each type of tetromino as the
+# tuples (rotation, cells, columns) for the unique rotation states, where cells
+# are the offsets (dx, dy) of the occupied cells and columns are the tuples
+# (dx, lowest dy) of the columns of the tile matrix with an occupied cell
+def compute_rotations(shape):
+   rotations, seen = [], set()
+   for rotation, cells in enumerate(CELL_OFFSETS[shape]):
+      # the rotation states that only translate the cells are the same
+      min_dx = min(dx for dx, _ in cells)
+      min_dy = min(dy for _, dy in cells)
+      key = frozenset((dx - min_dx, dy - min_dy) for dx, dy in cells)
+      if key in seen:
+         continue
+      seen.add(key)
+      lowest = {}
+      for dx, dy in cells:
+         lowest[dx] = min(dy, lowest.get(dx, dy))
+      rotations.append((rotation, cells, tuple(sorted(lowest.items()))))
+   return tuple(rotations)
+
+# the placements of each type of tetromino (see compute_rotations)
+ROTATIONS = {shape: compute_rotations(shape) for shape in CELL_OFFSETS}
+
+# A function that returns the height of each column of the given board (the
+# number matrix of a game grid where the row 0 is the bottom row)
+def column_heights(board):
+   occupied = board != 0
+   # the index of the topmost occupied cell of each column counted from above
+   from_top = np.argmax(occupied[::-1], axis=0)
+   return np.where(occupied.any(axis=0), len(board) - from_top, 0)
+
+# A function that returns the features of the given board (see FEATURES) after
+# a placement that cleared the given number of lines
+def board_features(board, lines):
+   heights = column_heights(board)
+   n_tiles = np.count_nonzero(board)
+   holes = heights.sum() - n_tiles
+   bumpiness = np.abs(np.diff(heights)).sum()
+   # the pairs of adjacent tiles with the same number (that can be merged)
+   merges = (np.count_nonzero((board[:, 1:] == board[:, :-1]) & (board[:, 1:] != 0))
+             + np.count_nonzero((board[1:] == board[:-1]) & (board[1:] != 0)))
+   # 1 when the largest number is in a bottom corner of the board
+   largest = board.max()
+   corner = largest > 0 and (board[0, 0] == largest or board[0, -1] == largest)
+   return np.array([lines, holes, heights.sum(), bumpiness, merges, corner],
+                   dtype=float)
+
+# A function that returns the weighted sum of the features of the given board
+def evaluate(board, lines, weights=DEFAULT_WEIGHTS):
+   return float(np.dot(weights, board_features(board, lines)))
+
+# A function that returns the placements (rotation, x, y) of the given type of
+# tetromino on the given board, where (x, y) is the position of the bottom left
+# cell of the tile matrix after dropping the tetromino from above
+def placements(board, shape):
+   heights = column_heights(board)
+   grid_w = board.shape[1]
+   result = []
+   for rotation, cells, columns in ROTATIONS[shape]:
+      first_dx, last_dx = columns[0][0], columns[-1][0]
+      for x in range(-first_dx, grid_w - last_dx):
+         y = max(heights[x + dx] - lowest for dx, lowest in columns)
+         result.append((rotation, x, y))
+   return result
+
+# A function that places the given type of tetromino on a copy of the given
+# board and clears the full lines, returns the new board and the number of the
+# lines cleared (or None and 0 when a tile is above the board, i.e. game over)
+def place(board, shape, rotation, x, y):
+   grid_h = board.shape[0]
+   new_board = board.copy()
+   for dx, dy in CELL_OFFSETS[shape][rotation]:
+      if y + dy >= grid_h:
+         return None, 0
+      new_board[y + dy, x + dx] = TILE_NUMBER
+   full = (new_board != 0).all(axis=1)
+   lines = int(np.count_nonzero(full))
+   if lines:
+      kept = new_board[~full]
+      new_board[:] = 0
+      new_board[:len(kept)] = kept
+   return new_board, lines
+
+# A function that returns the best placement (rotation, x, y) of the given type
+# of tetromino on the given board by the heuristic, the new board and the
+# number of the lines cleared (or None when every placement ends the game)
+def best_placement(board, shape, weights=DEFAULT_WEIGHTS):
+   best, best_score = None, None
+   for rotation, x, y in placements(board, shape):
+      new_board, lines = place(board, shape, rotation, x, y)
+      if new_board is None:
+         continue
+      score = evaluate(new_board, lines, weights)
+      if best_score is None or score > best_score:
+         best, best_score = ((rotation, x, y), new_board, lines), score
+   return best
+
+# A function that plays depth tetrominoes on the given board by using the best
+# placements of the heuristic (the first one is of the given type and the rest
+# are random) and returns the outcome of the rollout
+def rollout(board, first_shape, depth, rng, weights=DEFAULT_WEIGHTS):
+   total_lines, shape = 0, first_shape
+   for _ in range(depth):
+      best = best_placement(board, shape, weights)
+      if best is None:
+         return GAME_OVER_SCORE
+      _, board, lines = best
+      total_lines += lines
+      shape = rng.choice(Game.tetromino_types)
+   return evaluate(board, total_lines, weights)
+
+# A function run by the worker processes, it restores a board from the bytes
+# of its number matrix and returns the sum and the number of the outcomes of up
+# to n rollouts (no rollout is started after the given deadline, a time.time()
+# value as the clock is shared by the processes)
+def run_rollouts(snapshot, board_shape, first_shape, seed, n, depth, weights,
+                 deadline=None):
+   board = np.frombuffer(snapshot, dtype=np.uint16).reshape(board_shape)
+   rng = random.Random(seed)
+   total, count = 0.0, 0
+   while count < n and (deadline is None or time.time() < deadline):
+      total += rollout(board, first_shape, depth, rng, weights)
+      count += 1
+   return total, count
+
+# A class for modeling the Monte Carlo planner, the best placements of the
+# current tetromino by the heuristic are the candidates and the candidate with
+# the best mean outcome of the rollouts finished within the time budget wins
+class MonteCarloPlanner:
+   # A constructor for creating a planner with a pool of the given number of
+   # worker processes (the number of the CPUs when a value is not given)
+   def __init__(self, workers=None, rollouts=64, depth=3, time_budget=0.5,
+                n_candidates=6, batch_size=8, weights=DEFAULT_WEIGHTS,
+                seed=None):
+      self.rollouts, self.depth = rollouts, depth
+      self.time_budget = time_budget  # in seconds for each move
+      self.n_candidates, self.batch_size = n_candidates, batch_size
+      self.weights = np.asarray(weights, dtype=float)
+      self.rng = random.Random(seed)
+      self.pool = concurrent.futures.ProcessPoolExecutor(workers)
+
+   # A method for shutting down the worker processes
+   def close(self):
+      self.pool.shutdown(cancel_futures=True)
+
+   def __enter__(self):
+      return self
+
+   def __exit__(self, *exc_info):
+      self.close()
+
+   # A method that returns the placement (rotation, x) chosen for the current
+   # tetromino of the given game (or None when every placement ends the game)
+   def choose(self, game):
+      start = time.perf_counter()
+      deadline = time.time() + self.time_budget
+      board = game.grid.get_number_matrix()
+      shape = game.current_tetromino.type
+      next_shape = game.next_tetromino.type
+      # the candidates are the best placements by the heuristic
+      candidates = []
+      for rotation, x, y in placements(board, shape):
+         new_board, lines = place(board, shape, rotation, x, y)
+         if new_board is not None:
+            score = evaluate(new_board, lines, self.weights)
+            candidates.append((score, rotation, x, new_board, lines))
+      if not candidates:
+         return None
+      candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+      candidates = candidates[:self.n_candidates]
+      if len(candidates) == 1:
+         return candidates[0][1:3]
+      # the rollouts are submitted in batches in turns for the candidates, so
+      # all the candidates have about the same number of finished rollouts
+      # when the time budget runs out
+      futures = {}
+      for _ in range(0, self.rollouts, self.batch_size):
+         for index, (_, _, _, new_board, lines) in enumerate(candidates):
+            future = self.pool.submit(
+               run_rollouts, new_board.tobytes(), new_board.shape, next_shape,
+               self.rng.getrandbits(32), self.batch_size, self.depth,
+               self.weights, deadline)
+            futures[future] = index
+      _, not_done = concurrent.futures.wait(futures, timeout=max(
+         0.0, self.time_budget - (time.perf_counter() - start)))
+      # the batches that have not started are cancelled and the running ones
+      # stop within a rollout after the deadline (their rollouts are counted)
+      for future in not_done:
+         future.cancel()
+      concurrent.futures.wait(future for future in not_done
+                              if not future.cancelled())
+      totals, counts = [0.0] * len(candidates), [0] * len(candidates)
+      for future, index in futures.items():
+         if not future.cancelled():
+            total, count = future.result()
+            totals[index] += total
+            counts[index] += count
+      # the candidates without finished rollouts are ranked after the others
+      # by the heuristic (the candidates are sorted by the heuristic)
+      best = max(range(len(candidates)), key=lambda index: (
+         counts[index] > 0, totals[index] / counts[index] if counts[index]
+         else 0.0, -index))
+      return candidates[best][1:3]
+
+# A function that moves the current tetromino of the given game into the given
+# placement, drops it and locks it on the grid (the tetromino is rotated in its
+# tile matrix without the wall kicks, as it is dropped from above the stack)
+def play_placement(game, rotation, x):
+   tetromino = game.current_tetromino
+   tetromino.set_rotation(rotation)
+   tetromino.bottom_left_cell.x = x
+   tetromino.hard_drop(game.grid)
+   return game.lock()
+
+# A function that plays the given game with the given planner until the game is
+# over or max_pieces tetrominoes are placed, returns the number of lines cleared
+def play_game(game, planner, max_pieces=None):
+   while not game.game_over:
+      if max_pieces is not None and game.n_pieces >= max_pieces:
+         break
+      placement = planner.choose(game)
+      if placement is None:
+         game.game_over = True
+         break
+      play_placement(game, *placement)
+   return game.lines_cleared
+
+if __name__ == '__main__':
+   parser = argparse.ArgumentParser(description="Monte Carlo autoplayer")
+   parser.add_argument("--games", type=int, default=1)
+   parser.add_argument("--max-pieces", type=int, default=None)
+   parser.add_argument("--workers", type=int, default=None)
+   parser.add_argument("--rollouts", type=int, default=64)
+   parser.add_argument("--depth", type=int, default=3)
+   # the time budget of each move in seconds
+   parser.add_argument("--budget", type=float, default=0.5)
+   parser.add_argument("--grid-height", type=int, default=20)
+   parser.add_argument("--grid-width", type=int, default=12)
+   parser.add_argument("--seed", type=int, default=None)
+   # the best weights of a tuning run are used when a checkpoint file of the
+   # tuner (see tuner.py) is given
+   parser.add_argument("--weights", default=None)
+   args = parser.parse_args()
+   weights = DEFAULT_WEIGHTS
+   if args.weights is not None:
+      with open(args.weights) as checkpoint_file:
+         weights = json.load(checkpoint_file)["best_weights"]
+   with MonteCarloPlanner(args.workers, args.rollouts, args.depth,
+                          args.budget, weights=weights,
+                          seed=args.seed) as planner:
+      for index in range(args.games):
+         seed = None if args.seed is None else args.seed + index
+         game = Game(args.grid_height, args.grid_width, seed)
+         start = time.perf_counter()
+         lines = play_game(game, planner, args.max_pieces)
+         print("game %d: %d pieces, %d lines, %.1f s" % (
+            index, game.n_pieces, lines, time.perf_counter() - start))
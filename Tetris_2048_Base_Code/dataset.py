@@ -0,0 +1,217 @@
+################################################################################
+#                                                                              #
+# Position datasets: (board, piece, action, outcome) records collected from    #
+# games are appended to a flat binary file of NumPy structured records and a   #
+# sidecar JSON index. The data file is opened as a read-only memory map, so a  #
+# dataset is sliced lazily without loading all the records into the memory.   #
+#                                                                              #
+################################################################################
+
+import json  # used for reading and writing the sidecar index file
+import os  # the os module is used for file and directory operations
+import argparse  # used for parsing the command line arguments
+import random  # used for choosing random actions during self-play
+import numpy as np  # fundamental Python module for scientific computing
+from game import Game  # the class for playing the game without the UI
+from tetromino import ACTIONS  # the actions applied on the tetrominoes
+
+# the version number of the index file format
+INDEX_VERSION = 1
+# the default number of records written to the data file at once
+DEFAULT_CHUNK_SIZE = 65536
+# the size of the piece masks (the largest tetromino matrix is 4x4)
+PIECE_SIZE = 4
+
+# A function that returns the structured record type for the given grid size
+def position_dtype(grid_h, grid_w):
+   return np.dtype([
+      ("game", np.uint32),  # index of the game in the dataset
+      ("move", np.uint32),  # index of the move in the game
+      ("board", np.uint16, (grid_h, grid_w)),  # numbers on the locked tiles
+      ("piece", "S1"),  # type (shape) of the current tetromino
+      ("piece_mask", np.bool_, (PIECE_SIZE, PIECE_SIZE)),  # occupied cells
+      ("piece_x", np.int16),  # position of the bottom left cell of the
+      ("piece_y", np.int16),  # tile matrix of the current tetromino
+      ("action", np.uint8),  # index of the action in tetromino.ACTIONS
+      ("lines_cleared", np.uint8),  # outcome: lines cleared by the action
+      ("game_over", np.bool_),  # outcome: the game is over after the action
+   ])
+
+# A function that returns the path of the index file for a data file
+def index_path(path):
+   return path + ".idx.json"
+
+# A function for reading the index file of the dataset with the given path
+def _read_index(path):
+   with open(index_path(path)) as index_file:
+      return json.load(index_file)
+
+# A class for appending position records to a dataset, the records are kept
+# in a preallocated buffer and written to the data file in large chunks
+class PositionWriter:
+   # A constructor for opening (creating or resuming) the dataset with the
+   # given path for the given grid dimensions
+   def __init__(self, path, grid_h, grid_w, chunk_size=DEFAULT_CHUNK_SIZE):
+      self.path = path
+      self.dtype = position_dtype(grid_h, grid_w)
+      self.grid_shape = (grid_h, grid_w)
+      self.count = 0  # number of the records written to the data file
+      self.n_games = 0  # number of the games started in the dataset
+      if os.path.exists(index_path(path)):
+         index = _read_index(path)
+         if tuple(index["grid_shape"]) != self.grid_shape:
+            raise ValueError("grid shape does not match the dataset")
+         _check_descr(index, self.dtype)
+         self.count, self.n_games = index["count"], index["n_games"]
+      # records beyond the indexed count are left from an interrupted write
+      self._file = open(path, "ab")
+      self._file.truncate(self.count * self.dtype.itemsize)
+      self._buffer = np.zeros(chunk_size, dtype=self.dtype)
+      self._n_buffered = 0
+      self._write_index()
+
+   # A method that returns the buffered record to be filled next (the buffer
+   # is flushed to the data file first when it is full)
+   def next_record(self):
+      if self._n_buffered == len(self._buffer):
+         self.flush()
+      record = self._buffer[self._n_buffered]
+      self._n_buffered += 1
+      return record
+
+   # A method for appending a record for the given game state, the action
+   # applied (as an index in tetromino.ACTIONS) and the outcome of the action,
+   # returns the record (its outcome can be set later by using set_outcome,
+   # e.g. when the record is appended before the action is applied)
+   def append(self, grid, tetromino, action, lines_cleared=0,
+              game_over=False, game=0, move=0):
+      record = self.next_record()
+      record["game"], record["move"] = game, move
+      grid.fill_number_matrix(record["board"])
+      _fill_piece(record, tetromino)
+      record["action"] = action
+      self.set_outcome(record, lines_cleared, game_over)
+      return record
+
+   # A method for setting the outcome of the action of the given record (the
+   # record must be the last one appended, as the buffer is flushed when the
+   # next record is appended)
+   def set_outcome(self, record, lines_cleared, game_over):
+      record["lines_cleared"] = lines_cleared
+      record["game_over"] = game_over
+
+   # A method that returns the index of a newly started game
+   def new_game(self):
+      self.n_games += 1
+      return self.n_games - 1
+
+   # A method for writing the buffered records to the data file and updating
+   # the index file
+   def flush(self):
+      if self._n_buffered > 0:
+         self._buffer[:self._n_buffered].tofile(self._file)
+         self._file.flush()
+         self.count += self._n_buffered
+         self._n_buffered = 0
+      self._write_index()
+
+   # A method for writing the index file (replaced atomically so that readers
+   # never see a partially written index)
+   def _write_index(self):
+      index = {"version": INDEX_VERSION, "grid_shape": list(self.grid_shape),
+               "descr": str(self.dtype.descr), "count": self.count,
+               "n_games": self.n_games}
+      temp_path = index_path(self.path) + ".tmp"
+      with open(temp_path, "w") as index_file:
+         json.dump(index, index_file)
+      os.replace(temp_path, index_path(self.path))
+
+   # A method for flushing the remaining records and closing the data file
+   def close(self):
+      self.flush()
+      self._file.close()
+
+   def __enter__(self):
+      return self
+
+   def __exit__(self, *exc_info):
+      self.close()
+
+# A class for reading a dataset lazily, the records are accessed through a
+# read-only memory map of the data file (slicing does not load the data)
+class PositionDataset:
+   # A constructor for opening the dataset with the given path
+   def __init__(self, path):
+      index = _read_index(path)
+      self.grid_shape = tuple(index["grid_shape"])
+      self.n_games = index["n_games"]
+      self.dtype = position_dtype(*self.grid_shape)
+      _check_descr(index, self.dtype)
+      count = index["count"]
+      if count == 0:
+         self.records = np.zeros(0, dtype=self.dtype)
+      else:
+         self.records = np.memmap(path, dtype=self.dtype, mode="r",
+                                  shape=(count,))
+
+   def __len__(self):
+      return len(self.records)
+
+   # Returns the records with the given index or slice (as memory map views)
+   def __getitem__(self, key):
+      return self.records[key]
+
+   # A method for iterating over the records in chunks of the given size
+   def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+      for start in range(0, len(self.records), chunk_size):
+         yield self.records[start:start + chunk_size]
+
+# A function that plays the given number of games by choosing random actions
+# and appends the positions to the dataset with the given path
+def record_self_play(path, n_games, grid_h=20, grid_w=12, seed=None,
+                     max_moves=10000, chunk_size=DEFAULT_CHUNK_SIZE):
+   rng = random.Random(seed)
+   game = Game(grid_h, grid_w, rng.random())
+   with PositionWriter(path, grid_h, grid_w, chunk_size) as writer:
+      for _ in range(n_games):
+         game.reset(rng.random())
+         game_index = writer.new_game()
+         for move in range(max_moves):
+            action = rng.randrange(len(ACTIONS))
+            # the record is filled before the action changes the game state
+            record = writer.append(game.grid, game.current_tetromino, action,
+                                   game=game_index, move=move)
+            lines_cleared, game_over = game.step(ACTIONS[action])
+            writer.set_outcome(record, lines_cleared, game_over)
+            if game_over:
+               break
+   # the remaining records are flushed when the writer is closed
+   return writer.count
+
+# A function for checking that the record type in the given index of a dataset
+# is the given record type (the layout of the records in the data file)
+def _check_descr(index, dtype):
+   if index["descr"] != str(dtype.descr):
+      raise ValueError("record type does not match the dataset")
+
+# A function for filling the piece fields of a record for a tetromino
+def _fill_piece(record, tetromino):
+   record["piece"] = tetromino.type
+   n = len(tetromino.tile_matrix)
+   mask = record["piece_mask"]
+   mask[:] = False
+   mask[:n, :n] = tetromino.tile_matrix != None
+   record["piece_x"] = tetromino.bottom_left_cell.x
+   record["piece_y"] = tetromino.bottom_left_cell.y
+
+if __name__ == '__main__':
+   parser = argparse.ArgumentParser(description="Record self-play positions")
+   parser.add_argument("path", help="the data file of the dataset")
+   parser.add_argument("--games", type=int, default=100)
+   parser.add_argument("--grid-height", type=int, default=20)
+   parser.add_argument("--grid-width", type=int, default=12)
+   parser.add_argument("--seed", type=int, default=None)
+   args = parser.parse_args()
+   count = record_self_play(args.path, args.games, args.grid_height,
+                            args.grid_width, args.seed)
+   print(count, "positions in", args.path)
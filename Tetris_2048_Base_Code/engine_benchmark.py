@@ -0,0 +1,60 @@
+################################################################################
+#                                                                              #
+# A benchmark for the cost of the game engine operations (moving, rotating and #
+# locking the tetrominoes with the line clears) on the default game grid and  #
+# on a very large game grid. The cost of an operation must depend on the size #
+# of the tetromino, not on the size of the game grid, so the time per step on #
+# the large grid is compared to the time per step on the default grid.       #
+# (The exit status is 1 when the large grid is more than --ratio times slower.)#
+#                                                                              #
+################################################################################
+
+import sys  # used for the exit status
+import time  # used for measuring the elapsed time
+import argparse  # used for parsing the command line arguments
+from game import Game  # the class for playing the game without the UI
+from tetromino import ACTIONS  # the actions applied on the tetrominoes
+
+# the dimensions (height, width) of the game grids compared by the benchmark
+GRID_SIZES = ((20, 12), (200, 100))
+
+# A function that plays games on a game grid with the given dimensions by
+# applying random actions (steps times in total) and returns the time per step
+# in microseconds and the number of the tetrominoes locked
+def measure(grid_h, grid_w, steps=20000, seed=0):
+   game = Game(grid_h, grid_w, seed)
+   # the actions are chosen in advance so that they are not measured
+   actions = [game.rng.choice(ACTIONS) for _ in range(steps)]
+   n_pieces = 0
+   start = time.perf_counter()
+   for action in actions:
+      _, game_over = game.step(action)
+      if game_over:
+         n_pieces += game.n_pieces
+         game.reset()
+   elapsed = time.perf_counter() - start
+   return elapsed / steps * 1e6, n_pieces + game.n_pieces
+
+# A function that runs the benchmark and returns True when the time per step on
+# each grid is at most ratio times the time per step on the default grid
+def run(steps=20000, ratio=2.0):
+   baseline = None
+   all_passed = True
+   for grid_h, grid_w in GRID_SIZES:
+      per_step, n_pieces = measure(grid_h, grid_w, steps)
+      if baseline is None:
+         baseline = per_step
+      passed = per_step <= baseline * ratio
+      all_passed = all_passed and passed
+      print("%4d x %-4d %8.1f us/step %6d pieces  %.2fx %s" % (
+         grid_h, grid_w, per_step, n_pieces, per_step / baseline,
+         "ok" if passed else "FAIL"))
+   return all_passed
+
+if __name__ == '__main__':
+   parser = argparse.ArgumentParser(description="Game engine benchmark")
+   parser.add_argument("--steps", type=int, default=20000)
+   # the allowed slowdown of the large grids compared to the default grid
+   parser.add_argument("--ratio", type=float, default=2.0)
+   args = parser.parse_args()
+   sys.exit(0 if run(args.steps, args.ratio) else 1)
@@ -0,0 +1,112 @@
+################################################################################
+#                                                                              #
+# Reinforcement learning environments for Tetris 2048 with a Gym-style API.    #
+# The observations are written into preallocated NumPy arrays: channel 0 has   #
+# the numbers on the locked tiles and channel 1 marks the cells of the current #
+# tetromino (row 0 is the bottom row of the game grid in both channels).       #
+#                                                                              #
+################################################################################
+
+import numpy as np  # fundamental Python module for scientific computing
+from game import Game  # the class for playing the game without the UI
+from tetromino import ACTIONS  # the actions applied on the tetrominoes
+
+# the number of the channels in an observation
+N_CHANNELS = 2
+
+# A function that writes the observation of a game into the given array
+def write_observation(game, out):
+   game.grid.fill_number_matrix(out[0])
+   piece_channel = out[1]
+   piece_channel.fill(0)
+   tetromino = game.current_tetromino
+   if game.game_over or tetromino is None:
+      return out
+   tile_matrix = tetromino.tile_matrix
+   n = len(tile_matrix)
+   blc_x, blc_y = tetromino.bottom_left_cell.x, tetromino.bottom_left_cell.y
+   for row in range(n):
+      for col in range(n):
+         if tile_matrix[row][col] is not None:
+            y = blc_y + (n - 1) - row
+            # the cells above the game grid are not observed
+            if y < game.grid_height:
+               piece_channel[y][blc_x + col] = tile_matrix[row][col].number
+   return out
+
+# A class for modeling a single game as an environment, an action is an index
+# in tetromino.ACTIONS and the reward is the number of the lines cleared
+class TetrisEnv:
+   # the number of the discrete actions
+   n_actions = len(ACTIONS)
+
+   # A constructor for creating an environment with the given grid dimensions
+   def __init__(self, grid_h=20, grid_w=12, seed=None):
+      self.game = Game(grid_h, grid_w, seed)
+      self.observation_shape = (N_CHANNELS, grid_h, grid_w)
+      # the observation array is reused by all the calls of reset and step
+      self.observation = np.zeros(self.observation_shape, dtype=np.uint16)
+
+   # A method for starting a new game, returns the observation and the info
+   def reset(self, seed=None):
+      self.game.reset(seed)
+      return write_observation(self.game, self.observation), {}
+
+   # A method for applying the given action, returns the observation, the
+   # reward, the terminated and truncated flags and the info (as in Gym)
+   def step(self, action):
+      lines_cleared, game_over = self.game.step(ACTIONS[action])
+      write_observation(self.game, self.observation)
+      info = {"n_pieces": self.game.n_pieces}
+      return self.observation, float(lines_cleared), game_over, False, info
+
+# A class for stepping a batch of independent games in lockstep, the games
+# that are over are reset automatically (the returned arrays are preallocated
+# and overwritten by the next call of step). The games are stepped one after
+# the other by the Game objects, so the throughput is bound by the Python code
+# of the game engine: about 20-25 thousand steps per second on one core for
+# 1 to 64 games of 20x12, not the hundreds of thousands of a game engine that
+# works on the arrays of all the games at once. (Run several processes with
+# one VectorTetrisEnv each for more steps per second.)
+class VectorTetrisEnv:
+   n_actions = len(ACTIONS)
+
+   # A constructor for creating n_envs games with the given grid dimensions
+   def __init__(self, n_envs, grid_h=20, grid_w=12, seed=None):
+      self.n_envs = n_envs
+      self.games = [Game(grid_h, grid_w) for _ in range(n_envs)]
+      self.seed = seed
+      self.observation_shape = (N_CHANNELS, grid_h, grid_w)
+      self.observations = np.zeros((n_envs,) + self.observation_shape,
+                                   dtype=np.uint16)
+      self.rewards = np.zeros(n_envs, dtype=np.float32)
+      self.terminated = np.zeros(n_envs, dtype=np.bool_)
+      # the games are never truncated (they end only when they are over)
+      self.truncated = np.zeros(n_envs, dtype=np.bool_)
+      # the number of the pieces locked in the last finished game of each env
+      self.final_pieces = np.zeros(n_envs, dtype=np.int64)
+
+   # A method for resetting all the games, game i is seeded with seed + i
+   def reset(self, seed=None):
+      if seed is not None:
+         self.seed = seed
+      for i, game in enumerate(self.games):
+         game.reset(None if self.seed is None else self.seed + i)
+         write_observation(game, self.observations[i])
+      return self.observations, {}
+
+   # A method for applying the given actions (one per game), returns the
+   # batched observations, rewards, terminated and truncated flags and info
+   def step(self, actions):
+      observations, rewards = self.observations, self.rewards
+      terminated = self.terminated
+      for i, game in enumerate(self.games):
+         lines_cleared, game_over = game.step(ACTIONS[actions[i]])
+         rewards[i] = lines_cleared
+         terminated[i] = game_over
+         if game_over:
+            self.final_pieces[i] = game.n_pieces
+            game.reset()
+         write_observation(game, observations[i])
+      info = {"final_pieces": self.final_pieces}
+      return observations, rewards, terminated, self.truncated, info
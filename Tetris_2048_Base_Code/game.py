@@ -0,0 +1,83 @@
+from game_grid import GameGrid  # the class for modeling the game grid
+from tetromino import TetrominoPool  # used for reusing the tetrominoes
+from score import Score  # the class for modeling the score of a game
+import random  # used for creating tetrominoes with random types (shapes)
+
+# A class for modeling a game that is played without the user interface (by a
+# program instead of a user), e.g. for self-play and for training policies
+class Game:
+   # the types (shapes) of the tetrominoes that can enter the game grid
+   tetromino_types = ['I', 'O', 'Z']
+
+   # A constructor for creating a game with the given grid dimensions, the
+   # tetrominoes are created by using a random number generator with the
+   # given seed (a random seed is used when a value is not given)
+   def __init__(self, grid_h=20, grid_w=12, seed=None):
+      self.grid_height, self.grid_width = grid_h, grid_w
+      self.rng = random.Random(seed)
+      # the locked tetrominoes are reused for the new tetrominoes
+      self.pool = TetrominoPool()
+      self.grid = None
+      self.reset()
+
+   # A method for starting a new game (reseeding the random number generator
+   # when a seed is given)
+   def reset(self, seed=None):
+      if seed is not None:
+         self.rng.seed(seed)
+      # the tiles and the tetrominoes of the previous game are reused (the
+      # current tetromino is already released when the game is over)
+      if self.grid is not None:
+         self.grid.release_tiles()
+         if not self.game_over:
+            self.release_tetromino(self.current_tetromino)
+         self.release_tetromino(self.next_tetromino)
+      self.grid = GameGrid(self.grid_height, self.grid_width)
+      self.current_tetromino = self.create_tetromino()
+      self.next_tetromino = self.create_tetromino()
+      self.grid.current_tetromino = self.current_tetromino
+      self.game_over = False
+      # the number of the tetrominoes locked and the lines cleared so far
+      self.n_pieces, self.lines_cleared = 0, 0
+      self.score = Score()
+
+   # A method for releasing the given tetromino that is not locked on the game
+   # grid (with its tiles) into the pools to be reused
+   def release_tetromino(self, tetromino):
+      for tile in tetromino.tile_matrix.flat:
+         if tile is not None:
+            tile.release()
+      self.pool.release(tetromino)
+
+   # A method for creating a random shaped tetromino to enter the game grid
+   def create_tetromino(self):
+      random_type = self.rng.choice(Game.tetromino_types)
+      return self.pool.acquire(random_type, self.grid, self.rng)
+
+   # A method that applies the given action (one of tetromino.ACTIONS) on the
+   # current tetromino and then moves it down by 1 (gravity), the tetromino
+   # is locked on the grid when it cannot be moved down anymore. (This method
+   # returns the number of the lines cleared and the game_over flag.)
+   def step(self, action="noop"):
+      if self.game_over:
+         return 0, True
+      self.current_tetromino.apply(action, self.grid)
+      if self.current_tetromino.move("down", self.grid):
+         return 0, False
+      return self.lock(), self.game_over
+
+   # A method that locks the current tetromino on the game grid and lets the
+   # next tetromino enter the game grid (returns the number of lines cleared)
+   def lock(self):
+      tiles = self.current_tetromino.tile_matrix
+      pos = self.current_tetromino.bottom_left_cell
+      self.game_over, cleared = self.grid.update_grid(tiles, pos)
+      self.n_pieces += 1
+      self.lines_cleared += cleared
+      self.score.add_lines(cleared)
+      self.pool.release(self.current_tetromino)
+      if not self.game_over:
+         self.current_tetromino = self.next_tetromino
+         self.next_tetromino = self.create_tetromino()
+         self.grid.current_tetromino = self.current_tetromino
+      return cleared
@@ -1,17 +1,42 @@
 import lib.stddraw as stddraw  # used for displaying the game grid
 from lib.color import Color  # used for coloring the game grid
 from point import Point  # used for tile positions
+from tile import Tile  # used for modeling the tiles of the garbage rows
 import numpy as np  # fundamental Python module for scientific computing
 
 # A class for modeling the game grid
 class GameGrid:
+   # the size of the tiles of the tetrominoes drawn in the side panel (as a
+   # fraction of the size of the grid cells)
+   preview_scale = 0.75
+
    # A constructor for creating the game grid based on the given arguments
-   def __init__(self, grid_h, grid_w):
+   def __init__(self, grid_h, grid_w, x_offset=0):
       # set the dimensions of the game grid as the given arguments
       self.grid_height = grid_h
       self.grid_width = grid_w
+      # the horizontal position of the game grid in the window (the column 0
+      # is drawn at x = x_offset, e.g. for the two game grids side by side in
+      # the versus mode)
+      self.x_offset = x_offset
       # create a tile matrix to store the tiles locked on the game grid
       self.tile_matrix = np.full((grid_h, grid_w), None)
+      # the numbers on the locked tiles (0 for the empty cells) kept in sync
+      # with tile_matrix for the programs that use the grid as an array
+      self.number_matrix = np.zeros((grid_h, grid_w), dtype=np.uint16)
+      # the index of the row of tile_matrix (and number_matrix) that stores
+      # each row of the game grid (row 0 is the bottom row), the rows of the
+      # game grid are moved by moving these indexes instead of copying the
+      # tiles (see remove_row and add_garbage), and the same indexes in an
+      # array for gathering the rows with numpy (see fill_number_matrix)
+      self.rows = list(range(grid_h))
+      self.row_indexes = np.arange(grid_h, dtype=np.intp)
+      # the number of the tiles in each row of tile_matrix and the number of
+      # the rows of the game grid up to the topmost row that has a tile (so
+      # that the full rows are found without scanning the empty part of the
+      # grid)
+      self.row_counts = np.zeros(grid_h, dtype=np.int32)
+      self.stack_height = 0
       # create the tetromino that is currently being moved on the game grid
       self.current_tetromino = None
       # the game_over flag shows whether the game is over or not
@@ -24,45 +49,199 @@ class GameGrid:
       # thickness values used for the grid lines and the grid boundaries
       self.line_thickness = 0.002
       self.box_thickness = 10 * self.line_thickness
+      # the changes of the locked tiles are recorded as delta operations when
+      # record_deltas is set (see the take_delta method)
+      self.record_deltas = False
+      self.delta_ops = []
+      # the number of the deltas taken, a keyframe with the full state is
+      # taken instead of a delta in every keyframe_interval ticks
+      self.tick = 0
+      self.keyframe_interval = 100
+      self.last_piece_pose = None
+      # the rows of the game grid whose locked tiles have changed since they
+      # were last drawn into board_sprite, the sprite of the game grid with
+      # the locked tiles that is drawn in each frame (only the changed rows of
+      # it are repainted from background_sprite, the sprite of the empty game
+      # grid, see draw_grid)
+      self.dirty_rows = np.ones(grid_h, dtype=np.bool_)
+      self.board_sprite, self.background_sprite = None, None
+      # the box around the game grid as a sprite (see update_board_sprite)
+      self.boundary_sprite, self.box_in_edge_cells = None, False
+      # the current tetromino (with its position), the area of its tiles and
+      # the contents of the side panel drawn by the last call of draw_changes
+      self.drawn_piece, self.drawn_piece_area = None, None
+      self.drawn_panel = None
 
-   # A method for displaying the game grid
-   def display(self, next_tetromino=None):
+   # A method for displaying the game grid (with the held tetromino, the list
+   # of the next tetrominoes and the score in the side panel when they are
+   # given)
+   def display(self, next_tetrominoes=None, score=None, held_tetromino=None):
       # clear the background to empty_cell_color
       stddraw.clear(self.empty_cell_color)
+      # draw the game grid and the side panel
+      self.draw(next_tetrominoes, score, held_tetromino)
+      # show the resulting drawing without a pause (the frames are paced by
+      # the main game loop)
+      stddraw.show(0)
+
+   # A method for drawing the game grid and the side panel on the background
+   def draw(self, next_tetrominoes=None, score=None, held_tetromino=None):
       # draw the game grid
       self.draw_grid()
       # draw the current/active tetromino if it is not None
       # (the case when the game grid is updated)
       if self.current_tetromino is not None:
-         self.current_tetromino.draw()
+         self.current_tetromino.draw(self.x_offset)
       # draw a box around the game grid
       self.draw_boundaries()
+      self.draw_labels(next_tetrominoes is not None, score is not None)
+      if next_tetrominoes is not None:
+         self.draw_held_tetromino(held_tetromino)
+         self.draw_next_tetrominoes(next_tetrominoes)
+      if score is not None:
+         self.draw_score(score)
+
+   # A method for drawing the parts of the side panel that do not change (the
+   # empty background and the labels), e.g. once into a sprite drawn as the
+   # background of each frame (the game grid is drawn over it as a sprite)
+   def draw_background(self):
+      stddraw.setPenColor(self.empty_cell_color)
+      stddraw.filledRectangle(self.x_offset - 0.5, -0.5, self.grid_width + 6,
+                              self.grid_height)
+      self.draw_labels()
 
-      for x in range(self.grid_width, self.grid_width + 6):
-         for y in range(self.grid_height):
-            stddraw.setPenColor(self.empty_cell_color)
-            stddraw.filledSquare(x, y, 0.5)
+   # A method for drawing only the parts of the game grid and the side panel
+   # that have changed since the last call on the background canvas that
+   # keeps the frame drawn by the last call (the side panel is copied from
+   # the given background sprite drawn at (-0.5, -0.5) with draw_background
+   # before it is drawn again), returns the changed areas of the canvas as
+   # rectangles (x, y, w, h) (e.g. for showing only them, see stddraw.show)
+   def draw_changes(self, next_tetrominoes, score, held_tetromino, background):
+      x, y = self.x_offset - 0.5, -0.5
+      areas = []
+      # the changed rows (all the rows when the game grid is drawn first)
+      rows = self.update_board_sprite()
+      if rows is not None:
+         area = (x, rows[0] - 0.5, self.grid_width, rows[1] - rows[0] + 1)
+         stddraw.sprite(self.board_sprite, x, y, area)
+         areas.append(area)
+      # the current tetromino is drawn again when it has moved (or when the
+      # rows are drawn over it) after its last area is drawn without it
+      tetromino = self.current_tetromino
+      piece = None if tetromino is None else (
+         tetromino, tetromino.rotation, tetromino.bottom_left_cell.x,
+         tetromino.bottom_left_cell.y)
+      if piece != self.drawn_piece or areas:
+         if self.drawn_piece_area is not None:
+            stddraw.sprite(self.board_sprite, x, y, self.drawn_piece_area)
+            areas.append(self.drawn_piece_area)
+         self.drawn_piece, self.drawn_piece_area = piece, None
+         if tetromino is not None:
+            tetromino.draw(self.x_offset)
+            self.drawn_piece_area = self.get_piece_area()
+            if self.drawn_piece_area is not None:
+               areas.append(self.drawn_piece_area)
+      # the box is drawn again over the changed parts of the game grid (only
+      # over the parts at the edges when the box is only in the edge cells)
+      for area in areas:
+         if not self.box_in_edge_cells or self.is_at_edges(area):
+            stddraw.sprite(self.boundary_sprite, x, y, area)
+      panel = (held_tetromino, tuple(next_tetrominoes), score.points_text,
+               score.level_text)
+      if panel != self.drawn_panel:
+         self.drawn_panel = panel
+         area = (x + self.grid_width, y, 6, self.grid_height)
+         stddraw.sprite(background, -0.5, -0.5, area)
+         self.draw_held_tetromino(held_tetromino)
+         self.draw_next_tetrominoes(next_tetrominoes)
+         self.draw_score(score)
+         areas.append(area)
+      return areas
 
-      if next_tetromino is not None:
-         self.draw_next_tetromino(next_tetromino)
+   # A method that returns whether the given area (x, y, w, h) of the game
+   # grid has cells at the edges of the game grid
+   def is_at_edges(self, area):
+      x, y, w, h = area
+      return (x < self.x_offset or y < 0
+              or x + w > self.x_offset + self.grid_width - 1
+              or y + h > self.grid_height - 1)
 
-      # show the resulting drawing with a pause duration = 250 ms
-      stddraw.show(1)
+   # A method that returns the area of the current tetromino inside the game
+   # grid as a rectangle (x, y, w, h) (None when all of its tiles are above the
+   # game grid, as the tiles above the game grid are not drawn)
+   def get_piece_area(self):
+      left, right, bottom, top = self.current_tetromino.get_bounds()
+      top = min(top, self.grid_height - 1)
+      if bottom > top:
+         return None
+      return (self.x_offset + left - 0.5, bottom - 0.5, right - left + 1,
+              top - bottom + 1)
 
-   # A method for drawing the cells and the lines of the game grid
+   # A method for drawing the cells and the lines of the game grid (the game
+   # grid is drawn as a sprite, and only the rows that have changed since the
+   # last frame are repainted in the sprite)
    def draw_grid(self):
-      # for each cell of the game grid
-      for row in range(self.grid_height):
+      self.update_board_sprite()
+      stddraw.sprite(self.board_sprite, self.x_offset - 0.5, -0.5)
+
+   # A method for drawing the empty game grid into background_sprite (once)
+   # and repainting the changed rows in board_sprite, returns the lowest and
+   # the highest repainted rows (None when no row has changed)
+   def update_board_sprite(self):
+      x, y = self.x_offset - 0.5, -0.5
+      if self.board_sprite is None:
+         # draw the empty game grid once into a sprite
+         stddraw.beginSprite(x, y, self.grid_width, self.grid_height,
+                             transparent=False)
+         stddraw.setPenColor(self.empty_cell_color)
+         stddraw.filledRectangle(x, y, self.grid_width, self.grid_height)
+         self.draw_lines()
+         self.background_sprite = stddraw.endSprite()
+         self.board_sprite = self.background_sprite.copy()
+         self.dirty_rows[:] = True
+         # the box around the game grid in a transparent sprite (drawn over
+         # the changed parts of the game grid, see draw_changes) and whether
+         # it is only in the cells at the edges of the game grid
+         stddraw.beginSprite(x, y, self.grid_width, self.grid_height)
+         self.draw_boundaries()
+         self.boundary_sprite = stddraw.endSprite()
+         width, height = self.boundary_sprite.get_size()
+         cell_w = round(width / self.grid_width)
+         cell_h = round(height / self.grid_height)
+         self.box_in_edge_cells = (
+            width > 2 * cell_w and height > 2 * cell_h
+            and self.boundary_sprite.subsurface(
+               cell_w, cell_h, width - 2 * cell_w, height - 2 * cell_h
+            ).get_bounding_rect().width == 0)
+      if not self.dirty_rows.any():
+         return None
+      return self.repaint_rows()
+
+   # A method for repainting the changed rows of the game grid in board_sprite
+   # (the empty row is copied from background_sprite and its tiles are drawn),
+   # returns the lowest and the highest repainted rows
+   def repaint_rows(self):
+      x, y = self.x_offset - 0.5, -0.5
+      rows = np.flatnonzero(self.dirty_rows)
+      stddraw.editSprite(self.board_sprite, x, y)
+      for row in rows:
+         stddraw.sprite(self.background_sprite, x, y,
+                        (x, row - 0.5, self.grid_width, 1))
+         tiles = self.tile_matrix[self.rows[row]]
          for col in range(self.grid_width):
-            # if the current grid cell is occupied by a tile
-            if self.tile_matrix[row][col] is not None:
-               # draw this tile
-               self.tile_matrix[row][col].draw(Point(col, row))
-      # draw the inner lines of the game grid
+            if tiles[col] is not None:
+               tiles[col].draw(Point(col + self.x_offset, row))
+      stddraw.endSprite()
+      self.dirty_rows[:] = False
+      return int(rows[0]), int(rows[-1])
+
+   # A method for drawing the inner lines of the game grid
+   def draw_lines(self):
       stddraw.setPenColor(self.line_color)
       stddraw.setPenRadius(self.line_thickness)
       # x and y ranges for the game grid
-      start_x, end_x = -0.5, self.grid_width - 0.5
+      start_x = self.x_offset - 0.5
+      end_x = self.x_offset + self.grid_width - 0.5
       start_y, end_y = -0.5, self.grid_height - 0.5
       for x in np.arange(start_x + 1, end_x, 1):  # vertical inner lines
          stddraw.line(x, start_y, x, end_y)
@@ -78,7 +257,7 @@ class GameGrid:
       # for the bounding box as its lines lie on the boundaries of the canvas)
       stddraw.setPenRadius(self.box_thickness)
       # the coordinates of the bottom left corner of the game grid
-      pos_x, pos_y = -0.5, -0.5
+      pos_x, pos_y = self.x_offset - 0.5, -0.5
       stddraw.rectangle(pos_x, pos_y, self.grid_width, self.grid_height)
       stddraw.setPenRadius()  # reset the pen radius to its default value
 
@@ -90,7 +269,7 @@ class GameGrid:
       if not self.is_inside(row, col):
          return False  # the cell is not occupied as it is outside the grid
       # the cell is occupied by a tile if it is not None
-      return self.tile_matrix[row][col] is not None
+      return self.tile_matrix[self.rows[row]][col] is not None
 
    # A method for checking whether the cell with the given row and col indexes
    # is inside the game grid or not
@@ -109,6 +288,8 @@ class GameGrid:
       self.current_tetromino = None
       # lock the tiles of the current tetromino (tiles_to_lock) on the grid
       n_rows, n_cols = len(tiles_to_lock), len(tiles_to_lock[0])
+      # the lowest and the highest rows that the tiles are locked on
+      min_row, max_row = self.grid_height, -1
       for col in range(n_cols):
          for row in range(n_rows):
             # place each tile (occupied cell) onto the game grid
@@ -118,50 +299,236 @@ class GameGrid:
                pos.x = blc_position.x + col
                pos.y = blc_position.y + (n_rows - 1) - row
                if self.is_inside(pos.y, pos.x):
-                  self.tile_matrix[pos.y][pos.x] = tiles_to_lock[row][col]
+                  index = self.rows[pos.y]
+                  # (a tile may replace another one when the game is over)
+                  if self.tile_matrix[index][pos.x] is None:
+                     self.row_counts[index] += 1
+                  self.tile_matrix[index][pos.x] = tiles_to_lock[row][col]
+                  self.dirty_rows[pos.y] = True
+                  self.number_matrix[index][pos.x] = tiles_to_lock[row][col].number
+                  if self.record_deltas:
+                     number = tiles_to_lock[row][col].number
+                     self.delta_ops.append(["set", pos.y, pos.x, number])
+                  min_row, max_row = min(min_row, pos.y), max(max_row, pos.y)
                # the game is over if any placed tile is above the game grid
                else:
                   self.game_over = True
+      self.stack_height = max(self.stack_height, max_row + 1)
+      # only the rows that the tiles are locked on can become full
+      lines_cleared = self.clear_full_lines(min_row, max_row)
       # return the value of the game_over flag
-      lines_cleared = self.clear_full_lines()
       return self.game_over, lines_cleared
 
-   def clear_full_lines(self):
+   # A method that clears the full rows between the given rows (all the rows
+   # by default) and returns the number of the rows cleared
+   def clear_full_lines(self, first_row=0, last_row=None):
+      if last_row is None:
+         last_row = self.grid_height - 1
       lines_cleared = 0
-
-      row = 0
-      while row < self.grid_height:
-         if all(self.tile_matrix[row][col] is not None for col in range(self.grid_width)):
-            for r in range(row, self.grid_height - 1):
-               for c in range(self.grid_width):
-                  self.tile_matrix[r][c] = self.tile_matrix[r + 1][c]
-            for c in range(self.grid_width):
-               self.tile_matrix[self.grid_height - 1][c] = None
+      # the rows are checked from the top so that clearing a row does not
+      # move the rows that are not checked yet
+      for row in range(last_row, first_row - 1, -1):
+         if self.row_counts[self.rows[row]] == self.grid_width:
+            self.remove_row(row)
             lines_cleared += 1
-         else:
-            row += 1
-
       return lines_cleared
 
-   def draw_next_tetromino(self, tetromino):
-      offset_x = self.grid_width + 2
-      offset_y = self.grid_height - 5
-
-      tile_matrix = tetromino.tile_matrix
-      n_rows = len(tile_matrix)
-      n_cols = len(tile_matrix[0])
-
-      for row in range(n_rows):
-         for col in range(n_cols):
-            tile = tile_matrix[row][col]
-            if tile is not None:
-               x = offset_x + col
-               y = offset_y - row
-               stddraw.setPenColor(tile.background_color)
-               stddraw.filledSquare(x, y, 0.5)
-               stddraw.setPenColor(tile.box_color)
-               stddraw.square(x, y, 0.5)
+   # A method that removes the given row by moving the rows above it down by
+   # one, the removed row is emptied and moved to the top of the stack by its
+   # index (the tiles of the rows above it are not copied, only their indexes
+   # are moved, so the cost still grows with the height of the stack but only
+   # by moving one index for each row)
+   def remove_row(self, row):
+      index = self.rows.pop(row)
+      # the tiles of the row are released to be reused for the new tiles
+      for tile in self.tile_matrix[index]:
+         if tile is not None:
+            tile.release()
+      self.tile_matrix[index] = None
+      self.number_matrix[index] = 0
+      self.row_counts[index] = 0
+      # the row and the rows above it in the stack are moved
+      self.dirty_rows[row:self.stack_height] = True
+      self.stack_height -= 1
+      self.rows.insert(self.stack_height, index)
+      self.row_indexes[row:self.stack_height + 1] = (
+         self.rows[row:self.stack_height + 1])
+      if self.record_deltas:
+         self.delta_ops.append(["remove_row", row])
+
+   # A method for pushing the given number of garbage rows (rows of tiles with
+   # an empty cell in the given column) into the game grid from the bottom,
+   # the game is over when a tile is pushed out of the game grid from the top
+   # (returns the value of the game_over flag)
+   def add_garbage(self, n_rows, hole_col):
+      n_rows = min(n_rows, self.grid_height)
+      if n_rows <= 0:
+         return self.game_over
+      # the top rows pushed out of the game grid are moved to the bottom by
+      # their indexes (moving the other rows up by n_rows at once) and reused
+      # for the garbage rows, the game is over when any of them has a tile
+      pushed = self.rows[self.grid_height - n_rows:]
+      if self.row_counts[pushed].any():
+         self.game_over = True
+         for index in pushed:
+            for tile in self.tile_matrix[index]:
+               if tile is not None:
+                  tile.release()
+      del self.rows[self.grid_height - n_rows:]
+      self.rows[0:0] = pushed
+      self.row_indexes[:] = self.rows
+      n_kept = min(self.stack_height, self.grid_height - n_rows)
+      # fill the bottom rows with the garbage rows
+      self.tile_matrix[pushed] = [[Tile.acquire() if col != hole_col else None
+                                   for col in range(self.grid_width)]
+                                  for _ in range(n_rows)]
+      number = Tile.initial_number
+      self.number_matrix[pushed] = number
+      self.number_matrix[pushed, hole_col] = 0
+      self.row_counts[pushed] = self.grid_width - 1
+      # all the rows of the stack are moved
+      self.dirty_rows[:max(self.stack_height, n_rows + n_kept)] = True
+      self.stack_height = n_rows + n_kept
+      if self.record_deltas:
+         self.delta_ops.append(["add_garbage", n_rows, hole_col, number])
+      return self.game_over
+
+   # A method for releasing all the locked tiles of the game grid into the pool
+   # of the tiles (e.g. when the game grid is replaced by a new one for a new
+   # game, it must not be used after this call)
+   def release_tiles(self):
+      for tile in self.tile_matrix.flat:
+         if tile is not None:
+            tile.release()
+      self.tile_matrix.fill(None)
+
+   # A method that writes the numbers on the locked tiles into the given 2D
+   # uint16 array (0 for the empty cells, row 0 is the bottom row of the grid)
+   # without allocating a temporary array (the indexes are in range, so the
+   # wrap mode only lets np.take write into out without a buffer)
+   def fill_number_matrix(self, out):
+      return np.take(self.number_matrix, self.row_indexes, axis=0, out=out,
+                     mode="wrap")
+
+   # A method that returns a new 2D array with the numbers on the locked tiles
+   # in the order of the rows of the game grid (see fill_number_matrix)
+   def get_number_matrix(self):
+      return self.number_matrix[self.row_indexes]
+
+   # A method that returns the pose of the current tetromino as a dictionary
+   # with its type, the position of the bottom left cell of its tile matrix
+   # and the occupied cells as [col, row] offsets from that position
+   def get_piece_pose(self):
+      tetromino = self.current_tetromino
+      if tetromino is None:
+         return None
+      n = len(tetromino.tile_matrix)
+      cells = [[col, (n - 1) - row] for row in range(n) for col in range(n)
+               if tetromino.tile_matrix[row][col] is not None]
+      return {"type": tetromino.type, "x": tetromino.bottom_left_cell.x,
+              "y": tetromino.bottom_left_cell.y, "cells": cells}
+
+   # A method that returns a keyframe with the full state of the game grid
+   def take_keyframe(self):
+      self.delta_ops = []
+      self.last_piece_pose = self.get_piece_pose()
+      return {"type": "keyframe", "tick": self.tick,
+              "numbers": self.get_number_matrix().tolist(),
+              "piece": self.last_piece_pose, "game_over": self.game_over}
+
+   # A method that returns the changes since the last delta (or keyframe) as
+   # a delta with the ordered operations on the locked tiles and the pose of
+   # the current tetromino (None when the pose has not changed). A keyframe is
+   # returned instead in every keyframe_interval ticks. (The deltas and the
+   # keyframes are applied on a copy of the grid by a GridReplica.)
+   def take_delta(self):
+      self.tick += 1
+      if self.tick % self.keyframe_interval == 0:
+         return self.take_keyframe()
+      ops, self.delta_ops = self.delta_ops, []
+      pose = self.get_piece_pose()
+      changed_pose = pose != self.last_piece_pose
+      self.last_piece_pose = pose
+      return {"type": "delta", "tick": self.tick, "ops": ops,
+              "piece": pose if changed_pose else None,
+              "piece_changed": changed_pose, "game_over": self.game_over}
+
+   # A method for drawing the held tetromino (if any) at the top of the side
+   # panel
+   def draw_held_tetromino(self, tetromino):
+      if tetromino is not None:
+         top = self.grid_height - 0.5 - 1.2  # below the label
+         self.draw_preview(tetromino, top, GameGrid.preview_scale)
+
+   # A method for drawing the next tetrominoes below the held tetromino (in
+   # the order they enter the game grid), the tiles are drawn smaller when
+   # all the tetrominoes do not fit above the score
+   def draw_next_tetrominoes(self, tetrominoes):
+      # below the held tetromino and the label (see draw_labels)
+      top = self.grid_height - 0.5 - 2.4 - 4 * GameGrid.preview_scale
+      # each tetromino is drawn in a slot of 4 tiles and a gap of 0.4 tiles
+      available = top - 3.5
+      scale = min(GameGrid.preview_scale,
+                  available / (4.4 * max(1, len(tetrominoes))))
+      for tetromino in tetrominoes:
+         self.draw_preview(tetromino, top, scale)
+         top -= 4.4 * scale
+
+   # A method for drawing the labels of the side panel (the labels of the held
+   # and the next tetrominoes when previews is True and the label of the score
+   # when score is True) above the parts they label
+   def draw_labels(self, previews=True, score=True):
+      top = self.grid_height - 0.5
+      if previews:
+         self.draw_label("Hold", top - 0.6)
+         self.draw_label("Next", top - 1.8 - 4 * GameGrid.preview_scale)
+      if score:
+         self.draw_label("Score", 3)
+
+   # A method for drawing a label centered in the side panel
+   def draw_label(self, label, y):
+      stddraw.setPenColor(self.line_color)
+      stddraw.setFontFamily("Arial")
+      stddraw.setFontSize(16)
+      stddraw.text(self.x_offset + self.grid_width + 2.5, y, label)
+
+   # A method for drawing the given tetromino (without the empty rows and
+   # columns of its tile matrix) centered in the side panel, in a slot of 4
+   # tiles of the given scale below the given top. The tetromino is drawn as
+   # a sprite once and the sprite is drawn on the following frames (moving
+   # with the slot of the tetromino as the tetrominoes advance).
+   def draw_preview(self, tetromino, top, scale):
+      # the margin around the tiles for the boxes drawn around them
+      margin = 0.1
+      if tetromino.preview is None or tetromino.preview[0] != scale:
+         tile_matrix = tetromino.get_min_bounded_tile_matrix()
+         n_rows, n_cols = tile_matrix.shape
+         width = n_cols * scale + 2 * margin
+         height = n_rows * scale + 2 * margin
+         x = self.x_offset + self.grid_width + 2.5 - width / 2
+         y = top - 2 * scale - height / 2
+         stddraw.beginSprite(x, y, width, height)
+         for row in range(n_rows):
+            for col in range(n_cols):
+               tile = tile_matrix[row][col]
+               if tile is not None:
+                  position = Point(x + margin + (col + 0.5) * scale,
+                                   y + margin + (n_rows - 0.5 - row) * scale)
+                  tile.draw(position, scale, is_preview=True)
+         tetromino.preview = (scale, stddraw.endSprite(), width, height)
+      _, sprite, width, height = tetromino.preview
+      # the bottom left corner of the sprite
+      x = self.x_offset + self.grid_width + 2.5 - width / 2
+      y = top - 2 * scale - height / 2
+      stddraw.sprite(sprite, x, y)
 
+   # A method for drawing the score and the level at the bottom of the side
+   # panel below the label of the score (the texts of the score are rendered
+   # again only when they change, see stddraw.text)
+   def draw_score(self, score):
+      center_x = self.x_offset + self.grid_width + 2.5
       stddraw.setPenColor(self.line_color)
+      stddraw.setFontFamily("Arial")
       stddraw.setFontSize(16)
-      stddraw.text(offset_x + 1, offset_y + 3,"Next")
+      stddraw.boldText(center_x, 2, score.points_text)
+      stddraw.text(center_x, 1, score.level_text)
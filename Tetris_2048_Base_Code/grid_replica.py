@@ -0,0 +1,48 @@
+import numpy as np  # fundamental Python module for scientific computing
+
+# A class for modeling a copy of a game grid that is kept up to date by the
+# keyframes and the deltas taken from the game grid (see GameGrid.take_delta),
+# e.g. by a remote viewer or a recorder
+class GridReplica:
+   # A constructor for creating an empty replica with the given dimensions
+   def __init__(self, grid_h, grid_w):
+      self.grid_height, self.grid_width = grid_h, grid_w
+      self.number_matrix = np.zeros((grid_h, grid_w), dtype=np.uint16)
+      self.piece = None
+      self.game_over = False
+      self.tick = None  # None until the first keyframe is applied
+
+   # A method for applying a keyframe or a delta, the deltas received before
+   # the first keyframe are ignored (returns True when the message is applied)
+   def apply(self, message):
+      if message["type"] == "keyframe":
+         self.number_matrix[:] = message["numbers"]
+         self.piece = message["piece"]
+      elif self.tick is None:
+         return False
+      else:
+         for op in message["ops"]:
+            self.apply_op(op)
+         if message["piece_changed"]:
+            self.piece = message["piece"]
+      self.tick = message["tick"]
+      self.game_over = message["game_over"]
+      return True
+
+   # A method for applying a single operation of a delta
+   def apply_op(self, op):
+      if op[0] == "set":
+         _, row, col, number = op
+         self.number_matrix[row][col] = number
+      elif op[0] == "remove_row":
+         row = op[1]
+         self.number_matrix[row:-1] = self.number_matrix[row + 1:]
+         self.number_matrix[-1] = 0
+      elif op[0] == "add_garbage":
+         _, n_rows, hole_col, number = op
+         n_rows = min(n_rows, self.grid_height)
+         self.number_matrix[n_rows:] = self.number_matrix[:-n_rows].copy()
+         self.number_matrix[:n_rows] = number
+         self.number_matrix[:n_rows, hole_col] = 0
+      else:
+         raise ValueError("unknown delta operation: " + str(op[0]))
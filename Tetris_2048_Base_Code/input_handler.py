@@ -0,0 +1,96 @@
+import lib.stddraw as stddraw  # used for reading the key press/release events
+
+# A class for turning the key events into the actions applied on the current
+# tetromino, held keys are repeated as in the guideline games: an action is
+# applied when its key is pressed, repeated once after the delayed auto shift
+# (DAS) time and then once in every auto repeat rate (ARR) time.
+class InputHandler:
+   # the default key bindings (key name -> action in tetromino.ACTIONS, or
+   # "hold" for holding the current tetromino, see Tetris_2048.start)
+   default_bindings = {"left": "left", "right": "right", "down": "down",
+                       "z": "rotate", "space": "hard_drop", "c": "hold"}
+   # the actions that are repeated while their keys are held down
+   repeated_actions = ("left", "right", "down")
+   # the maximum number of the repeats applied in a single call of poll (an
+   # ARR of 0 applies this many repeats, moving the tetromino all the way)
+   max_repeats_per_poll = 64
+
+   # A constructor for creating an input handler with the given DAS and ARR
+   # times in seconds and the given key bindings
+   def __init__(self, das=0.17, arr=0.05, bindings=None):
+      self.das, self.arr = das, arr
+      self.bindings = dict(InputHandler.default_bindings if bindings is None
+                           else bindings)
+      # the time of the next repeat for each held repeated action
+      self.next_repeat = {}
+      # the horizontal action that is repeated (the most recently pressed one
+      # when both left and right are held down)
+      self.horizontal = None
+      # the list of the actions returned by poll (reused by each call)
+      self.actions = []
+
+   # A method that reads all the queued key events and returns the list of the
+   # actions to apply (in the order of the events) up to the given time (the
+   # given list of key events is used instead when the events are read by the
+   # caller, e.g. for the input handlers of two players sharing the keyboard)
+   def poll(self, now, events=None):
+      actions = self.actions
+      actions.clear()
+      if events is None:
+         events = read_key_events()
+      for key, pressed, timestamp in events:
+         action = self.bindings.get(key)
+         if action is None:
+            continue
+         if pressed:
+            self.press(action, timestamp)
+         else:
+            self.release(action, timestamp)
+      # apply the repeats of the held actions that are due
+      for action, due in self.next_repeat.items():
+         if action in ("left", "right") and action != self.horizontal:
+            continue
+         repeats = 0
+         while due <= now and repeats < InputHandler.max_repeats_per_poll:
+            actions.append(action)
+            due += self.arr
+            repeats += 1
+         self.next_repeat[action] = due
+      return actions
+
+   # A method for handling the press of the key of the given action
+   def press(self, action, timestamp):
+      self.actions.append(action)
+      if action in InputHandler.repeated_actions:
+         self.next_repeat[action] = timestamp + self.das
+         if action in ("left", "right"):
+            self.horizontal = action
+
+   # A method for handling the release of the key of the given action
+   def release(self, action, timestamp):
+      self.next_repeat.pop(action, None)
+      if action == self.horizontal:
+         # fall back to the other horizontal action if it is still held (its
+         # repeats resume from the release instead of catching up)
+         other = "right" if action == "left" else "left"
+         self.horizontal = other if other in self.next_repeat else None
+         if self.horizontal is not None:
+            due = self.next_repeat[other]
+            self.next_repeat[other] = max(due, timestamp + self.arr)
+
+   # A method for forgetting the held keys (e.g. after the game is paused)
+   def reset(self):
+      self.next_repeat.clear()
+      self.horizontal = None
+      self.actions.clear()
+
+# the list of the key events returned by read_key_events (reused by each call)
+_key_events = []
+
+# A function that reads all the queued key events as (key, pressed, timestamp)
+# tuples (see stddraw.nextKeyEvent) into a list and returns the list
+def read_key_events():
+   _key_events.clear()
+   while stddraw.hasNextKeyEvent():
+      _key_events.append(stddraw.nextKeyEvent())
+   return _key_events
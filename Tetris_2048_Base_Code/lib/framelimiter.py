@@ -0,0 +1,80 @@
+"""
+framelimiter.py
+
+The framelimiter module defines the FrameLimiter class, which paces
+an animation loop to a given number of frames per second.
+"""
+
+#-----------------------------------------------------------------------
+
+import time
+
+#-----------------------------------------------------------------------
+
+# The sleep of the operating system may overshoot by up to about a
+# millisecond, so the last part of each wait is spent spinning.
+_SPIN_SECONDS = 0.001
+
+#-----------------------------------------------------------------------
+
+class FrameLimiter:
+    """
+    A FrameLimiter object paces a loop that calls its wait() method
+    once per frame. The frame deadlines are computed from a monotonic
+    clock (so the frame times do not drift), and a frame that ends
+    after its deadline is counted as a missed deadline.
+    """
+
+    def __init__(self, fps=60):
+        """
+        Construct self to pace a loop to fps frames per second.
+        """
+        self._period = 1.0 / fps
+        self._missed = 0
+        self._deadline = None
+
+    #-------------------------------------------------------------------
+
+    def wait(self):
+        """
+        Wait until the deadline of the current frame and return the
+        number of seconds by which the deadline was missed (0.0 if the
+        deadline was met). The first call starts the pacing and does
+        not wait.
+        """
+        now = time.perf_counter()
+        if self._deadline is None:
+            self._deadline = now + self._period
+            return 0.0
+        late = now - self._deadline
+        if late > 0.0:
+            # Start over from now instead of rushing the next frames
+            # to catch up with the missed deadline.
+            self._missed += 1
+            self._deadline = now + self._period
+            return late
+        remaining = self._deadline - now
+        if remaining > _SPIN_SECONDS:
+            time.sleep(remaining - _SPIN_SECONDS)
+        while time.perf_counter() < self._deadline:
+            pass
+        self._deadline += self._period
+        return 0.0
+
+    #-------------------------------------------------------------------
+
+    def missedDeadlines(self):
+        """
+        Return the number of the missed frame deadlines.
+        """
+        return self._missed
+
+    #-------------------------------------------------------------------
+
+    def reset(self):
+        """
+        Restart the pacing (e.g. after a pause), so that the time spent
+        since the last call of wait() is not counted as a missed
+        deadline.
+        """
+        self._deadline = None
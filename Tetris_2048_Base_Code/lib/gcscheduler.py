@@ -0,0 +1,89 @@
+"""
+gcscheduler.py
+
+The gcscheduler module defines the GCScheduler class, which keeps the
+cyclic garbage collector from running in the middle of the frames of
+an animation loop.
+"""
+
+#-----------------------------------------------------------------------
+
+import gc
+import time
+
+#-----------------------------------------------------------------------
+
+class GCScheduler:
+    """
+    A GCScheduler object disables the automatic collections of the
+    cyclic garbage collector between its start() and stop() calls.
+    The objects that exist when start() is called (e.g. the modules,
+    the fonts and the sprites) are frozen, so that the collections do
+    not scan them again, and the young objects are collected only
+    when the program calls collect() at a safe moment (e.g. when a new
+    piece enters a game). The oldest generation is collected only by
+    start() and stop().
+    """
+
+    def __init__(self, youngInterval=10):
+        """
+        Construct self to collect the youngest generation (generation
+        0) in each call of collect(), and also generation 1 (the
+        objects that survived the collections of generation 0) in
+        every youngInterval-th call.
+        """
+        self._youngInterval = youngInterval
+        self._calls = 0
+        self._maxPause = 0.0
+        self._wasEnabled = None
+
+    #-------------------------------------------------------------------
+
+    def start(self):
+        """
+        Collect all the garbage, freeze the remaining objects and
+        disable the automatic collections. Call it at a safe moment
+        (e.g. after a menu, before the game loop starts).
+        """
+        if self._wasEnabled is None:
+            self._wasEnabled = gc.isenabled()
+        gc.disable()
+        gc.collect()
+        gc.freeze()
+
+    #-------------------------------------------------------------------
+
+    def collect(self):
+        """
+        Collect the youngest generation (and generation 1 in every
+        youngInterval-th call) and return the number of seconds spent.
+        """
+        self._calls += 1
+        generation = 1 if self._calls % self._youngInterval == 0 else 0
+        start = time.perf_counter()
+        gc.collect(generation)
+        elapsed = time.perf_counter() - start
+        self._maxPause = max(self._maxPause, elapsed)
+        return elapsed
+
+    #-------------------------------------------------------------------
+
+    def maxPause(self):
+        """
+        Return the longest time spent in collect() in seconds.
+        """
+        return self._maxPause
+
+    #-------------------------------------------------------------------
+
+    def stop(self):
+        """
+        Unfreeze the frozen objects, collect all the garbage and
+        restore the automatic collections (if they were enabled when
+        start() was called).
+        """
+        gc.unfreeze()
+        gc.collect()
+        if self._wasEnabled:
+            gc.enable()
+        self._wasEnabled = None
@@ -55,7 +55,61 @@ class Picture:
             self._surface.fill((0, 0, 0))
         else:
             raise ValueError()
-            
+        self._invalidate()
+
+    #-------------------------------------------------------------------
+
+    def _invalidate(self):
+        """
+        Discard the surfaces derived from the pixels of self (called
+        whenever the pixels change).
+        """
+        # The copy of self converted to the pixel format of the display
+        # and the scaled copies keyed by their (width, height).
+        self._converted = None
+        self._scaled = {}
+
+    #-------------------------------------------------------------------
+
+    def _displaySurface(self):
+        """
+        Return a copy of self converted to the pixel format of the
+        display, so that drawing it does not convert the pixels each
+        time. The copy is made once and reused. If the display has not
+        been created yet, return the surface of self.
+        """
+        if self._converted is None:
+            if pygame.display.get_surface() is None:
+                return self._surface
+            if self._surface.get_flags() & pygame.SRCALPHA:
+                self._converted = self._surface.convert_alpha()
+            else:
+                self._converted = self._surface.convert()
+        return self._converted
+
+    #-------------------------------------------------------------------
+
+    def _scaledSurface(self, w, h):
+        """
+        Return a copy of self scaled to w pixels wide and h pixels high
+        (in the pixel format of the display). The scaled copies are
+        made once for each size and reused.
+        """
+        w = int(round(w))
+        h = int(round(h))
+        if (w, h) == (self.width(), self.height()):
+            return self._displaySurface()
+        scaled = self._scaled.get((w, h))
+        if scaled is None:
+            source = self._displaySurface()
+            try:
+                scaled = pygame.transform.smoothscale(source, (w, h))
+            except ValueError:
+                # smoothscale supports only 24 and 32 bit surfaces.
+                scaled = pygame.transform.scale(source, (w, h))
+            self._scaled[(w, h)] = scaled
+        return scaled
+
     #-------------------------------------------------------------------
 
     def save(self, f):
@@ -98,3 +152,27 @@ class Picture:
         """
         pygameColor = pygame.Color(c.getRed(), c.getGreen(), c.getBlue(), 0)
         self._surface.set_at((x, y), pygameColor)
+        self._invalidate()
+
+    #-------------------------------------------------------------------
+
+    def toArray(self):
+        """
+        Return the colors of all the pixels of self as a numpy array of
+        the shape (width, height, 3), indexed by [x, y] as get() and
+        set(). The array is a copy of the pixels.
+        """
+        import pygame.surfarray
+        return pygame.surfarray.array3d(self._surface)
+
+    #-------------------------------------------------------------------
+
+    def fromArray(self, a):
+        """
+        Set the colors of all the pixels of self to the colors in a, a
+        numpy array of the shape (width, height, 3) as returned by
+        toArray().
+        """
+        import pygame.surfarray
+        pygame.surfarray.blit_array(self._surface, a)
+        self._invalidate()
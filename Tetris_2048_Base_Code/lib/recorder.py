@@ -0,0 +1,262 @@
+"""
+recorder.py
+
+The recorder module defines the Recorder class, which records the
+frames shown by stddraw as a sequence of image files or as an
+animated GIF file. The pixels of each shown frame are copied into a
+ring buffer and a background thread writes the frames from the
+buffer, so recording does not block the drawing. If the writer falls
+behind, the new frames are dropped (and counted) instead of waiting.
+The frames of an animated GIF file are written to the file one by one,
+so the memory used does not grow with the length of the recording.
+"""
+
+#-----------------------------------------------------------------------
+
+import io
+import struct
+import threading
+
+try:
+    import lib.stddraw as stddraw
+except ModuleNotFoundError:
+    import stddraw
+
+import numpy
+
+#-----------------------------------------------------------------------
+
+_DEFAULT_CAPACITY = 32
+
+#-----------------------------------------------------------------------
+
+class Recorder:
+    """
+    A Recorder object records the frames shown by stddraw. If the file
+    name ends with '.gif', then the frames are written to an animated
+    GIF file (this requires the Pillow package). Otherwise the file
+    name must contain a format field for the frame number (such as
+    'frames/frame-%05d.png') and each frame is written to its own file.
+    If writing a frame fails, recording ends and stop() raises the
+    error.
+    """
+
+    def __init__(self, f, capacity=_DEFAULT_CAPACITY, every=1, fps=60):
+        """
+        Construct self to record every every-th shown frame to f, using
+        a ring buffer of capacity frames. fps is the frame rate of the
+        animated GIF file.
+        """
+        self._fileName = f
+        self._gif = f.lower().endswith('.gif')
+        if self._gif:
+            # Pillow is needed only for writing animated GIF files.
+            try:
+                import PIL.Image
+            except ImportError:
+                raise ImportError('recording a GIF file requires Pillow')
+        else:
+            try:
+                f % 0
+            except TypeError:
+                raise ValueError('the file name must contain a format '
+                    'field for the frame number, such as %05d')
+        # The GIF file is opened when the first frame is written.
+        self._gifFile = None
+        self._error = None
+        self._capacity = capacity
+        self._every = every
+        self._frameDuration = int(round(1000.0 * every / fps))
+        self._buffer = None
+        # The frames are written to the ring buffer slot
+        # _written % capacity and read from the slot _read % capacity.
+        self._written = 0
+        self._read = 0
+        self._shown = 0
+        self._framesWritten = 0
+        self._framesDropped = 0
+        self._recording = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    #-------------------------------------------------------------------
+
+    def start(self):
+        """
+        Start recording the frames shown by stddraw.
+        """
+        self._recording = True
+        self._thread = threading.Thread(target=self._writeFrames,
+            name='recorder', daemon=True)
+        self._thread.start()
+        stddraw.addShowListener(self._onShow)
+
+    #-------------------------------------------------------------------
+
+    def stop(self):
+        """
+        Stop recording and wait until all the recorded frames are
+        written. Raise the error that ended recording, if any.
+        """
+        stddraw.removeShowListener(self._onShow)
+        with self._condition:
+            self._recording = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._gifFile is not None:
+            # The trailer of the GIF file.
+            self._gifFile.write(b';')
+            self._gifFile.close()
+            self._gifFile = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    #-------------------------------------------------------------------
+
+    def framesWritten(self):
+        """
+        Return the number of the frames written so far.
+        """
+        return self._framesWritten
+
+    #-------------------------------------------------------------------
+
+    def framesDropped(self):
+        """
+        Return the number of the frames dropped because the ring buffer
+        was full.
+        """
+        return self._framesDropped
+
+    #-------------------------------------------------------------------
+
+    def _onShow(self, surface):
+        """
+        Copy the pixels of surface (the frame being shown) into the
+        ring buffer, or drop the frame if the ring buffer is full.
+        """
+        import pygame.surfarray
+        self._shown += 1
+        if (self._shown - 1) % self._every != 0:
+            return
+        if (self._error is not None or
+                self._written - self._read == self._capacity):
+            self._framesDropped += 1
+            return
+        if self._buffer is None:
+            w, h = surface.get_size()
+            self._buffer = numpy.zeros((self._capacity, w, h, 3),
+                numpy.uint8)
+        # pixels3d() is a view of the pixels of surface (no copy), and
+        # the surface stays locked until the view is deleted.
+        view = pygame.surfarray.pixels3d(surface)
+        numpy.copyto(self._buffer[self._written % self._capacity], view)
+        del view
+        with self._condition:
+            self._written += 1
+            self._condition.notify()
+
+    #-------------------------------------------------------------------
+
+    def _writeFrames(self):
+        """
+        Write the frames from the ring buffer until recording is
+        stopped and all the frames are written.
+        """
+        while True:
+            with self._condition:
+                while self._recording and self._read == self._written:
+                    self._condition.wait()
+                if self._read == self._written:
+                    return
+            frame = self._buffer[self._read % self._capacity]
+            try:
+                self._writeFrame(frame)
+            except Exception as e:
+                # The error is raised by stop(), and the frames shown
+                # after it are dropped.
+                self._error = e
+                return
+            self._framesWritten += 1
+            with self._condition:
+                self._read += 1
+
+    #-------------------------------------------------------------------
+
+    def _writeFrame(self, frame):
+        """
+        Write frame, an array of the pixels with the shape (w, h, 3).
+        """
+        if self._gif:
+            import PIL.Image
+            # The array is indexed by (x, y) and PIL by (row, column).
+            image = PIL.Image.fromarray(frame.transpose(1, 0, 2))
+            # Pillow encodes the frame as a GIF file of a single image,
+            # and the image is appended to the animated GIF file.
+            data = io.BytesIO()
+            image.quantize().save(data, 'GIF')
+            if self._gifFile is None:
+                w, h = image.size
+                self._gifFile = open(self._fileName, 'wb')
+                # The header, the logical screen descriptor (without a
+                # global color table) and the looping extension.
+                self._gifFile.write(b'GIF89a' +
+                    struct.pack('<HHBBB', w, h, 0, 0, 0) +
+                    b'!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')
+            delay = int(round(self._frameDuration / 10.0))
+            self._gifFile.write(_gifFrame(data.getvalue(), delay))
+        else:
+            import pygame
+            surface = pygame.surfarray.make_surface(frame)
+            pygame.image.save(surface,
+                self._fileName % self._framesWritten)
+
+#-----------------------------------------------------------------------
+
+def _skipSubBlocks(data, i):
+    """
+    Return the index after the GIF data sub-blocks that start at index
+    i of data (the last sub-block is empty).
+    """
+    while data[i] != 0:
+        i += data[i] + 1
+    return i + 1
+
+#-----------------------------------------------------------------------
+
+def _gifFrame(data, delay):
+    """
+    Return the image of data, a GIF file of a single image, as a frame
+    of an animated GIF file: a graphic control extension with the delay
+    in hundredths of a second, the image descriptor with the color
+    table of the file as its local color table and the image data.
+    """
+    flags = data[10]
+    i = 13
+    colorTable = b''
+    if flags & 0x80:
+        size = 3 << ((flags & 0x07) + 1)
+        colorTable = data[i:i + size]
+        i += size
+    while data[i] == 0x21:
+        # Skip the extensions of the file.
+        i = _skipSubBlocks(data, i + 2)
+    if data[i] != 0x2c:
+        raise ValueError('no image in the GIF data')
+    descriptor = bytearray(data[i:i + 10])
+    i += 10
+    if descriptor[9] & 0x80:
+        size = 3 << ((descriptor[9] & 0x07) + 1)
+        colorTable = data[i:i + size]
+        i += size
+    else:
+        # Keep the interlace flag and use the global color table.
+        descriptor[9] = (descriptor[9] & 0x40) | 0x80 | (flags & 0x07)
+    start = i
+    # The minimum code size of the LZW data and the sub-blocks.
+    i = _skipSubBlocks(data, i + 1)
+    control = b'!\xf9\x04\x04' + struct.pack('<H', delay) + b'\x00\x00'
+    return control + bytes(descriptor) + colorTable + data[start:i]
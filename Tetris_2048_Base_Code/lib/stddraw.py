@@ -5,21 +5,23 @@ The stddraw module defines functions that allow the user to create a
 drawing.  A drawing appears on the canvas.  The canvas appears
 in the window.  As a convenience, the module also imports the
 commonly used Color objects defined in the color module.
+
+Pygame is imported when the window is created, so importing this module
+does not pay for the GUI modules when nothing is drawn.
 """
 
 import time
 import os
 import sys
+import math
+import collections
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
-import pygame
-import pygame.gfxdraw
-import pygame.font
-
-import tkinter as Tkinter
-import tkinter.messagebox as tkMessageBox
-import tkinter.filedialog as tkFileDialog
-	
+
+# The pygame module, which is imported by _loadPygame() when the window
+# is created.
+pygame = None
+
 #-----------------------------------------------------------------------
 
 # Define colors so clients need not import the color module.
@@ -94,8 +96,43 @@ _fontSize = _DEFAULT_FONT_SIZE
 _canvasWidth = float(_DEFAULT_CANVAS_SIZE)
 _canvasHeight = float(_DEFAULT_CANVAS_SIZE)
 _penRadius = None
+
+# The size of the window canvas in pixels, and the number of the pixels
+# of the background canvas per pixel of the canvas size given to
+# setCanvasSize() (see the renderScale and windowScale arguments). The
+# pen radius, the font sizes and the picture sizes are multiplied by
+# _pixelScale, and the mouse positions by _windowToCanvas.
+_windowWidth = _canvasWidth
+_windowHeight = _canvasHeight
+_pixelScale = 1.0
+_windowToCanvas = 1.0
+_penRadiusArg = _DEFAULT_PEN_RADIUS
+
+# The fonts created so far, keyed by (family, size in pixels, bold).
+_fonts = {}
+# The rendered texts, keyed by (family, size in pixels, bold, string,
+# color), so that a text which does not change (e.g. a score between its
+# updates) is rendered only once. At most _MAX_CACHED_TEXTS texts are kept
+# (the oldest entries are dropped).
+_MAX_CACHED_TEXTS = 256
+_texts = {}
 _penColor = _DEFAULT_PEN_COLOR
-_keysTyped = []
+# The queues of the keys keep at most _MAX_QUEUED_KEYS entries (the oldest
+# entries are dropped) so that a queue which is never read cannot grow
+# without bound.
+_MAX_QUEUED_KEYS = 1024
+_keysTyped = collections.deque(maxlen=_MAX_QUEUED_KEYS)
+
+# The queue of (key, pressed, timestamp) tuples for the keys that have been
+# pressed (pressed is True) or released (pressed is False), and the set of
+# the keys that are currently held down. The timestamps are in the seconds
+# of time.perf_counter().
+_keyEvents = collections.deque(maxlen=_MAX_QUEUED_KEYS)
+_keysDown = set()
+
+# The functions called with the background canvas each time it is
+# copied to the window canvas (see addShowListener()).
+_showListeners = []
 
 # Has the window been created?
 _windowCreated = False
@@ -116,6 +153,25 @@ _mousePos = None
 # End added by Alan J. Broder
 #-----------------------------------------------------------------------
 
+# Has (a part of) the window been exposed since the last time we
+# checked?
+_windowExposed = False
+
+#-----------------------------------------------------------------------
+
+def _loadPygame():
+    """
+    Import pygame and the pygame modules used for drawing, and
+    initialize the font module. Calling this function again does
+    nothing.
+    """
+    global pygame
+    if pygame is None:
+        import pygame
+        import pygame.gfxdraw
+        import pygame.font
+        pygame.font.init()
+
 #-----------------------------------------------------------------------
 
 def _pygameColor(c):
@@ -130,19 +186,90 @@ def _pygameColor(c):
 
 #-----------------------------------------------------------------------
 
-# Private functions to scale and factor X and Y values.
+# Private functions to scale and factor X and Y values. The scales and
+# the offsets of the transform from the user coordinates to the pixels
+# are computed by _updateTransform() whenever the scales or the canvas
+# size change.
+
+_xScale = 1.0
+_xOffset = 0.0
+_yScale = -1.0
+_yOffset = 0.0
+_xFactor = 1.0
+_yFactor = 1.0
+
+def _updateTransform():
+    """
+    Compute the scales and the offsets of the transform from the user
+    coordinates to the pixels of the background canvas, and discard
+    the table of the pixel rectangles of the cells.
+    """
+    global _xScale, _xOffset, _yScale, _yOffset, _xFactor, _yFactor
+    global _cellRects
+    if None in (_xmin, _xmax, _ymin, _ymax):
+        return
+    _xScale = _canvasWidth / (_xmax - _xmin)
+    _xOffset = -_xmin * _xScale
+    _yScale = -_canvasHeight / (_ymax - _ymin)
+    _yOffset = _ymax * _canvasHeight / (_ymax - _ymin)
+    _xFactor = _canvasWidth / abs(_xmax - _xmin)
+    _yFactor = _canvasHeight / abs(_ymax - _ymin)
+    _cellRects = None
 
 def _scaleX(x):
-    return _canvasWidth * (x - _xmin) / (_xmax - _xmin)
+    return x * _xScale + _xOffset
 
 def _scaleY(y):
-    return _canvasHeight * (_ymax - y) / (_ymax - _ymin)
+    return y * _yScale + _yOffset
 
 def _factorX(w):
-    return w * _canvasWidth / abs(_xmax - _xmin)
+    return w * _xFactor
 
 def _factorY(h):
-    return h * _canvasHeight / abs(_ymax - _ymin)
+    return h * _yFactor
+
+#-----------------------------------------------------------------------
+
+# The table of the pixel rectangles (pygame.Rect objects) of the unit
+# cells centered at the integer coordinates (col, row) inside the user
+# coordinate system, indexed by [row - _cellRow0][col - _cellCol0]. The
+# table is built when a cell is first drawn after the transform changes.
+
+_cellRects = None
+_cellCol0 = 0
+_cellRow0 = 0
+
+def _buildCellRects():
+    """
+    Build the table of the pixel rectangles of the unit cells.
+    """
+    global _cellRects, _cellCol0, _cellRow0
+    _cellCol0 = int(math.ceil(_xmin))
+    _cellRow0 = int(math.ceil(_ymin))
+    cols = range(_cellCol0, int(math.floor(_xmax)) + 1)
+    rows = range(_cellRow0, int(math.floor(_ymax)) + 1)
+    ws = _factorX(1.0)
+    hs = _factorY(1.0)
+    _cellRects = [[pygame.Rect(_scaleX(col - 0.5), _scaleY(row - 0.5) - hs,
+        ws, hs) for col in cols] for row in rows]
+
+def _cellRect(col, row):
+    """
+    Return the pixel rectangle of the unit cell centered at (col, row),
+    or None if it is not in the table of the cells (or if col and row
+    are not integers).
+    """
+    if _cellRects is None:
+        _buildCellRects()
+    r = row - _cellRow0
+    c = col - _cellCol0
+    if (r < 0) or (c < 0) or (r >= len(_cellRects)) or \
+        (c >= len(_cellRects[0])):
+        return None
+    try:
+        return _cellRects[r][c]
+    except TypeError:
+        return None
 
 #-----------------------------------------------------------------------
 # Begin added by Alan J. Broder
@@ -160,17 +287,34 @@ def _userY(y):
     
 #-----------------------------------------------------------------------
 
-def setCanvasSize(w=_DEFAULT_CANVAS_SIZE, h=_DEFAULT_CANVAS_SIZE):
+def setCanvasSize(w=_DEFAULT_CANVAS_SIZE, h=_DEFAULT_CANVAS_SIZE,
+    direct=False, vsync=False, renderScale=1.0, windowScale=1.0):
     """
     Set the size of the canvas to w pixels wide and h pixels high.
     Calling this function is optional. If you call it, you must do
     so before calling any drawing function.
+    If direct is True, then the drawing functions draw directly on the
+    window canvas, so showing the drawing does not copy the background
+    canvas. (Then the window canvas may show a partial drawing when
+    the window is repainted, so direct suits the programs that redraw
+    the whole canvas for each frame.) If vsync is True, then showing
+    the drawing is synchronized with the refresh of the display when
+    the display supports it.
+    The window is windowScale times as large as the canvas (e.g. 2.0
+    for high-DPI displays), and the drawing is rendered at renderScale
+    times the resolution of the window and then scaled once to the
+    window when it is shown (e.g. 0.5 for slow computers). The drawing
+    looks the same (except for its resolution) at any scale.
     """
     global _background
     global _surface
     global _canvasWidth
     global _canvasHeight
     global _windowCreated
+    global _windowWidth
+    global _windowHeight
+    global _pixelScale
+    global _windowToCanvas
 
     if _windowCreated:
         raise Exception('The stddraw window already was created')
@@ -178,14 +322,56 @@ def setCanvasSize(w=_DEFAULT_CANVAS_SIZE, h=_DEFAULT_CANVAS_SIZE):
     if (w < 1) or (h < 1):
         raise Exception('width and height must be positive')
 
-    _canvasWidth = w
-    _canvasHeight = h
-    _background = pygame.display.set_mode([w, h])
+    if (renderScale <= 0.0) or (windowScale <= 0.0):
+        raise Exception('scales must be positive')
+
+    _loadPygame()
+    _windowWidth = max(1, int(round(w * windowScale)))
+    _windowHeight = max(1, int(round(h * windowScale)))
+    _canvasWidth = max(1, int(round(_windowWidth * renderScale)))
+    _canvasHeight = max(1, int(round(_windowHeight * renderScale)))
+    _pixelScale = float(_canvasWidth) / w
+    _windowToCanvas = float(_canvasWidth) / _windowWidth
+    _updateTransform()
+    _background = _setMode(_windowWidth, _windowHeight, direct, vsync)
     pygame.display.set_caption('stddraw window (r-click to save)')
-    _surface = pygame.Surface((w, h))
+    # Drawing directly on the window canvas is possible only when the
+    # canvases have the same size.
+    if direct and (_canvasWidth, _canvasHeight) == (_windowWidth,
+        _windowHeight):
+        _surface = _background
+    else:
+        _surface = pygame.Surface((_canvasWidth, _canvasHeight))
     _surface.fill(_pygameColor(WHITE))
+    _fonts.clear()
+    _texts.clear()
+    setPenRadius(_penRadiusArg)
     _windowCreated = True
 
+def _setMode(w, h, direct, vsync):
+    """
+    Create the window with a canvas w pixels wide and h pixels high,
+    requesting double buffering if direct is True and synchronization
+    with the refresh of the display if vsync is True. If the display
+    does not support these, then create a plain window. Return the
+    window canvas.
+    """
+    flags = 0
+    if direct:
+        flags |= pygame.DOUBLEBUF
+    if vsync:
+        # pygame supports vsync only for the windows with a renderer,
+        # which the SCALED flag requests.
+        try:
+            return pygame.display.set_mode([w, h], flags | pygame.SCALED,
+                vsync=1)
+        except (pygame.error, TypeError):
+            pass
+    try:
+        return pygame.display.set_mode([w, h], flags)
+    except pygame.error:
+        return pygame.display.set_mode([w, h])
+
 def setXscale(min=_DEFAULT_XMIN, max=_DEFAULT_XMAX):
     """
     Set the x-scale of the canvas such that the minimum x value
@@ -200,6 +386,7 @@ def setXscale(min=_DEFAULT_XMIN, max=_DEFAULT_XMAX):
     size = max - min
     _xmin = min - _BORDER * size
     _xmax = max + _BORDER * size
+    _updateTransform()
 
 def setYscale(min=_DEFAULT_YMIN, max=_DEFAULT_YMAX):
     """
@@ -215,6 +402,7 @@ def setYscale(min=_DEFAULT_YMIN, max=_DEFAULT_YMAX):
     size = max - min
     _ymin = min - _BORDER * size
     _ymax = max + _BORDER * size
+    _updateTransform()
 
 def setPenRadius(r=_DEFAULT_PEN_RADIUS):
     """
@@ -224,10 +412,12 @@ def setPenRadius(r=_DEFAULT_PEN_RADIUS):
     width.
     """
     global _penRadius
+    global _penRadiusArg
     r = float(r)
     if r < 0.0:
         raise Exception('Argument to setPenRadius() must be non-neg')
-    _penRadius = r * float(_DEFAULT_CANVAS_SIZE)
+    _penRadiusArg = r
+    _penRadius = r * float(_DEFAULT_CANVAS_SIZE) * _pixelScale
 
 def setPenColor(c=_DEFAULT_PEN_COLOR):
     """
@@ -436,6 +626,35 @@ def filledSquare(x, y, r):
     _makeSureWindowCreated()
     filledRectangle(x-r, y-r, 2.0*r, 2.0*r)
 
+def filledCell(col, row):
+    """
+    Draw on the background canvas a filled square whose sides are of
+    length 1, centered on the integer coordinates (col, row). This is
+    the same as filledSquare(col, row, 0.5), but the pixel rectangle
+    of the cell is looked up in a precomputed table.
+    """
+    _makeSureWindowCreated()
+    rect = _cellRect(col, row)
+    if rect is None:
+        filledSquare(col, row, 0.5)
+    else:
+        _surface.fill(_pygameColor(_penColor), rect)
+
+def cell(col, row):
+    """
+    Draw on the background canvas a square whose sides are of length
+    1, centered on the integer coordinates (col, row). This is the same
+    as square(col, row, 0.5), but the pixel rectangle of the cell is
+    looked up in a precomputed table.
+    """
+    _makeSureWindowCreated()
+    rect = _cellRect(col, row)
+    if rect is None:
+        square(col, row, 0.5)
+    else:
+        pygame.draw.rect(_surface, _pygameColor(_penColor), rect,
+            int(round(_penRadius)))
+
 def polygon(x, y):
     """
     Draw on the background canvas a polygon with coordinates
@@ -480,6 +699,37 @@ def filledPolygon(x, y):
     points.append((xScaled[0], yScaled[0]))
     pygame.draw.polygon(_surface, _pygameColor(_penColor), points, 0)
 
+def _font(bold):
+    """
+    Return the font of the current font family and font size (scaled
+    to the background canvas), bold if bold is True. The fonts are
+    created once and reused.
+    """
+    size = int(round(_fontSize * _pixelScale))
+    key = (_fontFamily, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.SysFont(_fontFamily, size, bold)
+        _fonts[key] = font
+    return font
+
+def _text(s, bold):
+    """
+    Return the surface of string s rendered with the current font and
+    pen color, bold if bold is True. The rendered texts are cached.
+    """
+    size = int(round(_fontSize * _pixelScale))
+    c = _penColor
+    key = (_fontFamily, size, bold, s, c.getRed(), c.getGreen(),
+        c.getBlue())
+    text = _texts.get(key)
+    if text is None:
+        text = _font(bold).render(s, 1, _pygameColor(c))
+        if len(_texts) >= _MAX_CACHED_TEXTS:
+            del _texts[next(iter(_texts))]
+        _texts[key] = text
+    return text
+
 def text(x, y, s):
     """
     Draw string s on the background canvas centered at (x, y).
@@ -489,8 +739,7 @@ def text(x, y, s):
     y = float(y)
     xs = _scaleX(x)
     ys = _scaleY(y)
-    font = pygame.font.SysFont(_fontFamily, _fontSize)
-    text = font.render(s, 1, _pygameColor(_penColor))
+    text = _text(s, False)
     textpos = text.get_rect(center=(xs, ys))
     _surface.blit(text, textpos)
 
@@ -503,16 +752,18 @@ def boldText(x, y, s):
     y = float(y)
     xs = _scaleX(x)
     ys = _scaleY(y)
-    font = pygame.font.SysFont(_fontFamily, _fontSize, True)
-    text = font.render(s, 1, _pygameColor(_penColor))
+    text = _text(s, True)
     textpos = text.get_rect(center=(xs, ys))
     _surface.blit(text, textpos)
 
-def picture(pic, x=None, y=None):
+def picture(pic, x=None, y=None, w=None, h=None):
     """
     Draw pic on the background canvas centered at (x, y).  pic is an
     object of class picture.Picture. x and y default to the midpoint
-    of the background canvas.
+    of the background canvas. If w and h are given, then pic is scaled
+    to the width w and the height h (the scaled copies of pic are
+    cached, so drawing pic again with the same size does not scale it
+    again).
     """
     global _surface
     _makeSureWindowCreated()
@@ -525,11 +776,120 @@ def picture(pic, x=None, y=None):
     y = float(y)
     xs = _scaleX(x)
     ys = _scaleY(y)
-    ws = pic.width()
-    hs = pic.height()
-    picSurface = pic._surface # violates encapsulation
+    if ((w is None) or (h is None)) and (_pixelScale == 1.0):
+        ws = pic.width()
+        hs = pic.height()
+        picSurface = pic._displaySurface() # violates encapsulation
+    elif (w is None) or (h is None):
+        ws = pic.width() * _pixelScale
+        hs = pic.height() * _pixelScale
+        picSurface = pic._scaledSurface(ws, hs) # violates encapsulation
+    else:
+        ws = _factorX(float(w))
+        hs = _factorY(float(h))
+        picSurface = pic._scaledSurface(ws, hs) # violates encapsulation
     _surface.blit(picSurface, [xs-ws/2.0, ys-hs/2.0, ws, hs])
 
+#-----------------------------------------------------------------------
+
+# The states saved by beginSprite() and editSprite() and restored by
+# endSprite(): the canvas, the offsets of the transform and the table of
+# the cells (a sprite can be drawn while another one is being drawn, so
+# the states are kept in a stack).
+_spriteStates = []
+
+def beginSprite(x, y, w, h, transparent=True):
+    """
+    Begin drawing a sprite, an image that is drawn once and then drawn
+    many times by the sprite() function. The subsequent drawing (until
+    endSprite() is called) goes to a canvas covering the rectangle with
+    the lower left corner at (x, y), the width w and the height h,
+    instead of the background canvas. If transparent is True, then the
+    canvas of the sprite starts transparent. Otherwise the sprite is
+    opaque (which is much faster to draw) and its canvas starts as a
+    copy of the background canvas under the rectangle.
+    """
+    global _surface, _xOffset, _yOffset, _cellRects
+    _makeSureWindowCreated()
+    left = int(math.floor(_scaleX(x)))
+    top = int(math.floor(_scaleY(y + h)))
+    right = int(math.ceil(_scaleX(x + w)))
+    bottom = int(math.ceil(_scaleY(y)))
+    size = (max(1, right - left), max(1, bottom - top))
+    if transparent:
+        spriteSurface = pygame.Surface(size, pygame.SRCALPHA)
+    else:
+        spriteSurface = pygame.Surface(size, 0, _surface)
+        spriteSurface.blit(_surface, (0, 0), pygame.Rect((left, top), size))
+    _spriteStates.append((_surface, _xOffset, _yOffset, _cellRects))
+    _surface = spriteSurface
+    _xOffset -= left
+    _yOffset -= top
+    _cellRects = None
+
+def editSprite(s, x, y):
+    """
+    Begin drawing on sprite s, which was returned by endSprite(), with
+    its lower left corner at (x, y) (as in sprite()). The subsequent
+    drawing (until endSprite() is called, which returns s) changes only
+    the pixels of s, e.g. to repaint the parts of a cached drawing that
+    have changed.
+    """
+    global _surface, _xOffset, _yOffset, _cellRects
+    _makeSureWindowCreated()
+    left = int(math.floor(_scaleX(x)))
+    top = int(math.ceil(_scaleY(y))) - s.get_height()
+    _spriteStates.append((_surface, _xOffset, _yOffset, _cellRects))
+    _surface = s
+    _xOffset -= left
+    _yOffset -= top
+    _cellRects = None
+
+def endSprite():
+    """
+    End drawing the sprite begun by beginSprite() (or editSprite())
+    and return it. The subsequent drawing goes to the canvas that was
+    drawn on before, the background canvas or another sprite.
+    """
+    global _surface, _xOffset, _yOffset, _cellRects
+    if not _spriteStates:
+        raise Exception('no sprite is being drawn')
+    s = _surface
+    _surface, _xOffset, _yOffset, _cellRects = _spriteStates.pop()
+    return s
+
+def sprite(s, x, y, clip=None):
+    """
+    Draw sprite s, which was returned by endSprite(), on the background
+    canvas with its lower left corner at (x, y). Drawing a sprite only
+    copies its pixels, so drawing the same sprite at (x, y) as the
+    rectangle given to beginSprite() looks the same as the drawing
+    done between beginSprite() and endSprite(). If clip is not None,
+    then it is a rectangle (x, y, w, h) in user coordinates and only
+    the part of s inside it is drawn.
+    """
+    _makeSureWindowCreated()
+    left = int(math.floor(_scaleX(x)))
+    top = int(math.ceil(_scaleY(y))) - s.get_height()
+    if clip is None:
+        _surface.blit(s, (left, top))
+        return
+    area = _pixelRect(clip).move(-left, -top).clip(s.get_rect())
+    _surface.blit(s, (left + area.x, top + area.y), area)
+
+def _pixelRect(r):
+    """
+    Return the pixels of the background canvas that cover the rectangle
+    r = (x, y, w, h) in user coordinates as a pygame.Rect.
+    """
+    x, y, w, h = r
+    left = int(math.floor(_scaleX(x)))
+    top = int(math.floor(_scaleY(y + h)))
+    return pygame.Rect(left, top, int(math.ceil(_scaleX(x + w))) - left,
+        int(math.ceil(_scaleY(y))) - top)
+
+#-----------------------------------------------------------------------
+
 def clear(c=WHITE):
     """
     Clear the background canvas to color c, where c is an
@@ -558,13 +918,45 @@ def save(f):
 
 #-----------------------------------------------------------------------
 
-def _show():
+def _show(areas=None):
+    """
+    Copy the background canvas (or the parts of it inside the given
+    areas) to the window canvas (unless the drawing functions draw
+    directly on the window canvas).
+    """
+    if _surface.get_size() != _background.get_size():
+        pygame.transform.scale(_surface, _background.get_size(),
+            _background)
+        pygame.display.flip()
+    elif areas is not None:
+        rects = [_pixelRect(area) for area in areas]
+        if _surface is not _background:
+            for rect in rects:
+                _background.blit(_surface, rect, rect)
+        pygame.display.update(rects)
+    else:
+        if _surface is not _background:
+            _background.blit(_surface, (0, 0))
+        pygame.display.flip()
+    for listener in _showListeners:
+        listener(_surface)
+    _checkForEvents()
+
+def addShowListener(f):
     """
-    Copy the background canvas to the window canvas.
+    Call f with the background canvas (a pygame.Surface) each time the
+    background canvas is copied to the window canvas. f must not keep
+    a reference to the surface or draw on it.
     """
-    _background.blit(_surface, (0, 0))
-    pygame.display.flip()
-    _checkForEvents()
+    _showListeners.append(f)
+
+def removeShowListener(f):
+    """
+    Stop calling f when the background canvas is copied to the window
+    canvas.
+    """
+    if f in _showListeners:
+        _showListeners.remove(f)
 
 def _showAndWaitForever():
     """
@@ -578,80 +970,134 @@ def _showAndWaitForever():
         time.sleep(QUANTUM)
         _checkForEvents()
 
-def show(msec=float('inf')):
+def show(msec=float('inf'), areas=None):
     """
     Copy the background canvas to the window canvas, and
     then wait for msec milliseconds. msec defaults to infinity.
+    show(0) does not wait, so that the caller can pace the frames
+    (e.g. by using a framelimiter.FrameLimiter). If areas is not None,
+    then it is a list of rectangles (x, y, w, h) in user coordinates
+    and only the parts of the background canvas inside them (e.g. the
+    parts drawn since the last frame) are copied to the window canvas.
     """
     if msec == float('inf'):
         _showAndWaitForever()
 
     _makeSureWindowCreated()
-    _show()
-    _checkForEvents()
+    _show(areas)
 
-    # Sleep for the required time, but check for events every
-    # QUANTUM seconds.
+    # Sleep until the deadline computed from the monotonic clock, but
+    # check for events every QUANTUM seconds.
     QUANTUM = .01
-    sec = msec / 1000.0
-    if sec < QUANTUM:
-        time.sleep(sec)
-        return
-    secondsWaited = 0.0
-    while secondsWaited < sec:
-        time.sleep(QUANTUM)
-        secondsWaited += QUANTUM
+    deadline = time.perf_counter() + msec / 1000.0
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0.0:
+            break
+        time.sleep(min(QUANTUM, remaining))
         _checkForEvents()
 
 #-----------------------------------------------------------------------
 
 def _saveToFile():
     """
-    Display a dialog box that asks the user for a file name.  Save the
-    drawing to the specified file.  Display a confirmation dialog box
-    if successful, and an error dialog box otherwise.  The dialog boxes
-    are displayed using Tkinter, which (on some computers) is
-    incompatible with Pygame. So the dialog boxes must be displayed
-    from child processes.
+    Save the drawing to an automatically named file in the capture
+    directory (see capture()). The file is written by a background
+    thread, so the drawing is not paused while the image is encoded.
     """
-    import subprocess
-    _makeSureWindowCreated()
+    fileName = capture()
+    if fileName is None:
+        sys.stderr.write('stddraw: too many pending saves, skipped\n')
 
-    stddrawPath = os.path.realpath(__file__)
+#-----------------------------------------------------------------------
 
-    childProcess = subprocess.Popen(
-        [sys.executable, stddrawPath, 'getFileName'],
-        stdout=subprocess.PIPE)
-    so, se = childProcess.communicate()
-    fileName = so.strip()
+# Functions for saving the drawing without blocking the caller. The
+# canvas is copied and the copies are saved by a background thread that
+# reads them from a bounded queue.
 
-    if sys.hexversion >= 0x03000000:
-        fileName = fileName.decode('utf-8')
+_CAPTURE_QUEUE_SIZE = 4
+_captureQueue = None
+_captureThread = None
+_captureDir = '.'
+_captureCount = 0
 
-    if fileName == '':
-        return
-
-    if not fileName.endswith(('.jpg', '.png')):
-        childProcess = subprocess.Popen(
-            [sys.executable, stddrawPath, 'reportFileSaveError',
-            'File name must end with ".jpg" or ".png".'])
-        return
+def setCaptureDirectory(d='.'):
+    """
+    Set the directory of the files named automatically by capture()
+    to d.
+    """
+    global _captureDir
+    _captureDir = d
 
+def _captureWorker():
+    """
+    Save the canvas copies read from the capture queue until the
+    process exits.
+    """
+    while True:
+        surfaceCopy, f = _captureQueue.get()
+        try:
+            pygame.image.save(surfaceCopy, f)
+        except (pygame.error, OSError) as e:
+            sys.stderr.write('stddraw: cannot save ' + f + ': ' +
+                str(e) + '\n')
+        finally:
+            _captureQueue.task_done()
+
+def capture(f=None):
+    """
+    Copy the canvas and save the copy to file f (a .png or a .jpg
+    file) in a background thread. If f is None, then save the copy to
+    an automatically named .png file in the capture directory. Return
+    the name of the file, or None if too many saves are pending (the
+    copy is dropped instead of waiting for them).
+    """
+    import queue
+    import threading
+    global _captureQueue
+    global _captureThread
+    global _captureCount
+    _makeSureWindowCreated()
+    if _captureThread is None:
+        _captureQueue = queue.Queue(_CAPTURE_QUEUE_SIZE)
+        _captureThread = threading.Thread(target=_captureWorker,
+            name='stddraw-capture', daemon=True)
+        _captureThread.start()
+    if f is None:
+        _captureCount += 1
+        f = os.path.join(_captureDir, 'stddraw-%s-%03d.png' % (
+            time.strftime('%Y%m%d-%H%M%S'), _captureCount))
     try:
-        save(fileName)
-        childProcess = subprocess.Popen(
-            [sys.executable, stddrawPath, 'confirmFileSave'])
-    except (pygame.error) as e:
-        childProcess = subprocess.Popen(
-            [sys.executable, stddrawPath, 'reportFileSaveError', str(e)])
+        _captureQueue.put_nowait((_surface.copy(), f))
+    except queue.Full:
+        return None
+    return f
+
+def waitForCaptures():
+    """
+    Wait until all the pending captures are saved.
+    """
+    if _captureQueue is not None:
+        _captureQueue.join()
+
+#-----------------------------------------------------------------------
 
 def _checkForEvents():
     """
     Check if any new event has occured (such as a key typed or button
     pressed).  If a key has been typed, then put that key in a queue.
     """
+    _makeSureWindowCreated()
+
+    for event in pygame.event.get():
+        _handleEvent(event)
+
+def _handleEvent(event):
+    """
+    Handle event, an event read from the pygame event queue.
+    """
     global _surface
-    global _keysTyped
+    global _windowExposed
     
     #-------------------------------------------------------------------
     # Begin added by Alan J. Broder
@@ -661,30 +1107,69 @@ def _checkForEvents():
     #-------------------------------------------------------------------
     # End added by Alan J. Broder
     #-------------------------------------------------------------------
-    
+
+    if event.type == pygame.QUIT:
+        sys.exit()
+    elif event.type == pygame.KEYDOWN:
+        key = pygame.key.name(event.key)
+        _keysTyped.append(key)
+        _keysDown.add(key)
+        _keyEvents.append((key, True, time.perf_counter()))
+    elif event.type == pygame.KEYUP:
+        key = pygame.key.name(event.key)
+        _keysDown.discard(key)
+        _keyEvents.append((key, False, time.perf_counter()))
+    elif (event.type == pygame.MOUSEBUTTONUP) and \
+        (event.button == 3):
+        _saveToFile()
+        
+    #---------------------------------------------------------------
+    # Begin added by Alan J. Broder
+    #---------------------------------------------------------------
+    # Every time the mouse button is pressed, remember
+    # the mouse position as of that press.
+    elif (event.type == pygame.MOUSEBUTTONDOWN) and \
+        (event.button == 1): 
+        _mousePressed = True
+        _mousePos = (event.pos[0] * _windowToCanvas,
+            event.pos[1] * _windowToCanvas)
+    #---------------------------------------------------------------
+    # End added by Alan J. Broder
+    #---------------------------------------------------------------
+    elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+        _windowExposed = True
+
+def waitForEvent(msec=None):
+    """
+    Wait until an event occurs (such as a key typed or button pressed)
+    or until msec milliseconds have passed (msec defaults to waiting
+    without a time limit). The process sleeps while waiting, so it does
+    not use the CPU. Then check for the other events that have occured.
+    Return True if an event has occured, and False if the wait timed
+    out.
+    """
     _makeSureWindowCreated()
+    if msec is None:
+        event = pygame.event.wait()
+    else:
+        event = pygame.event.wait(int(msec))
+    if event.type == pygame.NOEVENT:
+        return False
+    _handleEvent(event)
+    _checkForEvents()
+    return True
 
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            sys.exit()
-        elif event.type == pygame.KEYDOWN:
-            _keysTyped = [pygame.key.name(event.key)] + _keysTyped
-        elif (event.type == pygame.MOUSEBUTTONUP) and \
-            (event.button == 3):
-            _saveToFile()
-            
-        #---------------------------------------------------------------
-        # Begin added by Alan J. Broder
-        #---------------------------------------------------------------
-        # Every time the mouse button is pressed, remember
-        # the mouse position as of that press.
-        elif (event.type == pygame.MOUSEBUTTONDOWN) and \
-            (event.button == 1): 
-            _mousePressed = True
-            _mousePos = event.pos                      
-        #---------------------------------------------------------------
-        # End added by Alan J. Broder
-        #---------------------------------------------------------------
+def windowExposed():
+    """
+    Return True if (a part of) the window has been exposed, so that it
+    needs to be shown again, since the last time windowExposed was
+    called, and False otherwise.
+    """
+    global _windowExposed
+    if _windowExposed:
+        _windowExposed = False
+        return True
+    return False
 
 #-----------------------------------------------------------------------
 
@@ -695,23 +1180,50 @@ def hasNextKeyTyped():
     Return True if the queue of the keys the user typed is not empty.
     Otherwise return False.
     """
-    global _keysTyped
-    return _keysTyped != []
+    return len(_keysTyped) != 0
 
 def nextKeyTyped():
     """
     Remove the first key from the queue of the keys that the user typed,
     and return that key.
     """
-    global _keysTyped
-    return _keysTyped.pop()
+    return _keysTyped.popleft()
 
 def clearKeysTyped():
     """
     Clear all the keys in the queue of the keys that the user typed.
     """
-    global _keysTyped
-    _keysTyped = []
+    _keysTyped.clear()
+
+def hasNextKeyEvent():
+    """
+    Return True if the queue of the key press and key release events
+    is not empty. Otherwise return False.
+    """
+    return len(_keyEvents) != 0
+
+def nextKeyEvent():
+    """
+    Remove the first event from the queue of the key press and key
+    release events, and return it as a (key, pressed, timestamp) tuple.
+    pressed is True for a key press and False for a key release, and
+    timestamp is the time.perf_counter() value when the event was read.
+    """
+    return _keyEvents.popleft()
+
+def isKeyPressed(key):
+    """
+    Return True if the key with the given name is currently held down.
+    Otherwise return False.
+    """
+    return key in _keysDown
+
+def pollEvents():
+    """
+    Check for the events (such as the keys typed or the buttons pressed)
+    without copying the background canvas to the window canvas.
+    """
+    _checkForEvents()
 
 #-----------------------------------------------------------------------
 # Begin added by Alan J. Broder
@@ -767,42 +1279,6 @@ def mouseY():
 setXscale()
 setYscale()
 setPenRadius()
-pygame.font.init()
-
-#-----------------------------------------------------------------------
-
-# Functions for displaying Tkinter dialog boxes in child processes.
-
-def _getFileName():
-    """
-    Display a dialog box that asks the user for a file name.
-    """
-    root = Tkinter.Tk()
-    root.withdraw()
-    reply = tkFileDialog.asksaveasfilename(initialdir='.')
-    sys.stdout.write(reply)
-    sys.stdout.flush()
-    sys.exit()
-
-def _confirmFileSave():
-    """
-    Display a dialog box that confirms a file save operation.
-    """
-    root = Tkinter.Tk()
-    root.withdraw()
-    tkMessageBox.showinfo(title='File Save Confirmation',
-        message='The drawing was saved to the file.')
-    sys.exit()
-
-def _reportFileSaveError(msg):
-    """
-    Display a dialog box that reports a msg.  msg is a string which
-    describes an error in a file save operation.
-    """
-    root = Tkinter.Tk()
-    root.withdraw()
-    tkMessageBox.showerror(title='File Save Error', message=msg)
-    sys.exit()
 
 #-----------------------------------------------------------------------
 
@@ -925,18 +1401,9 @@ def _regressionTest():
 
 def _main():
     """
-    Dispatch to a function that does regression testing, or to a
-    dialog-box-handling function.
-    """
-    import sys
-    if len(sys.argv) == 1:
-        _regressionTest()
-    elif sys.argv[1] == 'getFileName':
-        _getFileName()
-    elif sys.argv[1] == 'confirmFileSave':
-        _confirmFileSave()
-    elif sys.argv[1] == 'reportFileSaveError':
-        _reportFileSaveError(sys.argv[2])
+    Perform regression testing.
+    """
+    _regressionTest()
 
 if __name__ == '__main__':
     _main()
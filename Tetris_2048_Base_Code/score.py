@@ -0,0 +1,39 @@
+# the points for clearing 1, 2, 3 and 4 (or more) lines at once, multiplied by
+# the level on which the lines are cleared
+LINE_POINTS = (0, 100, 300, 500, 800)
+# the number of the lines cleared for advancing to the next level
+LINES_PER_LEVEL = 10
+# the time in seconds between the gravity steps on each level (the last value
+# is used for all the higher levels)
+FALL_INTERVALS = (0.3, 0.27, 0.24, 0.21, 0.18, 0.15, 0.12, 0.1, 0.08, 0.065,
+                  0.05)
+
+# A class for modeling the score of a game, the points are added as the lines
+# are cleared (the score is never recomputed from the game grid)
+class Score:
+   # A constructor for creating a score with 0 points on the first level
+   def __init__(self):
+      self.points = 0
+      self.lines = 0
+      self.level = 1
+      self.fall_interval = FALL_INTERVALS[0]
+      self.update_texts()
+
+   # A method for adding the points of the given number of lines cleared at
+   # once and advancing the level when enough lines are cleared
+   def add_lines(self, n_lines):
+      if n_lines == 0:
+         return
+      points = LINE_POINTS[min(n_lines, len(LINE_POINTS) - 1)]
+      self.points += points * self.level
+      self.lines += n_lines
+      self.level = self.lines // LINES_PER_LEVEL + 1
+      self.fall_interval = FALL_INTERVALS[min(self.level,
+                                              len(FALL_INTERVALS)) - 1]
+      self.update_texts()
+
+   # A method for updating the texts displayed for the score (the texts are
+   # created only when the score changes, not for each frame)
+   def update_texts(self):
+      self.points_text = str(self.points)
+      self.level_text = "Level " + str(self.level)
@@ -0,0 +1,224 @@
+################################################################################
+#                                                                              #
+# An asyncio server hosting many independent games in one process. Clients    #
+# send JSON objects (one per line) over a local socket:                        #
+#    {"op": "new", "seed": 1}                  -> creates a session            #
+#    {"op": "action", "id": 0, "action": "left"}  (one of tetromino.ACTIONS)   #
+#    {"op": "close", "id": 0}                                                  #
+# and the server pushes back a keyframe for a new session and then the deltas #
+# of the game grid after each action and each gravity step (with a keyframe   #
+# in every GameGrid.keyframe_interval ticks, see grid_replica.GridReplica).   #
+# The gravity steps of a client that does not read its messages fast enough  #
+# are not sent, and the next message of its session is a keyframe instead.   #
+#                                                                              #
+################################################################################
+
+import asyncio  # used for serving all the sessions from a single thread
+import heapq  # used for scheduling the gravity steps of the sessions
+import json  # used for encoding and decoding the messages
+import argparse  # used for parsing the command line arguments
+from game import Game  # the class for playing the game without the UI
+from tetromino import ACTIONS  # the actions applied on the tetrominoes
+
+# A class for modeling a game hosted by the server for a client
+class GameSession:
+   # A constructor for creating a session with the given id for the given
+   # client (any object with a send method taking a message dictionary and a
+   # congested method, see StreamClient)
+   def __init__(self, session_id, client, grid_h=20, grid_w=12, seed=None,
+                fall_interval=0.3):
+      self.id = session_id
+      self.client = client
+      self.game = Game(grid_h, grid_w, seed)
+      self.game.grid.record_deltas = True
+      self.fall_interval = fall_interval
+      self.closed = False
+      # a message of this session has been dropped (see GameServer.run_gravity)
+      # and the next message must be a keyframe
+      self.resync = False
+
+   # A method that returns a keyframe message with the full state
+   def keyframe(self):
+      message = self.game.grid.take_keyframe()
+      message["id"] = self.id
+      return message
+
+   # A method that returns a delta message with the changes since the last
+   # message (or a keyframe in every keyframe interval, and after a message
+   # has been dropped)
+   def delta(self, lines_cleared):
+      if self.resync:
+         self.resync = False
+         message = self.keyframe()
+      else:
+         message = self.game.grid.take_delta()
+         message["id"] = self.id
+      message["lines_cleared"] = lines_cleared
+      return message
+
+   # A method for applying the given action (without gravity)
+   def apply(self, action):
+      self.game.current_tetromino.apply(action, self.game.grid)
+      return self.delta(0)
+
+   # A method for moving the current tetromino down by 1 (gravity)
+   def fall(self):
+      lines_cleared, _ = self.game.step("noop")
+      return self.delta(lines_cleared)
+
+# A class for modeling the server hosting the sessions, the gravity steps of
+# all the sessions are run by a single task using a heap of deadlines
+class GameServer:
+   # A constructor for creating a server with the given session settings
+   def __init__(self, grid_h=20, grid_w=12, fall_interval=0.3):
+      self.grid_h, self.grid_w = grid_h, grid_w
+      self.fall_interval = fall_interval
+      self.sessions = {}
+      self.next_id = 0
+      # the heap of (deadline, session id) for the gravity steps
+      self.deadlines = []
+      self.wakeup = asyncio.Event()
+
+   # A method for handling a message from the given client, returns the list
+   # of the reply messages
+   def handle_message(self, client, message):
+      if not isinstance(message, dict):
+         return [{"type": "error", "error": "invalid message"}]
+      op = message.get("op")
+      if op == "new":
+         seed = message.get("seed")
+         # (bool is a subclass of int, but it is not a valid seed)
+         if seed is not None and (not isinstance(seed, int)
+                                  or isinstance(seed, bool)):
+            return [{"type": "error", "error": "invalid seed"}]
+         return [self.new_session(client, seed)]
+      session_id = message.get("id")
+      if not isinstance(session_id, int):
+         return [{"type": "error", "error": "unknown session"}]
+      session = self.sessions.get(session_id)
+      if session is None or session.client is not client:
+         return [{"type": "error", "error": "unknown session"}]
+      if op == "action":
+         action = message.get("action")
+         if action not in ACTIONS:
+            return [{"type": "error", "error": "unknown action"}]
+         if session.game.game_over:
+            return []
+         return [session.apply(action)]
+      if op == "close":
+         self.close_session(session)
+         return [{"type": "closed", "id": session.id}]
+      return [{"type": "error", "error": "unknown op"}]
+
+   # A method for creating a session for the given client
+   def new_session(self, client, seed=None):
+      session = GameSession(self.next_id, client, self.grid_h, self.grid_w,
+                            seed, self.fall_interval)
+      self.next_id += 1
+      self.sessions[session.id] = session
+      loop = asyncio.get_running_loop()
+      heapq.heappush(self.deadlines, (loop.time() + session.fall_interval,
+                                      session.id))
+      self.wakeup.set()
+      return session.keyframe()
+
+   # A method for closing the given session
+   def close_session(self, session):
+      session.closed = True
+      self.sessions.pop(session.id, None)
+
+   # A method for closing all the sessions of the given client
+   def close_client(self, client):
+      for session in list(self.sessions.values()):
+         if session.client is client:
+            self.close_session(session)
+
+   # A coroutine that runs the gravity steps of all the sessions when they
+   # are due (the entries of the closed sessions are dropped lazily). The
+   # messages are not sent to the congested clients (so that the memory used
+   # for the clients that do not read their messages stays bounded), and the
+   # next message of the session is a keyframe instead.
+   async def run_gravity(self):
+      loop = asyncio.get_running_loop()
+      while True:
+         self.wakeup.clear()
+         now = loop.time()
+         while self.deadlines and self.deadlines[0][0] <= now:
+            deadline, session_id = heapq.heappop(self.deadlines)
+            session = self.sessions.get(session_id)
+            if session is None or session.game.game_over:
+               continue
+            message = session.fall()
+            if session.client.congested():
+               session.resync = True
+            else:
+               session.client.send(message)
+            heapq.heappush(self.deadlines,
+                           (deadline + session.fall_interval, session_id))
+         timeout = None
+         if self.deadlines:
+            timeout = self.deadlines[0][0] - loop.time()
+         try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+         except asyncio.TimeoutError:
+            pass
+
+   # A coroutine for serving a client connected with the given streams
+   async def handle_connection(self, reader, writer):
+      client = StreamClient(writer)
+      try:
+         while True:
+            line = await reader.readline()
+            if not line:
+               break
+            try:
+               message = json.loads(line)
+            except ValueError:
+               client.send({"type": "error", "error": "invalid message"})
+               continue
+            for reply in self.handle_message(client, message):
+               client.send(reply)
+            await writer.drain()
+      finally:
+         self.close_client(client)
+         writer.close()
+
+   # A coroutine for serving the clients on the given local address
+   async def serve(self, host="127.0.0.1", port=8048):
+      gravity = asyncio.ensure_future(self.run_gravity())
+      server = await asyncio.start_server(self.handle_connection, host, port)
+      try:
+         async with server:
+            await server.serve_forever()
+      finally:
+         gravity.cancel()
+
+# A class for sending messages to a client connected over a stream
+class StreamClient:
+   # the number of the bytes waiting to be sent to the client above which
+   # the client is congested
+   max_buffered = 256 * 1024
+
+   def __init__(self, writer):
+      self.writer = writer
+
+   # A method that returns True when the messages sent to the client are not
+   # read fast enough (see max_buffered)
+   def congested(self):
+      buffered = self.writer.transport.get_write_buffer_size()
+      return buffered > StreamClient.max_buffered
+
+   # A method for sending the given message as a line of JSON
+   def send(self, message):
+      self.writer.write(json.dumps(message, separators=(",", ":")).encode()
+                        + b"\n")
+
+if __name__ == '__main__':
+   parser = argparse.ArgumentParser(description="Serve Tetris 2048 games")
+   parser.add_argument("--host", default="127.0.0.1")
+   parser.add_argument("--port", type=int, default=8048)
+   parser.add_argument("--grid-height", type=int, default=20)
+   parser.add_argument("--grid-width", type=int, default=12)
+   args = parser.parse_args()
+   game_server = GameServer(args.grid_height, args.grid_width)
+   asyncio.run(game_server.serve(args.host, args.port))
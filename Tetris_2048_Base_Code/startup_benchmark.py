@@ -0,0 +1,79 @@
+################################################################################
+#                                                                              #
+# A benchmark for the import time of the modules used without the user         #
+# interface (e.g. by short-lived batch workers). Each module is imported in a  #
+# new Python interpreter and the median of the measured times is compared to   #
+# the time budget of the module (for the modules that import numpy, the time  #
+# over the import time of numpy, measured alternately in the same run). The   #
+# GUI modules must not be imported by them.                                    #
+# (The exit status is 1 when any module is over its budget.)                   #
+#                                                                              #
+################################################################################
+
+import os  # the os module is used for file and directory operations
+import sys  # used for running the interpreter and for the exit status
+import subprocess  # used for importing the modules in new interpreters
+import statistics  # used for computing the median of the measured times
+import argparse  # used for parsing the command line arguments
+
+# the import time budgets of the modules in milliseconds as (baseline module,
+# budget) pairs, where the budget is for the time over the import time of the
+# baseline module when it is not None (the import time of numpy alone is about
+# 150-230 ms and varies a lot between the runs, so the baseline module and the
+# module are imported alternately and the median of the differences is used)
+BUDGETS_MS = {"lib.stddraw": (None, 30), "tile": (None, 30),
+              "game_grid": ("numpy", 50), "tetromino": ("numpy", 50),
+              "game": ("numpy", 50)}
+# the modules that must not be imported by the modules above
+GUI_MODULES = ("pygame", "tkinter")
+
+# the code run by the new interpreters to measure the import time of a module
+MEASURE_CODE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+gui = [m for m in {gui!r} if m in sys.modules]
+print(elapsed * 1000, ",".join(gui))
+"""
+
+# A function that imports the given module in a new interpreter and returns
+# the import time in milliseconds and the list of the GUI modules imported
+def measure(module):
+   code = MEASURE_CODE.format(module=module, gui=GUI_MODULES)
+   current_dir = os.path.dirname(os.path.realpath(__file__))
+   output = subprocess.check_output([sys.executable, "-c", code],
+                                    cwd=current_dir, text=True)
+   elapsed, gui = output.split(" ")
+   gui = gui.strip()
+   return float(elapsed), gui.split(",") if gui else []
+
+# A function that runs the benchmark for each module (repeats times) and
+# returns True when all the modules are within their budgets
+def run(repeats=5, scale=1.0):
+   all_passed = True
+   for module, (baseline, budget) in BUDGETS_MS.items():
+      budget *= scale
+      times, gui = [], []
+      for _ in range(repeats):
+         elapsed, gui = measure(module)
+         if baseline is not None:
+            elapsed -= measure(baseline)[0]
+         times.append(elapsed)
+      median = statistics.median(times)
+      passed = median <= budget and not gui
+      all_passed = all_passed and passed
+      status = "ok" if passed else "FAIL"
+      over = "" if baseline is None else " over " + baseline
+      print("%-12s %7.1f ms%s (budget %5.0f ms) %s %s" % (
+         module, median, over, budget, status,
+         "imports " + ", ".join(gui) if gui else ""))
+   return all_passed
+
+if __name__ == '__main__':
+   parser = argparse.ArgumentParser(description="Import time benchmark")
+   parser.add_argument("--repeats", type=int, default=5)
+   # the budgets are multiplied by scale on slower machines
+   parser.add_argument("--scale", type=float, default=1.0)
+   args = parser.parse_args()
+   sys.exit(0 if run(args.repeats, args.scale) else 1)
@@ -0,0 +1,19 @@
+# The game modules are imported by their names (e.g. from game import Game) as
+# in the scripts, so the directory of the game code is added to the module
+# search path, and pygame is used without a window (the dummy video driver)
+import os
+import sys
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+# A fixture that creates the stddraw window once for the tests that draw (the
+# size of the window can be set only once) with 28 x 12 cells of 16 pixels,
+# the cell (0, 0) is at the bottom left corner
+@pytest.fixture(scope="session")
+def canvas():
+   import lib.stddraw as stddraw
+   stddraw.setCanvasSize(28 * 16, 12 * 16)
+   stddraw.setXscale(-0.5, 27.5)
+   stddraw.setYscale(-0.5, 11.5)
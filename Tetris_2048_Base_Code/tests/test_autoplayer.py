@@ -0,0 +1,33 @@
+import time
+import numpy as np
+from autoplayer import MonteCarloPlanner, run_rollouts, play_placement
+from game import Game
+
+# the time that choose may take after the time budget of the move (for the
+# rollouts running at the deadline and for collecting the results)
+MARGIN = 0.15
+
+def test_rollouts_stop_at_the_deadline():
+   board = np.zeros((10, 6), dtype=np.uint16)
+   total, count = run_rollouts(board.tobytes(), board.shape, 'I', 0, 50, 3,
+                               np.ones(6), deadline=time.time())
+   assert (total, count) == (0.0, 0)
+   total, count = run_rollouts(board.tobytes(), board.shape, 'I', 0, 5, 3,
+                               np.ones(6))
+   assert count == 5
+
+def test_choose_returns_within_the_time_budget():
+   # (the batches are much longer than the time budget)
+   budget = 0.3
+   with MonteCarloPlanner(workers=2, rollouts=4000, depth=3,
+                          time_budget=budget, batch_size=1000,
+                          seed=0) as planner:
+      game = Game(20, 12, seed=0)
+      for _ in range(4):
+         start = time.perf_counter()
+         placement = planner.choose(game)
+         assert time.perf_counter() - start < budget + MARGIN
+         assert placement is not None
+         # no rollouts of the move keep the workers busy after it
+         assert planner.pool.submit(int).result(timeout=MARGIN) == 0
+         play_placement(game, *placement)
@@ -0,0 +1,75 @@
+import random
+import numpy as np
+from environment import TetrisEnv, VectorTetrisEnv
+from tetromino import ACTIONS
+
+HARD_DROP = ACTIONS.index("hard_drop")
+
+# A function that returns the observations and the rewards of the given
+# environment for the given actions after resetting it with the given seed
+def play(env, seed, actions):
+   observation, _ = env.reset(seed)
+   observations, rewards = [observation.copy()], []
+   for action in actions:
+      observation, reward, terminated, _, _ = env.step(action)
+      observations.append(observation.copy())
+      rewards.append(reward)
+      if terminated:
+         break
+   return observations, rewards
+
+def test_reset_with_a_seed_repeats_the_game():
+   rng = random.Random(0)
+   actions = [rng.randrange(TetrisEnv.n_actions) for _ in range(300)]
+   env = TetrisEnv(10, 6)
+   first = play(env, 3, actions)
+   # the same environment after another game and a new environment
+   play(env, 4, actions)
+   for observations, rewards in (play(env, 3, actions),
+                                 play(TetrisEnv(10, 6), 3, actions)):
+      assert rewards == first[1]
+      assert len(observations) == len(first[0])
+      for observation, expected in zip(observations, first[0]):
+         assert np.array_equal(observation, expected)
+
+def test_observations_are_written_into_the_same_array():
+   env = TetrisEnv(10, 6, seed=0)
+   observation, _ = env.reset()
+   assert observation is env.observation
+   assert observation.shape == env.observation_shape
+   for _ in range(20):
+      result = env.step(HARD_DROP)
+      assert result[0] is observation
+      if result[2]:
+         break
+      assert np.array_equal(observation[0], env.game.grid.get_number_matrix())
+      # the four tiles of the current tetromino (below the top of the grid)
+      assert 0 < np.count_nonzero(observation[1]) <= 4
+
+def test_vector_env_games_match_the_single_games():
+   vector_env = VectorTetrisEnv(3, 10, 6)
+   observations, _ = vector_env.reset(seed=5)
+   expected = [TetrisEnv(10, 6).reset(5 + i)[0].copy() for i in range(3)]
+   for i in range(3):
+      assert np.array_equal(observations[i], expected[i])
+
+def test_vector_env_resets_the_games_that_are_over():
+   vector_env = VectorTetrisEnv(2, 10, 6, seed=0)
+   observations, _ = vector_env.reset()
+   arrays = (observations, vector_env.rewards, vector_env.terminated)
+   # the first game is dropped down until it is over, the second one waits
+   actions = [HARD_DROP, 0]
+   for _ in range(200):
+      result = vector_env.step(actions)
+      assert all(a is b for a, b in zip(result, arrays))
+      if result[2][0]:
+         break
+   assert result[2][0] and not result[2][1]
+   game = vector_env.games[0]
+   assert result[4]["final_pieces"][0] > 0
+   # the observation is the first one of the new game
+   assert game.n_pieces == 0 and not game.game_over
+   assert not observations[0][0].any() and observations[0][1].any()
+   # the next step continues the new game
+   result = vector_env.step(actions)
+   assert not result[2][0] and game.n_pieces == 1
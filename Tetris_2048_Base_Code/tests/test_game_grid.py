@@ -0,0 +1,147 @@
+import random
+import tracemalloc
+import numpy as np
+import pygame.surfarray
+from game import Game
+from game_grid import GameGrid
+from tetromino import ACTIONS
+from tile import Tile
+import dataset
+
+# A function that locks the tiles with the given number on the given row of the
+# game grid except the given column (as update_grid does)
+def fill_row(grid, row, number, hole_col=None):
+   index = grid.rows[row]
+   for col in range(grid.grid_width):
+      if col != hole_col:
+         tile = Tile()
+         tile.number = number
+         grid.tile_matrix[index, col] = tile
+         grid.number_matrix[index, col] = number
+         grid.row_counts[index] += 1
+   grid.stack_height = max(grid.stack_height, row + 1)
+
+# A function that checks that the tiles, the numbers, the tile counts and the
+# stack height of the rows of the given game grid agree with each other
+def check_rows(grid):
+   assert sorted(grid.rows) == list(range(grid.grid_height))
+   assert grid.row_indexes.tolist() == grid.rows
+   for row, index in enumerate(grid.rows):
+      tiles = grid.tile_matrix[index]
+      numbers = [0 if tile is None else tile.number for tile in tiles]
+      assert list(grid.number_matrix[index]) == numbers
+      assert grid.row_counts[index] == np.count_nonzero(numbers)
+      if row >= grid.stack_height:
+         assert grid.row_counts[index] == 0
+
+def test_remove_row_moves_the_rows_above_down():
+   grid = GameGrid(5, 4)
+   for row, number in enumerate((2, 4, 8)):
+      fill_row(grid, row, number, hole_col=row)
+   grid.remove_row(1)
+   assert grid.stack_height == 2
+   assert grid.get_number_matrix().tolist() == [
+      [0, 2, 2, 2], [8, 8, 0, 8], [0] * 4, [0] * 4, [0] * 4]
+   check_rows(grid)
+
+def test_add_garbage_pushes_the_rows_up():
+   grid = GameGrid(5, 4)
+   fill_row(grid, 0, 4, hole_col=1)
+   assert not grid.add_garbage(2, hole_col=3)
+   assert grid.stack_height == 3
+   n = Tile.initial_number
+   assert grid.get_number_matrix().tolist() == [
+      [n, n, n, 0], [n, n, n, 0], [4, 0, 4, 4], [0] * 4, [0] * 4]
+   check_rows(grid)
+
+def test_add_garbage_ends_the_game_when_tiles_are_pushed_out():
+   grid = GameGrid(5, 4)
+   fill_row(grid, 3, 2, hole_col=0)
+   assert not grid.add_garbage(1, hole_col=0)
+   assert grid.add_garbage(1, hole_col=0)
+   check_rows(grid)
+
+def test_fill_number_matrix_writes_the_rows_in_order():
+   grid = GameGrid(6, 4)
+   for row in range(4):
+      fill_row(grid, row, 2 ** (row + 1), hole_col=row)
+   grid.remove_row(0)
+   grid.add_garbage(1, hole_col=2)
+   out = np.full((6, 4), 99, dtype=np.uint16)
+   assert grid.fill_number_matrix(out) is out
+   assert (out == grid.get_number_matrix()).all()
+   # a field of a dataset record is written in place
+   record = np.zeros(1, dtype=dataset.position_dtype(6, 4))[0]
+   grid.fill_number_matrix(record["board"])
+   assert (record["board"] == out).all()
+
+def test_rows_stay_consistent_in_random_games():
+   rng = random.Random(0)
+   game = Game(10, 6, seed=0)
+   n_lines = n_garbage = 0
+   for step in range(3000):
+      _, game_over = game.step(rng.choice(ACTIONS))
+      if not game_over and step % 30 == 0:
+         game.grid.add_garbage(rng.randint(1, 3), rng.randrange(6))
+         n_garbage += 1
+      check_rows(game.grid)
+      if game.game_over:
+         n_lines += game.lines_cleared
+         game.reset()
+   assert n_lines > 0 and n_garbage > 0
+
+def test_repainting_the_changed_rows_matches_repainting_all_rows(canvas):
+   rng = random.Random(2)
+   game = Game(10, 6, seed=2)
+   n_checks = 0
+   for step in range(1500):
+      _, game_over = game.step(rng.choice(ACTIONS))
+      if not game_over and step % 25 == 0:
+         game.grid.add_garbage(rng.randint(1, 2), rng.randrange(6))
+      grid = game.grid
+      grid.draw_grid()
+      if step % 10 == 0:
+         pixels = pygame.surfarray.array3d(grid.board_sprite)
+         grid.dirty_rows[:] = True
+         grid.repaint_rows()
+         assert (pygame.surfarray.array3d(grid.board_sprite) == pixels).all()
+         n_checks += 1
+      if game.game_over:
+         game.reset()
+   assert n_checks > 0
+
+def test_fill_number_matrix_does_not_allocate():
+   grid = GameGrid(20, 12)
+   fill_row(grid, 0, 4, hole_col=2)
+   grid.remove_row(0)
+   out = np.zeros((20, 12), dtype=np.uint16)
+   tracemalloc.start()
+   try:
+      # (the first calls under tracemalloc allocate the caches of numpy)
+      for _ in range(2):
+         grid.fill_number_matrix(out)
+      current = tracemalloc.get_traced_memory()[0]
+      tracemalloc.reset_peak()
+      grid.fill_number_matrix(out)
+      # (the memory of the call itself is less than the size of the matrix)
+      assert tracemalloc.get_traced_memory()[1] - current < out.nbytes
+   finally:
+      tracemalloc.stop()
+
+def test_reset_reuses_the_tiles_of_the_previous_game():
+   rng = random.Random(0)
+   game = Game(10, 6, seed=0)
+   while not game.game_over:
+      game.step(rng.choice(ACTIONS))
+   tiles = {id(tile) for tile in game.grid.tile_matrix.flat if tile is not None}
+   tiles |= {id(tile) for tile in game.next_tetromino.tile_matrix.flat
+             if tile is not None}
+   Tile.pool.clear()
+   game.reset()
+   # the tiles of the new tetrominoes are taken from the released ones
+   reused = {id(tile) for tile in Tile.pool}
+   for tetromino in (game.current_tetromino, game.next_tetromino):
+      reused |= {id(tile) for tile in tetromino.tile_matrix.flat
+                 if tile is not None}
+   assert reused == tiles
+   assert all(tile.number == 2 for tile in Tile.pool)
@@ -0,0 +1,63 @@
+import json
+import random
+from grid_replica import GridReplica
+from server import GameSession
+from tetromino import ACTIONS
+
+# A class for modeling a client of the server that keeps the messages sent
+class RecordingClient:
+   def __init__(self):
+      self.messages = []
+
+   def send(self, message):
+      self.messages.append(message)
+
+   def congested(self):
+      return False
+
+# A function that applies the given message to the given replica as a remote
+# viewer does (after sending it as JSON)
+def receive(replica, message):
+   return replica.apply(json.loads(json.dumps(message)))
+
+def test_replica_converges_with_the_server_grid():
+   rng = random.Random(1)
+   session = GameSession(0, RecordingClient(), grid_h=10, grid_w=6, seed=1)
+   replica = GridReplica(10, 6)
+   assert receive(replica, session.keyframe())
+   n_lines = n_deltas = 0
+   for step in range(2000):
+      # (the garbage rows are sent with the next message)
+      if step % 40 == 0 and not session.game.grid.game_over:
+         session.game.grid.add_garbage(rng.randint(1, 2), rng.randrange(6))
+      if step % 3 == 0:
+         message = session.fall()
+         n_lines += message["lines_cleared"]
+      else:
+         message = session.apply(rng.choice(ACTIONS))
+      n_deltas += message["type"] == "delta"
+      assert receive(replica, message)
+      grid = session.game.grid
+      assert (replica.number_matrix == grid.get_number_matrix()).all()
+      assert replica.piece == grid.get_piece_pose()
+      assert replica.game_over == grid.game_over
+      if grid.game_over:
+         session = GameSession(0, RecordingClient(), grid_h=10, grid_w=6,
+                               seed=step)
+         assert receive(replica, session.keyframe())
+   assert n_lines > 0 and n_deltas > 0
+
+def test_deltas_before_the_first_keyframe_are_ignored():
+   session = GameSession(0, RecordingClient(), grid_h=10, grid_w=6, seed=2)
+   session.keyframe()
+   replica = GridReplica(10, 6)
+   assert not receive(replica, session.fall())
+   assert replica.tick is None
+
+def test_resync_sends_a_keyframe():
+   session = GameSession(0, RecordingClient(), grid_h=10, grid_w=6, seed=3)
+   session.keyframe()
+   session.fall()
+   session.resync = True
+   assert session.fall()["type"] == "keyframe"
+   assert session.fall()["type"] == "delta"
@@ -0,0 +1,52 @@
+from input_handler import InputHandler
+
+DAS, ARR = 0.17, 0.05
+
+def test_all_queued_presses_are_applied_in_one_poll():
+   handler = InputHandler(DAS, ARR)
+   events = [("left", True, 0.0), ("left", False, 0.01), ("z", True, 0.02),
+             ("z", False, 0.03), ("space", True, 0.04), ("x", True, 0.05)]
+   assert handler.poll(0.06, events) == ["left", "rotate", "hard_drop"]
+   assert handler.poll(1.0, []) == []
+
+def test_held_key_repeats_after_das_then_every_arr():
+   handler = InputHandler(DAS, ARR)
+   assert handler.poll(0.0, [("right", True, 0.0)]) == ["right"]
+   # no repeat before the delayed auto shift
+   assert handler.poll(DAS - 0.01, []) == []
+   assert handler.poll(DAS, []) == ["right"]
+   assert handler.poll(DAS + ARR / 2, []) == []
+   # the repeats that are due since the last poll are applied together
+   assert handler.poll(DAS + 3 * ARR, []) == ["right"] * 3
+
+def test_repeats_per_poll_are_capped():
+   handler = InputHandler(DAS, arr=0)
+   handler.poll(0.0, [("down", True, 0.0)])
+   assert handler.poll(DAS, []) == ["down"] * InputHandler.max_repeats_per_poll
+
+def test_release_and_press_again_restarts_the_delay():
+   handler = InputHandler(DAS, ARR)
+   handler.poll(0.0, [("left", True, 0.0)])
+   assert handler.poll(DAS, []) == ["left"]
+   events = [("left", False, DAS + 0.01), ("left", True, DAS + 0.02)]
+   assert handler.poll(DAS + 0.02, events) == ["left"]
+   # the repeat is due a full DAS after the new press (not ARR after the last
+   # repeat)
+   assert handler.poll(DAS + ARR, []) == []
+   assert handler.poll(2 * DAS + 0.01, []) == []
+   assert handler.poll(2 * DAS + 0.02, []) == ["left"]
+
+def test_released_key_is_not_repeated():
+   handler = InputHandler(DAS, ARR)
+   handler.poll(0.0, [("down", True, 0.0)])
+   assert handler.poll(DAS + ARR, [("down", False, DAS)]) == []
+
+def test_other_horizontal_key_resumes_after_release():
+   handler = InputHandler(DAS, ARR)
+   handler.poll(0.0, [("left", True, 0.0), ("right", True, 0.01)])
+   # only the most recently pressed horizontal action is repeated
+   assert handler.poll(DAS + 0.01, []) == ["right"]
+   # the left key is still held, its repeats resume ARR after the release
+   # instead of catching up
+   assert handler.poll(1.0, [("right", False, 1.0)]) == []
+   assert handler.poll(1.0 + ARR, []) == ["left"]
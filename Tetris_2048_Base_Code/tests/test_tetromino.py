@@ -0,0 +1,112 @@
+from game_grid import GameGrid
+from tetromino import Tetromino, SHAPES, CELL_OFFSETS, SRS_STATES, ROTATION_KICKS
+from tile import Tile
+
+# the occupied cells as (column_index, row_index) in the bounding box of each
+# Super Rotation System state (0: spawn, 1: right, 2: two rotations, 3: left)
+SRS_CELLS = {'I': (((0, 1), (1, 1), (2, 1), (3, 1)),
+                   ((2, 0), (2, 1), (2, 2), (2, 3)),
+                   ((0, 2), (1, 2), (2, 2), (3, 2)),
+                   ((1, 0), (1, 1), (1, 2), (1, 3))),
+             'O': (((0, 0), (1, 0), (0, 1), (1, 1)),) * 4,
+             'Z': (((0, 0), (1, 0), (1, 1), (2, 1)),
+                   ((2, 0), (2, 1), (1, 1), (1, 2)),
+                   ((0, 1), (1, 1), (1, 2), (2, 2)),
+                   ((1, 0), (1, 1), (0, 1), (0, 2)))}
+
+# the kicks (dx, dy with y up) of the clockwise rotations 0->R, R->2, 2->L and
+# L->0 of the Super Rotation System
+SRS_KICKS = {'I': (((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+                   ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+                   ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+                   ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1))),
+             'O': (((0, 0),),) * 4,
+             'Z': (((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+                   ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+                   ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+                   ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)))}
+
+# A function that creates a tetromino of the given type on an empty game grid
+# with the bottom left cell of its tile matrix at (x, y)
+def place(shape, x, y):
+   grid = GameGrid(20, 10)
+   tetromino = Tetromino(shape, grid)
+   tetromino.bottom_left_cell.x, tetromino.bottom_left_cell.y = x, y
+   return grid, tetromino
+
+# A function that locks a tile on the given cells of the game grid
+def block(grid, *cells):
+   for x, y in cells:
+      grid.tile_matrix[grid.rows[y], x] = Tile()
+
+# A function that returns the cells of the given tetromino on the game grid
+def cells(tetromino):
+   x, y = tetromino.bottom_left_cell.x, tetromino.bottom_left_cell.y
+   return {(x + dx, y + dy)
+           for dx, dy in CELL_OFFSETS[tetromino.type][tetromino.rotation]}
+
+def test_rotation_states_match_srs_states():
+   for shape, offsets in CELL_OFFSETS.items():
+      for rotation in range(4):
+         state = (rotation + SRS_STATES[shape]) % 4
+         n = SHAPES[shape][0]
+         expected = {(col, (n - 1) - row) for col, row in SRS_CELLS[shape][state]}
+         assert set(offsets[rotation]) == expected
+
+def test_rotation_kicks_match_srs_kicks():
+   for shape in ROTATION_KICKS:
+      for rotation in range(4):
+         state = (rotation + SRS_STATES[shape]) % 4
+         assert ROTATION_KICKS[shape][rotation] == SRS_KICKS[shape][state]
+
+def test_rotation_in_place_when_it_fits():
+   grid, tetromino = place('Z', 3, 5)
+   assert tetromino.rotate(grid)
+   assert (tetromino.bottom_left_cell.x, tetromino.bottom_left_cell.y) == (3, 5)
+   assert tetromino.rotation == 1
+
+def test_i_kicks_off_the_left_wall():
+   # the vertical I in the leftmost column rotates to the spawn state, the
+   # first kick of L->0 that fits (+1, -2) is used as the row above is blocked
+   grid, tetromino = place('I', -1, 5)
+   block(grid, (1, 7))
+   assert tetromino.rotate(grid)
+   assert (tetromino.bottom_left_cell.x, tetromino.bottom_left_cell.y) == (0, 3)
+   assert cells(tetromino) == {(0, 5), (1, 5), (2, 5), (3, 5)}
+
+def test_i_kicks_off_the_right_wall():
+   # L->0 at the right wall uses the kick (-2, 0)
+   grid, tetromino = place('I', 8, 5)
+   assert tetromino.rotate(grid)
+   assert (tetromino.bottom_left_cell.x, tetromino.bottom_left_cell.y) == (6, 5)
+   assert cells(tetromino) == {(6, 7), (7, 7), (8, 7), (9, 7)}
+
+def test_z_kick_from_state_2_to_left():
+   # 2->L tests (0, 0), (+1, 0) and (+1, +1) in order
+   grid, tetromino = place('Z', 3, 5)
+   block(grid, (3, 5), (5, 6))
+   assert tetromino.rotate(grid)
+   assert (tetromino.bottom_left_cell.x, tetromino.bottom_left_cell.y) == (4, 6)
+   assert cells(tetromino) == {(5, 8), (5, 7), (4, 7), (4, 6)}
+
+def test_rotation_fails_when_no_kick_fits():
+   # the kicks of L->0 off the left wall are blocked or below the grid
+   grid, tetromino = place('I', -1, 0)
+   block(grid, (1, 2), (1, 0))
+   assert not tetromino.rotate(grid)
+   assert tetromino.rotation == 0
+
+def test_o_rotates_in_place():
+   grid, tetromino = place('O', 8, 0)
+   before = cells(tetromino)
+   for _ in range(4):
+      assert tetromino.rotate(grid)
+      assert cells(tetromino) == before
+
+def test_hard_drop_keeps_the_position_an_int():
+   # (the position is sent to the clients of the server as JSON)
+   grid, tetromino = place('Z', 3, 15)
+   tetromino.rotate(grid)
+   tetromino.apply("hard_drop", grid)
+   assert type(tetromino.bottom_left_cell.y) is int
+   assert min(y for _, y in cells(tetromino)) == 0
@@ -0,0 +1,84 @@
+import random
+import pygame.surfarray
+import lib.stddraw as stddraw
+from tetromino import ACTIONS
+from versus import (Player, TetrominoSequence, PLAYER_BINDINGS,
+                    draw_background, send_garbage)
+
+# A function that plays the given number of tetrominoes of the given player by
+# dropping them (holding at the given steps) and returns the type and the
+# horizontal position of each tetromino created for the player in order
+def play(player, n_steps, holds=()):
+   created = [(tetromino.type, tetromino.bottom_left_cell.x)
+              for tetromino in (player.current_tetromino,
+                                *player.next_tetrominoes)]
+   for step in range(n_steps):
+      if step in holds:
+         n_created = player.sequence_index
+         player.hold()
+         if player.sequence_index != n_created:
+            tetromino = player.next_tetrominoes[-1]
+            created.append((tetromino.type, tetromino.bottom_left_cell.x))
+      player.current_tetromino.apply("hard_drop", player.grid)
+      player.lock()
+      assert not player.game_over
+      tetromino = player.next_tetrominoes[-1]
+      created.append((tetromino.type, tetromino.bottom_left_cell.x))
+   return created
+
+def test_players_share_the_sequence_when_one_holds():
+   sequence = TetrominoSequence(10, seed=3)
+   players = [Player(60, 10, index * 16, bindings, seed=3, sequence=sequence)
+              for index, bindings in enumerate(PLAYER_BINDINGS)]
+   holding = play(players[0], 12, holds=(0, 4, 5, 9))
+   other = play(players[1], 12)
+   n = min(len(holding), len(other))
+   assert holding[:n] == other[:n] == sequence.entries[:n]
+
+def test_garbage_does_not_change_the_sequence():
+   sequence = TetrominoSequence(10, seed=5)
+   players = [Player(60, 10, index * 16, bindings, seed=5, sequence=sequence)
+              for index, bindings in enumerate(PLAYER_BINDINGS)]
+   players[0].pending_garbage = 3
+   assert play(players[0], 10) == play(players[1], 10)
+
+def test_drawing_the_changes_matches_drawing_the_whole_frame(canvas):
+   sequence = TetrominoSequence(8, seed=4)
+   players = [Player(12, 8, index * 14, bindings, seed=4, sequence=sequence)
+              for index, bindings in enumerate(PLAYER_BINDINGS)]
+   background = draw_background(players, 2 * 14, 12)
+   frames = []
+   def show_listener(surface):
+      frames.append(pygame.surfarray.array3d(surface))
+   stddraw.addShowListener(show_listener)
+   rng = random.Random(4)
+   n_checks = 0
+   try:
+      for step in range(400):
+         for player, opponent in (players, players[::-1]):
+            if rng.random() < 0.05:
+               player.hold()
+            else:
+               player.current_tetromino.apply(rng.choice(ACTIONS), player.grid)
+            if (step % 3 == 0 and
+                  not player.current_tetromino.move("down", player.grid)):
+               send_garbage(player, opponent, player.lock())
+         if any(player.game_over for player in players):
+            break
+         areas = []
+         for player in players:
+            areas += player.draw(background)
+         stddraw.show(0, areas)
+         if step % 5 == 0:
+            # draw the whole frame as the game grid is displayed alone (see
+            # GameGrid.display)
+            stddraw.clear(players[0].grid.empty_cell_color)
+            for player in players:
+               player.grid.draw(player.next_tetrominoes, player.score,
+                                player.held_tetromino)
+            stddraw.show(0)
+            assert (frames[-1] == frames[-2]).all()
+            n_checks += 1
+   finally:
+      stddraw.removeShowListener(show_listener)
+   assert n_checks > 10
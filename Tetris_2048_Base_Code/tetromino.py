@@ -4,38 +4,91 @@ import copy as cp  # the copy module is used for copying tiles and positions
 import random  # the random module is used for generating random values
 import numpy as np  # the fundamental Python module for scientific computing
 
+# the actions that can be applied on a tetromino (see the apply method below)
+ACTIONS = ("noop", "left", "right", "down", "rotate", "hard_drop")
+
+# the size n of the (n x n) tile matrix and the occupied cells as (column_index,
+# row_index) in the initial rotation state of each type of tetromino
+SHAPES = {'I': (4, ((1, 0), (1, 1), (1, 2), (1, 3))),
+          'O': (2, ((0, 0), (1, 0), (0, 1), (1, 1))),
+          'Z': (3, ((0, 1), (1, 1), (1, 2), (2, 2)))}
+
+# the offsets (dx, dy) tested in order when rotating clockwise from each of the
+# 4 rotation states of the Super Rotation System (0: spawn, 1: right, 2: two
+# rotations, 3: left), the first offset that fits is used (the O tetromino has
+# no kicks, it is only rotated in place)
+KICKS = {'I': (((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+               ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+               ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+               ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1))),
+         'O': (((0, 0),),) * 4,
+         'Z': (((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+               ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+               ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+               ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)))}
+
+# the Super Rotation System state of the initial rotation state of each type of
+# tetromino in SHAPES (the initial I is the vertical left state and the initial
+# Z is the state after two rotations from the spawn state)
+SRS_STATES = {'I': 3, 'O': 0, 'Z': 2}
+
+# the kicks tested when rotating clockwise from each rotation state of each type
+# of tetromino (the rotation states are counted from the initial ones in SHAPES)
+ROTATION_KICKS = {shape: tuple(KICKS[shape][(rotation + SRS_STATES[shape]) % 4]
+                               for rotation in range(4)) for shape in SHAPES}
+
+# A function that computes the positions (dx, dy) of the occupied cells relative
+# to the bottom left cell of the tile matrix in each of the 4 rotation states
+def compute_cell_offsets(shape):
+   n, occupied_cells = SHAPES[shape]
+   cells, offsets = list(occupied_cells), []
+   for _ in range(4):
+      offsets.append(tuple((col, (n - 1) - row) for col, row in cells))
+      # rotating clockwise moves the cell (col, row) to (n - 1 - row, col)
+      cells = [((n - 1) - row, col) for col, row in cells]
+   return tuple(offsets)
+
+# the cell offsets of each type of tetromino in each rotation state (computed
+# once, so that a rotation is tested without rotating the tile matrix)
+CELL_OFFSETS = {shape: compute_cell_offsets(shape) for shape in SHAPES}
+
+# the offsets (dx, dy) of the moves of a tetromino by 1 in each direction
+MOVES = {"left": (-1, 0), "right": (1, 0), "down": (0, -1)}
+
+# A function that computes the offsets of the cells on the leading edge of a
+# tetromino for each rotation state and each direction of MOVES (the cells
+# that move onto a cell that is not a cell of the tetromino, e.g. the leftmost
+# cell of each row when moving left), only these cells are checked for a move
+def compute_edge_offsets(shape):
+   edges = []
+   for cells in CELL_OFFSETS[shape]:
+      edges.append({direction: tuple(
+         (x, y) for x, y in cells if (x + dx, y + dy) not in cells)
+         for direction, (dx, dy) in MOVES.items()})
+   return tuple(edges)
+
+# the leading edge offsets of each type of tetromino in each rotation state
+EDGE_OFFSETS = {shape: compute_edge_offsets(shape) for shape in SHAPES}
+
 # A class for modeling tetrominoes with 3 out of 7 different types as I, O and Z
 class Tetromino:
-   # the dimensions of the game grid (defined as class variables)
-   grid_height, grid_width = None, None
-
-   # A constructor for creating a tetromino with a given shape (type)
-   def __init__(self, shape):
+   # A constructor for creating a tetromino with a given shape (type) to enter
+   # the given game grid (rng is the random number generator used for the
+   # initial position, it defaults to the random module when not given)
+   def __init__(self, shape, game_grid, rng=random):
       self.type = shape  # set the type of this tetromino
+      # the dimensions of the game grid that this tetromino enters
+      self.grid_height = game_grid.grid_height
+      self.grid_width = game_grid.grid_width
       # determine the occupied (non-empty) cells in the tile matrix based on
       # the shape of this tetromino (see the documentation given with this code)
-      occupied_cells = []
-      if self.type == 'I':
-         n = 4  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino I in its initial rotation state
-         occupied_cells.append((1, 0))  # (column_index, row_index)
-         occupied_cells.append((1, 1))
-         occupied_cells.append((1, 2))
-         occupied_cells.append((1, 3))
-      elif self.type == 'O':
-         n = 2  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino O in its initial rotation state
-         occupied_cells.append((0, 0))  # (column_index, row_index)
-         occupied_cells.append((1, 0))
-         occupied_cells.append((0, 1))
-         occupied_cells.append((1, 1))
-      elif self.type == 'Z':
-         n = 3  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino Z in its initial rotation state
-         occupied_cells.append((0, 1))  # (column_index, row_index)
-         occupied_cells.append((1, 1))
-         occupied_cells.append((1, 2))
-         occupied_cells.append((2, 2))
+      # n = number of rows = number of columns in the tile matrix
+      n, occupied_cells = SHAPES[self.type]
+      # the rotation state of this tetromino (see ROTATION_KICKS above)
+      self.rotation = 0
+      # the image of this tetromino drawn in the side panel (drawn once when
+      # it is first needed, see GameGrid.draw_preview)
+      self.preview = None
       # create a matrix of numbered tiles based on the shape of this tetromino
       self.tile_matrix = np.full((n, n), None)
       # create the four tiles (minos) of this tetromino and place these tiles
@@ -43,12 +96,12 @@ class Tetromino:
       for i in range(len(occupied_cells)):
          col_index, row_index = occupied_cells[i][0], occupied_cells[i][1]
          # create a tile for each occupied cell of this tetromino
-         self.tile_matrix[row_index][col_index] = Tile()
+         self.tile_matrix[row_index][col_index] = Tile.acquire()
       # initialize the position of this tetromino (as the bottom left cell in
       # the tile matrix) with a random horizontal position above the game grid
       self.bottom_left_cell = Point()
-      self.bottom_left_cell.y = Tetromino.grid_height - 1
-      self.bottom_left_cell.x = random.randint(0, Tetromino.grid_width - n)
+      self.bottom_left_cell.y = self.grid_height - 1
+      self.bottom_left_cell.x = rng.randint(0, self.grid_width - n)
 
    # A method that computes and returns the position of the cell in the tile
    # matrix specified by the given row and column indexes
@@ -61,6 +114,14 @@ class Tetromino:
       position.y = self.bottom_left_cell.y + (n - 1) - row
       return position
 
+   # A method that returns the leftmost and the rightmost columns and the
+   # bottommost and the topmost rows of the cells of this tetromino
+   def get_bounds(self):
+      cells = CELL_OFFSETS[self.type][self.rotation]
+      x, y = self.bottom_left_cell.x, self.bottom_left_cell.y
+      return (x + min(dx for dx, _ in cells), x + max(dx for dx, _ in cells),
+              y + min(dy for _, dy in cells), y + max(dy for _, dy in cells))
+
    # A method to return a copy of the tile matrix without any empty row/column,
    # and the position of the bottom left cell when return_position is set
    def get_min_bounded_tile_matrix(self, return_position=False):
@@ -96,8 +157,9 @@ class Tetromino:
          blc_position.translate(min_col, (n - 1) - max_row)
          return copy, blc_position
 
-   # A method for drawing the tetromino on the game grid
-   def draw(self):
+   # A method for drawing the tetromino on the game grid (that is drawn with
+   # the given horizontal offset, see GameGrid.x_offset)
+   def draw(self, x_offset=0):
       n = len(self.tile_matrix)  # n = number of rows = number of columns
       for row in range(n):
          for col in range(n):
@@ -106,7 +168,8 @@ class Tetromino:
                # get the position of the tile
                position = self.get_cell_position(row, col)
                # draw only the tiles that are inside the game grid
-               if position.y < Tetromino.grid_height:
+               if position.y < self.grid_height:
+                  position.x += x_offset
                   self.tile_matrix[row][col].draw(position)
 
    # A method for moving this tetromino in a given direction by 1 on the grid
@@ -125,97 +188,126 @@ class Tetromino:
       return True  # a successful move in the given direction
 
    # A method for checking if this tetromino can be moved in a given direction
+   # (the cells on its leading edge must fit on the grid after the move, see
+   # EDGE_OFFSETS and the fits method)
    def can_be_moved(self, direction, game_grid):
-      n = len(self.tile_matrix)  # n = number of rows = number of columns
-      # check for moving left or right
-      if direction == "left" or direction == "right":
-         for row_index in range(n):
-            for col_index in range(n):
-               # direction = left --> check the leftmost tile of each row
-               row, col = row_index, col_index
-               if direction == "left" and self.tile_matrix[row][col] is not None:
-                  # the position of the leftmost tile of the current row
-                  leftmost = self.get_cell_position(row, col)
-                  # if any leftmost tile is at x = 0
-                  if leftmost.x == 0:
-                     return False  # this tetromino cannot be moved left
-                  # if the grid cell on the left of a leftmost tile is occupied
-                  if game_grid.is_occupied(leftmost.y, leftmost.x - 1):
-                     return False  # this tetromino cannot be moved left
-                  # as the leftmost tile of the current row is checked
-                  break  # end the inner for loop
-               # direction = right --> check the rightmost tile of each row
-               row, col = row_index, n - 1 - col_index
-               if direction == "right" and self.tile_matrix[row][col] is not None:
-                  # the position of the rightmost tile of the current row
-                  rightmost = self.get_cell_position(row, col)
-                  # if any rightmost tile is at x = grid_width - 1
-                  if rightmost.x == Tetromino.grid_width - 1:
-                     return False  # this tetromino cannot be moved right
-                  # if the grid cell on the right of a rightmost tile is occupied
-                  if game_grid.is_occupied(rightmost.y, rightmost.x + 1):
-                     return False  # this tetromino cannot be moved right
-                  # as the rightmost tile of the current row is checked
-                  break  # end the inner for loop
-      # direction = down --> check the bottommost tile of each column
-      else:
-         for col in range(n):
-            for row in range(n - 1, -1, -1):
-               # if the current cell of the tetromino is occupied by a tile
-               if self.tile_matrix[row][col] is not None:
-                  # the position of the bottommost tile of the current col
-                  bottommost = self.get_cell_position(row, col)
-                  # if any bottommost tile is at y = 0
-                  if bottommost.y == 0:
-                     return False  # this tetromino cannot be moved down
-                  # if the grid cell below any bottommost tile is occupied
-                  if game_grid.is_occupied(bottommost.y - 1, bottommost.x):
-                     return False  # this tetromino cannot be moved down
-                  # as the bottommost tile of the current row is checked
-                  break  # end the inner for loop
-      # if this method does not end by returning False before this line
-      return True  # this tetromino can be moved in the given direction
+      dx, dy = MOVES[direction]
+      offsets = EDGE_OFFSETS[self.type][self.rotation][direction]
+      return self.fits(game_grid, offsets, self.bottom_left_cell.x + dx,
+                       self.bottom_left_cell.y + dy)
 
+   # A method for rotating this tetromino clockwise on the grid, the kicks of
+   # the current rotation state are tested in order and the first one that fits
+   # is used (returns False when none of them fits)
    def rotate(self, game_grid):
-      # Copy current tile matrix for rollback in case of invalid rotation
-      old_matrix = cp.deepcopy(self.tile_matrix)
-      old_position = cp.copy(self.bottom_left_cell)
-
-      # Perform clockwise rotation: transpose + reverse rows
-      n = len(self.tile_matrix)
-      rotated = np.full((n, n), None)
-      for row in range(n):
-         for col in range(n):
-            rotated[col][n - 1 - row] = self.tile_matrix[row][col]
-
-      self.tile_matrix = rotated
-
-      # Check if rotated shape is still valid (not outside or overlapping)
-      if not self._is_valid_position(game_grid):
-         # Revert if invalid
-         self.tile_matrix = old_matrix
-         self.bottom_left_cell = old_position
-         return False
+      next_rotation = (self.rotation + 1) % 4
+      offsets = CELL_OFFSETS[self.type][next_rotation]
+      x, y = self.bottom_left_cell.x, self.bottom_left_cell.y
+      for kick_x, kick_y in ROTATION_KICKS[self.type][self.rotation]:
+         if self.fits(game_grid, offsets, x + kick_x, y + kick_y):
+            self.rotate_tile_matrix()
+            self.rotation = next_rotation
+            self.bottom_left_cell.x = x + kick_x
+            self.bottom_left_cell.y = y + kick_y
+            return True
+      return False
 
+   # A method that checks if the cells with the given offsets fit on the grid
+   # when the bottom left cell of the tile matrix is at (x, y), the cells above
+   # the game grid fit as the tetrominoes enter the grid from above
+   def fits(self, game_grid, offsets, x, y):
+      tile_matrix, rows = game_grid.tile_matrix, game_grid.rows
+      for dx, dy in offsets:
+         cell_x, cell_y = x + dx, y + dy
+         if cell_x < 0 or cell_x >= self.grid_width or cell_y < 0:
+            return False
+         if (cell_y < self.grid_height
+               and tile_matrix[rows[cell_y], cell_x] is not None):
+            return False
       return True
 
+   # A method for rotating the tile matrix (without checking the grid) until
+   # this tetromino is in the given rotation state
+   def set_rotation(self, rotation):
+      while self.rotation != rotation:
+         self.rotate_tile_matrix()
+         self.rotation = (self.rotation + 1) % 4
 
-   def _is_valid_position(self, game_grid):
+   # A method for moving this tetromino back to its initial rotation state and
+   # to a random horizontal position above the game grid (e.g. when it is held
+   # to enter the game grid again later)
+   def reset(self, rng=random):
+      self.set_rotation(0)
       n = len(self.tile_matrix)
-      for row in range(n):
-         for col in range(n):
-            tile = self.tile_matrix[row][col]
-            if tile is not None:
-               pos = self.get_cell_position(row, col)
-               # Out of grid
-               if pos.x < 0 or pos.x >= Tetromino.grid_width or pos.y < 0:
-                  return False
-               # Overlapping another tile
-               if pos.y < Tetromino.grid_height and game_grid.is_occupied(pos.y, pos.x):
-                  return False
-      return True
+      self.bottom_left_cell.y = self.grid_height - 1
+      self.bottom_left_cell.x = rng.randint(0, self.grid_width - n)
+
+   # A method for reusing this tetromino as a new tetromino of the same type
+   # (e.g. after it is locked on the game grid, see TetrominoPool) with new
+   # tiles in the initial rotation state at a random horizontal position
+   def respawn(self, rng=random):
+      self.set_rotation(0)
+      _, occupied_cells = SHAPES[self.type]
+      for col_index, row_index in occupied_cells:
+         self.tile_matrix[row_index][col_index] = Tile.acquire()
+      self.reset(rng)
+
+   # A method for rotating the tile matrix clockwise in place by moving the
+   # tiles in cycles of 4 (from the outer ring of the matrix to the inner one)
+   def rotate_tile_matrix(self):
+      m, n = self.tile_matrix, len(self.tile_matrix)
+      for i in range(n // 2):
+         for j in range(i, n - 1 - i):
+            tile = m[i, j]
+            m[i, j] = m[n - 1 - j, i]
+            m[n - 1 - j, i] = m[n - 1 - i, n - 1 - j]
+            m[n - 1 - i, n - 1 - j] = m[j, n - 1 - i]
+            m[j, n - 1 - i] = tile
 
    def hard_drop(self, game_grid):
+      # the rows above the topmost tile on the grid are empty, so move this
+      # tetromino down onto the topmost row with a tile at once (instead of
+      # moving it down one by one through the empty rows of a large grid)
+      lowest = self.bottom_left_cell.y + min(
+         dy for _, dy in CELL_OFFSETS[self.type][self.rotation])
+      if lowest > game_grid.stack_height:
+         self.bottom_left_cell.y -= lowest - game_grid.stack_height
       # Move down until it cannot move anymore
       while self.move("down", game_grid):
          continue
+
+   # A method for applying one of the ACTIONS on this tetromino, returns True
+   # when the action changes the position or the rotation of this tetromino
+   def apply(self, action, game_grid):
+      if action == "left" or action == "right" or action == "down":
+         return self.move(action, game_grid)
+      elif action == "rotate":
+         return self.rotate(game_grid)
+      elif action == "hard_drop":
+         y = self.bottom_left_cell.y
+         self.hard_drop(game_grid)
+         return self.bottom_left_cell.y != y
+      return False  # action == "noop"
+
+# A class for modeling a pool of the tetrominoes of the game grids with the
+# same dimensions, the tetrominoes locked on a game grid are released into the
+# pool and reused for the new tetrominoes of the same type (see respawn)
+class TetrominoPool:
+   # A constructor for creating an empty pool
+   def __init__(self):
+      self.free = {shape: [] for shape in SHAPES}
+
+   # A method that returns a tetromino with the given shape (type) to enter
+   # the given game grid, a released tetromino is reused when there is one
+   def acquire(self, shape, game_grid, rng=random):
+      free = self.free[shape]
+      if free:
+         tetromino = free.pop()
+         tetromino.respawn(rng)
+         return tetromino
+      return Tetromino(shape, game_grid, rng)
+
+   # A method for releasing the given tetromino into the pool after it is
+   # locked on the game grid (its tiles stay on the game grid)
+   def release(self, tetromino):
+      self.free[tetromino.type].append(tetromino)
@@ -9,25 +9,72 @@ class Tile:
    boundary_thickness = 0.004
    # font family and font size used for displaying the tile number
    font_family, font_size = "Arial", 14
+   # the number on the new tiles
+   initial_number = 2
+   # the sprites of the unit tiles with their numbers (see the draw method),
+   # keyed by the number as the colors of a tile depend only on its number
+   sprites = {}
+   # the colors of the tiles (shared by all the tiles instead of creating
+   # them for each tile)
+   background_color = Color(151, 178, 199)  # background (tile) color
+   foreground_color = Color(0, 100, 200)  # foreground (number) color
+   box_color = Color(0, 100, 200)  # box (boundary) color
+   # the tiles removed from the game grids to be reused (see the acquire and
+   # the release methods)
+   pool = []
 
    # A constructor that creates a tile with 2 as the number on it
    def __init__(self):
       # set the number on this tile
-      self.number = 2
-      # set the colors of this tile
-      self.background_color = Color(151, 178, 199)  # background (tile) color
-      self.foreground_color = Color(0, 100, 200)  # foreground (number) color
-      self.box_color = Color(0, 100, 200)  # box (boundary) color
+      self.number = Tile.initial_number
+
+   # A method that returns a tile with 2 as the number on it, a released tile
+   # is reused when there is one (a new tile is created otherwise)
+   @staticmethod
+   def acquire():
+      if Tile.pool:
+         return Tile.pool.pop()
+      return Tile()
+
+   # A method for releasing this tile into the pool when it is removed from
+   # the game grid (it must not be used anywhere else after this call)
+   def release(self):
+      self.number = Tile.initial_number
+      Tile.pool.append(self)
 
    # A method for drawing this tile at a given position with a given length
    def draw(self, position, length=1, is_preview=False):  # length defaults to 1
-      # draw the tile as a filled square
-      stddraw.setPenColor(self.background_color)
-      stddraw.filledSquare(position.x, position.y, length / 2)
-      # draw the bounding box around the tile as a square
-      stddraw.setPenColor(self.box_color)
-      stddraw.setPenRadius(Tile.boundary_thickness)
-      stddraw.square(position.x, position.y, length / 2)
+      # a unit tile with its number is drawn once as a sprite for each number
+      # and then the sprite is drawn (shared by all the tiles on all the game
+      # grids in the window)
+      if length == 1 and not is_preview:
+         x, y = position.x - 0.5, position.y - 0.5
+         sprite = Tile.sprites.get(self.number)
+         if sprite is None:
+            stddraw.beginSprite(x, y, 1, 1, transparent=False)
+            self.draw_tile(position, length, is_preview)
+            sprite = Tile.sprites[self.number] = stddraw.endSprite()
+         stddraw.sprite(sprite, x, y)
+      else:
+         self.draw_tile(position, length, is_preview)
+
+   # A method for drawing this tile without using the sprites
+   def draw_tile(self, position, length=1, is_preview=False):
+      # draw the tile as a filled square and the bounding box around the tile
+      # as a square (the unit squares are drawn as the cells of stddraw with
+      # the precomputed pixel rectangles)
+      if length == 1:
+         stddraw.setPenColor(self.background_color)
+         stddraw.filledCell(position.x, position.y)
+         stddraw.setPenColor(self.box_color)
+         stddraw.setPenRadius(Tile.boundary_thickness)
+         stddraw.cell(position.x, position.y)
+      else:
+         stddraw.setPenColor(self.background_color)
+         stddraw.filledSquare(position.x, position.y, length / 2)
+         stddraw.setPenColor(self.box_color)
+         stddraw.setPenRadius(Tile.boundary_thickness)
+         stddraw.square(position.x, position.y, length / 2)
       stddraw.setPenRadius()  # reset the pen radius to its default value
       # draw the number on the tile
       if not is_preview:
@@ -0,0 +1,176 @@
+################################################################################
+#                                                                              #
+# A tuner for the weights of the board features used by the autoplayer (see   #
+# autoplayer.FEATURES) with the cross-entropy method: each generation samples  #
+# weight vectors from a normal distribution, plays seeded games with each of   #
+# them in worker processes and fits the distribution to the best ones. The     #
+# progress is saved to a JSON checkpoint file (also within a generation), and  #
+# a run is resumed from its checkpoint file when the file exists.             #
+#                                                                              #
+################################################################################
+
+import json  # used for reading and writing the checkpoint file
+import os  # the os module is used for file and directory operations
+import time  # used for the interval of saving the checkpoint file
+import argparse  # used for parsing the command line arguments
+import concurrent.futures  # used for playing the games in worker processes
+import numpy as np  # fundamental Python module for scientific computing
+from game import Game  # the class for playing the game without the UI
+from autoplayer import FEATURES, DEFAULT_WEIGHTS, best_placement, play_placement
+
+# the version number of the checkpoint file format
+CHECKPOINT_VERSION = 1
+# the settings that must match when a run is resumed from a checkpoint file
+SETTINGS = ("population", "games", "elite_fraction", "grid_h", "grid_w",
+            "max_pieces", "seed")
+
+# A function run by the worker processes, it plays a game with the given seed
+# by using the best placements for the given weights and returns the number
+# of the lines cleared (the game ends after max_pieces tetrominoes)
+def play_game(weights, seed, grid_h=20, grid_w=12, max_pieces=500):
+   weights = np.asarray(weights, dtype=float)
+   game = Game(grid_h, grid_w, seed)
+   while not game.game_over and game.n_pieces < max_pieces:
+      best = best_placement(game.grid.get_number_matrix(),
+                            game.current_tetromino.type, weights)
+      if best is None:
+         break
+      (rotation, x, _), _, _ = best
+      play_placement(game, rotation, x)
+   return game.lines_cleared
+
+# A class for modeling a tuning run with the cross-entropy method
+class Tuner:
+   # A constructor for creating (or resuming from the checkpoint file with the
+   # given path) a run with the given settings
+   def __init__(self, path, population=32, games=8, elite_fraction=0.25,
+                grid_h=20, grid_w=12, max_pieces=500, seed=0, workers=None,
+                checkpoint_interval=30.0):
+      self.path = path
+      self.settings = {"population": population, "games": games,
+                       "elite_fraction": elite_fraction, "grid_h": grid_h,
+                       "grid_w": grid_w, "max_pieces": max_pieces,
+                       "seed": seed}
+      self.workers = workers
+      self.checkpoint_interval = checkpoint_interval  # in seconds
+      self.generation = 0
+      # the distribution of the weights starts around the default weights
+      self.mean = DEFAULT_WEIGHTS.copy()
+      self.std = np.maximum(np.abs(DEFAULT_WEIGHTS), 0.5)
+      self.best_weights, self.best_score = DEFAULT_WEIGHTS.copy(), None
+      self.history = []
+      # the lines cleared in each game by each weight vector of the current
+      # generation (None for the games not played yet)
+      self.scores = None
+      if os.path.exists(path):
+         self.load()
+
+   # A method for reading the state of the run from the checkpoint file
+   def load(self):
+      with open(self.path) as checkpoint_file:
+         state = json.load(checkpoint_file)
+      for name in SETTINGS:
+         if state["settings"][name] != self.settings[name]:
+            raise ValueError(name + " does not match the checkpoint")
+      self.generation = state["generation"]
+      self.mean, self.std = np.array(state["mean"]), np.array(state["std"])
+      self.best_weights = np.array(state["best_weights"])
+      self.best_score = state["best_score"]
+      self.history = state["history"]
+      self.scores = state["scores"]
+
+   # A method for writing the state of the run to the checkpoint file
+   # (replaced atomically so that an interrupted write does not lose the run)
+   def save(self):
+      state = {"version": CHECKPOINT_VERSION, "features": list(FEATURES),
+               "settings": self.settings, "generation": self.generation,
+               "mean": self.mean.tolist(), "std": self.std.tolist(),
+               "best_weights": self.best_weights.tolist(),
+               "best_score": self.best_score, "history": self.history,
+               "scores": self.scores}
+      temp_path = self.path + ".tmp"
+      with open(temp_path, "w") as checkpoint_file:
+         json.dump(state, checkpoint_file)
+      os.replace(temp_path, self.path)
+
+   # A method that returns the weight vectors and the game seeds of the current
+   # generation (the same for a resumed run, as the random number generator is
+   # seeded by the seed of the run and the generation)
+   def sample(self):
+      rng = np.random.default_rng([self.settings["seed"], self.generation])
+      candidates = rng.normal(self.mean, self.std,
+                              (self.settings["population"], len(FEATURES)))
+      # all the weight vectors play the same games (so that the differences
+      # between the scores are not due to the tetrominoes of the games)
+      seeds = rng.integers(0, 2 ** 31, self.settings["games"]).tolist()
+      return candidates, seeds
+
+   # A method for running the given number of generations in total
+   def run(self, generations, log=print):
+      with concurrent.futures.ProcessPoolExecutor(self.workers) as pool:
+         while self.generation < generations:
+            self.run_generation(pool)
+            entry = self.history[-1]
+            log("generation %d: mean %.2f, elite %.2f, best %.2f lines" % (
+               self.generation, entry["mean_score"], entry["elite_score"],
+               self.best_score))
+      return self.best_weights
+
+   # A method for playing the games of the current generation in the given
+   # pool and fitting the distribution of the weights to the best ones
+   def run_generation(self, pool):
+      settings = self.settings
+      candidates, seeds = self.sample()
+      if self.scores is None:
+         self.scores = [[None] * len(seeds) for _ in candidates]
+      futures = {}
+      for i, weights in enumerate(candidates):
+         for j, seed in enumerate(seeds):
+            if self.scores[i][j] is None:
+               future = pool.submit(play_game, weights.tolist(), seed,
+                                    settings["grid_h"], settings["grid_w"],
+                                    settings["max_pieces"])
+               futures[future] = (i, j)
+      last_save = time.monotonic()
+      for future in concurrent.futures.as_completed(futures):
+         i, j = futures[future]
+         self.scores[i][j] = future.result()
+         if time.monotonic() - last_save >= self.checkpoint_interval:
+            self.save()
+            last_save = time.monotonic()
+      mean_scores = np.mean(self.scores, axis=1)
+      n_elite = max(1, int(round(len(candidates) * settings["elite_fraction"])))
+      elite = np.argsort(mean_scores)[::-1][:n_elite]
+      if self.best_score is None or mean_scores[elite[0]] > self.best_score:
+         self.best_score = float(mean_scores[elite[0]])
+         self.best_weights = candidates[elite[0]]
+      # the noise added to the deviation decreases over the generations, so
+      # that the distribution does not collapse in the first generations
+      noise = max(0.0, 0.5 - 0.05 * self.generation)
+      self.mean = candidates[elite].mean(axis=0)
+      self.std = candidates[elite].std(axis=0) + noise
+      self.history.append({"mean_score": float(mean_scores.mean()),
+                           "elite_score": float(mean_scores[elite].mean())})
+      self.generation += 1
+      self.scores = None
+      self.save()
+
+if __name__ == '__main__':
+   parser = argparse.ArgumentParser(description="Tune the autoplayer weights")
+   parser.add_argument("checkpoint", help="the checkpoint file of the run")
+   parser.add_argument("--generations", type=int, default=50)
+   parser.add_argument("--population", type=int, default=32)
+   parser.add_argument("--games", type=int, default=8)
+   parser.add_argument("--elite-fraction", type=float, default=0.25)
+   parser.add_argument("--max-pieces", type=int, default=500)
+   parser.add_argument("--grid-height", type=int, default=20)
+   parser.add_argument("--grid-width", type=int, default=12)
+   parser.add_argument("--seed", type=int, default=0)
+   parser.add_argument("--workers", type=int, default=None)
+   args = parser.parse_args()
+   tuner = Tuner(args.checkpoint, args.population, args.games,
+                 args.elite_fraction, args.grid_height, args.grid_width,
+                 args.max_pieces, args.seed, args.workers)
+   best_weights = tuner.run(args.generations)
+   for name, weight in zip(FEATURES, best_weights):
+      print("%-10s %8.3f" % (name, weight))
@@ -0,0 +1,230 @@
+################################################################################
+#                                                                              #
+# The local two-player versus mode of Tetris 2048: two game grids side by side #
+# in one window, where clearing lines sends garbage rows to the opponent. Both #
+# players are simulated in the same fixed-tick loop, and each tick draws one   #
+# frame in a single pass: the static parts of both game grids are drawn once   #
+# into a background sprite, only the parts of the game grids that have changed #
+# since the last frame are drawn and shown (see GameGrid.draw_changes) and the #
+# tiles are drawn from the sprites shared by both game grids (see Tile.draw).  #
+#                                                                              #
+################################################################################
+
+import lib.stddraw as stddraw  # for creating an animation with user interactions
+from game_grid import GameGrid  # the class for modeling the game grid
+from tetromino import TetrominoPool, SHAPES  # used for the tetrominoes
+from score import Score  # the class for modeling the score of a player
+from input_handler import InputHandler, read_key_events  # keyboard input
+from lib.framelimiter import FrameLimiter  # used for pacing the game loop
+import argparse  # used for parsing the command line arguments
+import collections  # used for the queues of the next tetrominoes
+import random  # used for creating tetrominoes with random types (shapes)
+import time  # used for the timestamps of the key events
+
+# the number of the ticks per second, each tick simulates both players and
+# draws a frame
+TICK_RATE = 60
+# the number of the garbage rows sent for clearing 0, 1, 2, 3 and 4 (or more)
+# lines at once
+GARBAGE_ROWS = (0, 0, 1, 2, 4)
+# the key bindings of the players (see InputHandler)
+PLAYER_BINDINGS = (
+   {"a": "left", "d": "right", "s": "down", "w": "rotate",
+    "space": "hard_drop", "q": "hold"},
+   {"left": "left", "right": "right", "down": "down", "up": "rotate",
+    "return": "hard_drop", "right shift": "hold"})
+
+# A class for modeling the sequence of the tetrominoes shared by the players,
+# each player takes the tetrominoes in the same order by its own index into the
+# sequence (so holding or receiving garbage does not change the sequence)
+class TetrominoSequence:
+   # the types (shapes) of the tetrominoes that can enter the game grid
+   tetromino_types = ['I', 'O', 'Z']
+
+   # A constructor for creating the sequence of the tetrominoes for game grids
+   # of the given width by using a random number generator with the given seed
+   def __init__(self, grid_w, seed=None):
+      self.rng = random.Random(seed)
+      self.grid_w = grid_w
+      # the type and the horizontal position of each tetromino created so far
+      self.entries = []
+
+   # A method that returns the type and the horizontal position of the
+   # tetromino at the given index (the sequence is extended when needed)
+   def get(self, index):
+      while len(self.entries) <= index:
+         shape = self.rng.choice(TetrominoSequence.tetromino_types)
+         n = SHAPES[shape][0]
+         self.entries.append((shape, self.rng.randint(0, self.grid_w - n)))
+      return self.entries[index]
+
+# A class for modeling a player of the versus mode with its own game grid,
+# tetrominoes, score and input handler
+class Player:
+   # A constructor for creating a player with a game grid of the given
+   # dimensions drawn at the given horizontal offset, the tetrominoes are taken
+   # from the given sequence (a new one with the given seed when it is not
+   # given) and the random number generator with the given seed is used for
+   # the positions of the held tetrominoes and the holes of the garbage rows
+   def __init__(self, grid_h, grid_w, x_offset, bindings, n_previews=2,
+                seed=None, sequence=None):
+      self.rng = random.Random(seed)
+      self.grid = GameGrid(grid_h, grid_w, x_offset)
+      if sequence is None:
+         sequence = TetrominoSequence(grid_w, seed)
+      self.sequence = sequence
+      # the index of the next tetromino of this player in the sequence
+      self.sequence_index = 0
+      # the locked tetrominoes are reused for the new tetrominoes
+      self.pool = TetrominoPool()
+      self.current_tetromino = self.create_tetromino()
+      self.grid.current_tetromino = self.current_tetromino
+      self.next_tetrominoes = collections.deque(
+         self.create_tetromino() for _ in range(max(1, n_previews)))
+      self.held_tetromino, self.hold_used = None, False
+      self.score = Score()
+      self.input_handler = InputHandler(bindings=bindings)
+      # the number of the ticks since the last gravity step
+      self.fall_ticks = 0
+      # the number of the garbage rows received and not pushed into the game
+      # grid yet (they are pushed when the current tetromino is locked)
+      self.pending_garbage = 0
+      self.game_over = False
+
+   # A method for creating the next tetromino of the sequence to enter the
+   # game grid
+   def create_tetromino(self):
+      shape, x = self.sequence.get(self.sequence_index)
+      self.sequence_index += 1
+      tetromino = self.pool.acquire(shape, self.grid, self.rng)
+      # the horizontal position is taken from the sequence
+      tetromino.bottom_left_cell.x = x
+      return tetromino
+
+   # A method for letting the next tetromino enter the game grid
+   def next_tetromino(self):
+      self.current_tetromino = self.next_tetrominoes.popleft()
+      self.next_tetrominoes.append(self.create_tetromino())
+      self.grid.current_tetromino = self.current_tetromino
+
+   # A method for swapping the current tetromino with the held one (the next
+   # one enters the game grid when no tetromino is held yet), once for each
+   # tetromino entering the game grid
+   def hold(self):
+      if self.hold_used:
+         return
+      self.hold_used = True
+      self.current_tetromino.reset(self.rng)
+      if self.held_tetromino is None:
+         self.held_tetromino = self.current_tetromino
+         self.next_tetromino()
+      else:
+         self.held_tetromino, self.current_tetromino = (self.current_tetromino,
+                                                        self.held_tetromino)
+         self.grid.current_tetromino = self.current_tetromino
+      self.fall_ticks = 0
+
+   # A method for simulating a tick with the given key events (read once for
+   # both players), returns the number of the lines cleared in the tick
+   def tick(self, now, key_events):
+      for action in self.input_handler.poll(now, key_events):
+         if action == "hold":
+            self.hold()
+            continue
+         self.current_tetromino.apply(action, self.grid)
+         if action == "down":
+            self.fall_ticks = 0
+      self.fall_ticks += 1
+      if self.fall_ticks < self.score.fall_interval * TICK_RATE:
+         return 0
+      self.fall_ticks = 0
+      if self.current_tetromino.move("down", self.grid):
+         return 0
+      return self.lock()
+
+   # A method for locking the current tetromino on the game grid, pushing the
+   # received garbage rows into the game grid and letting the next tetromino
+   # enter the game grid (returns the number of the lines cleared)
+   def lock(self):
+      tiles = self.current_tetromino.tile_matrix
+      pos = self.current_tetromino.bottom_left_cell
+      self.game_over, cleared = self.grid.update_grid(tiles, pos)
+      self.score.add_lines(cleared)
+      self.pool.release(self.current_tetromino)
+      if not self.game_over and self.pending_garbage > 0:
+         hole_col = self.rng.randrange(self.grid.grid_width)
+         self.game_over = self.grid.add_garbage(self.pending_garbage, hole_col)
+         self.pending_garbage = 0
+      if not self.game_over:
+         self.next_tetromino()
+         self.hold_used = False
+      return cleared
+
+   # A method for drawing the changes of the game grid and the side panel of
+   # this player since the last frame (on the given background sprite drawn
+   # by draw_background), returns the changed areas (see
+   # GameGrid.draw_changes)
+   def draw(self, background):
+      return self.grid.draw_changes(self.next_tetrominoes, self.score,
+                                    self.held_tetromino, background)
+
+# A function for sending the garbage rows for the given number of lines
+# cleared by the given player to the opponent (the garbage rows received by
+# the player and not pushed yet are cancelled first)
+def send_garbage(player, opponent, lines_cleared):
+   sent = GARBAGE_ROWS[min(lines_cleared, len(GARBAGE_ROWS) - 1)]
+   cancelled = min(sent, player.pending_garbage)
+   player.pending_garbage -= cancelled
+   opponent.pending_garbage += sent - cancelled
+
+# A function that draws the static parts of the game grids of the given
+# players once into a sprite and returns the sprite
+def draw_background(players, width, height):
+   stddraw.beginSprite(-0.5, -0.5, width, height, transparent=False)
+   for player in players:
+      player.grid.draw_background()
+   return stddraw.endSprite()
+
+# The main function of the versus mode with game grids of the given
+# dimensions (both players get the same sequence of tetrominoes)
+def start(grid_h=20, grid_w=10, n_previews=2, seed=None):
+   # each player has a game grid and a side panel of 6 columns
+   player_w = grid_w + 6
+   cell_size = max(1, min(40, 800 // grid_h, 1440 // (2 * player_w)))
+   stddraw.setCanvasSize(cell_size * 2 * player_w, cell_size * grid_h)
+   stddraw.setXscale(-0.5, 2 * player_w - 0.5)
+   stddraw.setYscale(-0.5, grid_h - 0.5)
+   if seed is None:
+      seed = random.randrange(2 ** 32)
+   sequence = TetrominoSequence(grid_w, seed)
+   players = [Player(grid_h, grid_w, index * player_w, bindings, n_previews,
+                     seed, sequence)
+              for index, bindings in enumerate(PLAYER_BINDINGS)]
+   background = draw_background(players, 2 * player_w, grid_h)
+   frame_limiter = FrameLimiter(TICK_RATE)
+   # the fixed-tick game loop
+   while not any(player.game_over for player in players):
+      key_events = read_key_events()
+      now = time.perf_counter()
+      for player, opponent in (players, players[::-1]):
+         send_garbage(player, opponent, player.tick(now, key_events))
+      # draw the changes of the frame in a single pass and show only the
+      # changed areas (all of the frame when the window is exposed)
+      areas = []
+      for player in players:
+         areas += player.draw(background)
+      stddraw.show(0, None if stddraw.windowExposed() else areas)
+      frame_limiter.wait()
+   for index, player in enumerate(players):
+      result = "loses" if player.game_over else "wins"
+      print("Player", index + 1, result, "with", player.score.points, "points")
+
+if __name__ == '__main__':
+   parser = argparse.ArgumentParser(description="Tetris 2048 versus mode")
+   parser.add_argument("--grid-height", type=int, default=20)
+   parser.add_argument("--grid-width", type=int, default=10)
+   parser.add_argument("--previews", type=int, default=2,
+                       help="the number of the next tetrominoes shown")
+   parser.add_argument("--seed", type=int, default=None)
+   args = parser.parse_args()
+   start(args.grid_height, args.grid_width, args.previews, args.seed)
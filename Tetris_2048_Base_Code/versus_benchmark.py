@@ -0,0 +1,108 @@
+################################################################################
+#                                                                              #
+# A benchmark for the frame time of the versus mode with one game grid and     #
+# with two game grids. Each frame simulates a tick of both players (a random   #
+# action every few frames, the gravity steps and the garbage rows sent to the  #
+# opponent) and draws the changes of the game grids of one or both players and #
+# shows them as in versus.start, so the game grids share the background, the   #
+# sprites of the tiles and the single pass that shows the frame, and two game  #
+# grids must cost less than twice the frame time of one game grid. Both are    #
+# measured alternately in the window of the versus mode (use                   #
+# SDL_VIDEODRIVER=dummy to run it without a display).                          #
+# (The exit status is 1 when the ratio is --ratio or more.)                    #
+#                                                                              #
+################################################################################
+
+import sys  # used for the exit status
+import time  # used for measuring the elapsed time
+import random  # used for the random actions of the players
+import argparse  # used for parsing the command line arguments
+import lib.stddraw as stddraw  # used for the window of the versus mode
+from tetromino import ACTIONS  # the actions of the players
+from versus import (Player, TetrominoSequence, PLAYER_BINDINGS,
+                    draw_background, send_garbage)
+
+# the number of the frames between the actions of the players (15 actions per
+# second at 60 frames per second, a fast player) and between their gravity
+# steps
+ACTION_FRAMES = 4
+FALL_FRAMES = 8
+
+# A function that opens the window of the versus mode with game grids of the
+# given dimensions (see versus.start)
+def open_window(grid_h, grid_w):
+   player_w = grid_w + 6
+   cell_size = max(1, min(40, 800 // grid_h, 1440 // (2 * player_w)))
+   stddraw.setCanvasSize(cell_size * 2 * player_w, cell_size * grid_h)
+   stddraw.setXscale(-0.5, 2 * player_w - 0.5)
+   stddraw.setYscale(-0.5, grid_h - 0.5)
+
+# A function that plays the given number of frames (after as many warmup
+# frames) with two players and draws the game grids of the given number of
+# players, returns the drawing time per frame in milliseconds. Both players
+# are always simulated, so the first game grid changes in the same way when
+# it is drawn alone.
+def measure(n_players, grid_h, grid_w, frames, seed=0):
+   player_w = grid_w + 6
+   sequence = TetrominoSequence(grid_w, seed)
+   players = [Player(grid_h, grid_w, index * player_w,
+                     PLAYER_BINDINGS[index], seed=seed, sequence=sequence)
+              for index in range(2)]
+   background = draw_background(players[:n_players], 2 * player_w, grid_h)
+   rng = random.Random(seed)
+   # the actions are chosen in advance so that they are not measured
+   actions = [rng.choice(ACTIONS) for _ in range(frames)]
+   elapsed = 0.0
+   for frame in range(2 * frames):
+      for index, player in enumerate(players):
+         if frame % ACTION_FRAMES == 0:
+            player.current_tetromino.apply(
+               actions[(frame // ACTION_FRAMES * 2 + index) % frames],
+               player.grid)
+         if (frame % FALL_FRAMES == 0
+               and not player.current_tetromino.move("down", player.grid)):
+            send_garbage(player, players[1 - index], player.lock())
+         if player.game_over:
+            # a new game grid replaces the game grid of the game that is over
+            players[index] = Player(grid_h, grid_w, player.grid.x_offset,
+                                    PLAYER_BINDINGS[index], seed=frame,
+                                    sequence=sequence)
+      # only the drawing of the frame is measured (after the warmup frames)
+      start = time.perf_counter()
+      areas = []
+      for player in players[:n_players]:
+         areas += player.draw(background)
+      stddraw.show(0, areas)
+      if frame >= frames:
+         elapsed += time.perf_counter() - start
+   return elapsed / frames * 1000
+
+# A function that runs the benchmark and returns True when the ratio of the
+# frame time of two game grids to the frame time of one game grid is less than
+# the given ratio (the same games are measured alternately in each repeat and
+# the shortest frame times are compared, as the noise only makes the frames
+# longer)
+def run(frames=3000, repeats=5, ratio=2.0, grid_h=20, grid_w=10):
+   open_window(grid_h, grid_w)
+   times = {1: [], 2: []}
+   for _ in range(repeats):
+      for n_players in (1, 2):
+         times[n_players].append(measure(n_players, grid_h, grid_w, frames))
+   measured_ratio = min(times[2]) / min(times[1])
+   passed = measured_ratio < ratio
+   for n_players in (1, 2):
+      print("%d game grid%s %8.3f ms/frame" % (
+         n_players, "s" if n_players > 1 else " ", min(times[n_players])))
+   print("ratio %.2fx (best of %d, limit %.2fx) %s" % (
+      measured_ratio, repeats, ratio, "ok" if passed else "FAIL"))
+   return passed
+
+if __name__ == '__main__':
+   parser = argparse.ArgumentParser(description="Versus mode frame benchmark")
+   parser.add_argument("--frames", type=int, default=3000)
+   parser.add_argument("--repeats", type=int, default=5)
+   # the frame time of two game grids must be less than this ratio times the
+   # frame time of one game grid
+   parser.add_argument("--ratio", type=float, default=2.0)
+   args = parser.parse_args()
+   sys.exit(0 if run(args.frames, args.repeats, args.ratio) else 1)